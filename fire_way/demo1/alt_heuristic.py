@@ -0,0 +1,256 @@
+"""
+ALT启发式（A*、Landmarks、Triangle inequality）
+预先计算从K个锚点到所有网格的精确距离，查询时用三角不等式
+|d(L, n) - d(L, goal)| <= d(n, goal) 得到比欧几里得距离紧得多的下界
+"""
+import os
+import json
+import hashlib
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Callable
+from building_map import BuildingMap
+from compiled_graph import CompiledGraph, dijkstra_buckets
+from array_pathfinder import ArrayPathFinder3D
+from pathfinder_3d import HEURISTIC_SCALE
+
+
+Cell = Tuple[int, int, int]
+
+
+def _npy_path(path: str) -> str:
+    path = str(path)
+    return path if path.endswith('.npy') else path + '.npy'
+
+
+class AnchorTables:
+    """
+    锚点距离表
+
+    distances[i, k] 为第 i 个网格到第 k 个锚点的最短距离（float32，不可达为 inf）。
+    地图只增加障碍物时距离只会变大，旧表给出的仍是下界，因此保留继续使用；
+    有网格变为可通行（或修改记录已丢失）时距离可能变小，下次使用前重新计算。
+    """
+
+    def __init__(self, graph: CompiledGraph, anchor_count: int = 8):
+        """
+        初始化距离表（首次使用时计算）
+
+        Args:
+            graph: 编译后的邻接图，决定连通方式和移动代价
+            anchor_count: 锚点数量K
+        """
+        self.graph = graph
+        self.map = graph.map
+        self.anchor_count = anchor_count
+        self.anchors: List[int] = []
+        self.distances: Optional[np.ndarray] = None
+        # float32 舍入误差的上界，计算下界时减去
+        self.tolerance = 0.0
+        self.version = -1
+
+    def _digest(self) -> str:
+        """地图内容的摘要（与网格的存储类型无关）"""
+        occupancy = np.packbits(np.asarray(self.map.grid) != 0)
+        return hashlib.sha1(repr(self.map.grid.shape).encode() + occupancy.tobytes()).hexdigest()
+
+    def _choose_anchors(self) -> List[int]:
+        """楼梯和电梯的两端优先作为锚点，其余用最远点法选取（通常落在角落）"""
+        height, depth = self.map.height, self.map.depth
+        anchors = []
+        for connector in self.map.connectors:
+            if not connector.floors:
+                continue
+            for y in (connector.floors[0], connector.floors[-1]):
+                if self.map.is_walkable(connector.x, y, connector.z):
+                    index = (connector.x * height + y) * depth + connector.z
+                    if index not in anchors:
+                        anchors.append(index)
+        return anchors[:self.anchor_count // 2]
+
+    def build(self):
+        """计算所有锚点的距离表"""
+        self.graph.ensure_current()
+        walkable = (self.map.grid == 0).ravel()
+        size = walkable.size
+        anchors = self._choose_anchors()
+        if not anchors and walkable.any():
+            # 从任意网格出发，取最远的网格作为第一个锚点
+            dist, _ = dijkstra_buckets(self.graph, [int(np.flatnonzero(walkable)[0])])
+            dist[~np.isfinite(dist)] = -1.0
+            anchors = [int(dist.argmax())]
+
+        columns = []
+        nearest = np.full(size, np.inf)
+        index = 0
+        while index < len(anchors) or (len(anchors) < self.anchor_count and walkable.any()):
+            if index == len(anchors):
+                # 最远点法：离已有锚点最远的网格；其他连通分量中的网格（距离为inf）优先
+                score = np.where(walkable, nearest, -1.0)
+                candidate = int(score.argmax())
+                if score[candidate] <= 0.0:
+                    break
+                anchors.append(candidate)
+            dist, _ = dijkstra_buckets(self.graph, [anchors[index]])
+            columns.append(dist.astype(np.float32))
+            nearest = np.minimum(nearest, dist)
+            index += 1
+
+        self.anchors = anchors
+        self.distances = (np.stack(columns, axis=1) if columns
+                          else np.zeros((size, 0), dtype=np.float32))
+        finite = self.distances[np.isfinite(self.distances)]
+        largest = float(finite.max()) if finite.size else 0.0
+        self.tolerance = 4 * float(np.finfo(np.float32).eps) * max(largest, 1.0)
+        self.version = self.map.version
+
+    def ensure_current(self):
+        """根据地图修改记录判断距离表是否仍可作为下界，否则重新计算"""
+        self.graph.ensure_current()
+        if self.distances is not None and self.version == self.map.version:
+            return
+        if self.distances is not None:
+            changes = self.map.changes_since(self.version)
+            if changes is not None and all(kind == 'blocked' for _, _, kind in changes):
+                self.version = self.map.version
+                return
+        self.build()
+
+    def lower_bound(self, goal_index: int) -> Callable[[int], float]:
+        """
+        返回到某个终点的下界函数，参数为扁平索引
+
+        Args:
+            goal_index: 终点的扁平索引
+
+        Returns:
+            下界函数；两个网格不连通时返回 inf
+        """
+        self.ensure_current()
+        table = self.distances
+        goal_row = table[goal_index].tolist()
+        tolerance = self.tolerance
+
+        def bound(index: int) -> float:
+            best = 0.0
+            for a, b in zip(table[index].tolist(), goal_row):
+                if a != b:
+                    # 一方为inf说明与锚点连通性不同，两者不连通
+                    diff = abs(a - b)
+                    if diff > best:
+                        best = diff
+            return best - tolerance if best > tolerance else 0.0
+
+        return bound
+
+    def save(self, path: str):
+        """
+        保存距离表：distances 写入 .npy（可内存映射），锚点和地图摘要写入 .json
+
+        Args:
+            path: .npy 文件路径
+        """
+        self.ensure_current()
+        path = _npy_path(path)
+        np.save(path, self.distances)
+        with open(path[:-4] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'anchors': self.anchors, 'tolerance': self.tolerance,
+                       'allow_diagonal': self.graph.allow_diagonal,
+                       'digest': self._digest()}, f)
+
+    def load(self, path: str, mmap_mode: Optional[str] = 'r') -> bool:
+        """
+        加载 save 保存的距离表，地图内容与保存时不同则不使用
+
+        Args:
+            path: .npy 文件路径
+            mmap_mode: 传给 np.load 的内存映射模式
+
+        Returns:
+            是否成功加载
+        """
+        path = _npy_path(path)
+        try:
+            with open(path[:-4] + '.json', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            return False
+        if (metadata['allow_diagonal'] != self.graph.allow_diagonal or
+                metadata['digest'] != self._digest()):
+            print(f"警告：距离表 {path} 与当前地图不一致，将重新计算")
+            return False
+        distances = np.load(path, mmap_mode=mmap_mode)
+        if distances.shape[0] != self.map.grid.size:
+            return False
+        self.anchors = metadata['anchors']
+        self.tolerance = metadata['tolerance']
+        self.distances = distances
+        self.version = self.map.version
+        return True
+
+
+class ALTPathFinder(ArrayPathFinder3D):
+    """
+    使用ALT下界作为启发式的数组A*（method='alt'）
+
+    下界来自同一张图上的精确距离，是可采纳且一致的，返回的路径代价与
+    ArrayPathFinder3D 相同，但在跨楼层和需要绕墙的查询中展开的节点少得多。
+    """
+
+    def __init__(self, building_map: BuildingMap, anchor_count: int = 8):
+        """
+        初始化路径规划器
+
+        Args:
+            building_map: 建筑物地图对象
+            anchor_count: 锚点数量K
+        """
+        super().__init__(building_map)
+        self.anchor_count = anchor_count
+        self.tables: Dict[bool, AnchorTables] = {}
+
+    def get_tables(self, allow_diagonal: bool = True) -> AnchorTables:
+        """获取某种连通方式的锚点距离表，首次使用时创建"""
+        tables = self.tables.get(allow_diagonal)
+        if tables is None:
+            tables = AnchorTables(self.get_graph(allow_diagonal), self.anchor_count)
+            self.tables[allow_diagonal] = tables
+        return tables
+
+    def _goal_heuristic(self, goal: Cell, allow_diagonal: bool) -> Callable[[int], float]:
+        bound = self.get_tables(allow_diagonal).lower_bound(self.encode(goal))
+        decode, euclidean = self.decode, self.heuristic
+        # 与（按对角线代价缩放后一致的）欧几里得距离取较大者，开阔区域中也不比原启发式差
+        return lambda index: max(bound(index),
+                                 euclidean(decode(index), goal) * HEURISTIC_SCALE)
+
+    @staticmethod
+    def _table_path(path: str, allow_diagonal: bool) -> str:
+        stem = _npy_path(path)[:-4]
+        return f"{stem}.alt{26 if allow_diagonal else 6}.npy"
+
+    def save_tables(self, path: str):
+        """
+        将已计算的距离表保存在地图文件旁（<名称>.alt26.npy / <名称>.alt6.npy）
+
+        Args:
+            path: 地图的 .npy 文件路径
+        """
+        for allow_diagonal, tables in self.tables.items():
+            if tables.distances is not None:
+                tables.save(self._table_path(path, allow_diagonal))
+
+    def load_tables(self, path: str, mmap_mode: Optional[str] = 'r'):
+        """
+        加载地图文件旁保存的距离表
+
+        Args:
+            path: 地图的 .npy 文件路径
+            mmap_mode: 传给 np.load 的内存映射模式
+        """
+        for allow_diagonal in (True, False):
+            table_path = self._table_path(path, allow_diagonal)
+            if not os.path.exists(table_path):
+                continue
+            tables = AnchorTables(self.get_graph(allow_diagonal), self.anchor_count)
+            if tables.load(table_path, mmap_mode):
+                self.tables[allow_diagonal] = tables
@@ -0,0 +1,206 @@
+"""
+基于数组缓冲区的3D A*路径规划引擎
+将网格位置编码为 BuildingMap.grid 的扁平整数索引，
+g值、父节点和关闭标记保存在预分配的数组中并在多次查询间复用，
+邻居和移动代价直接读取编译后的CSR邻接图
+"""
+import heapq
+import threading
+from array import array
+from typing import List, Tuple, Optional, Dict, Callable
+from building_map import BuildingMap
+from compiled_graph import CompiledGraph
+from pathfinder_3d import PathFinder3D
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED, UNREACHABLE
+
+
+INF = float('inf')
+
+
+class SearchBuffers:
+    """单个线程使用的搜索缓冲区"""
+
+    def __init__(self, size: int):
+        """
+        初始化缓冲区
+
+        Args:
+            size: 网格总数（width * height * depth）
+        """
+        self.size = size
+        self.g = array('d', bytes(8 * size))        # 起点到各位置的代价
+        self.parent = array('q', bytes(8 * size))   # 父节点索引
+        # 以查询编号作为标记，避免每次查询清空整个缓冲区
+        self.seen = array('I', bytes(4 * size))
+        self.closed = array('I', bytes(4 * size))
+        self.query_id = 0
+
+    def next_query(self) -> int:
+        """开始新的查询，返回本次查询编号"""
+        self.query_id += 1
+        if self.query_id >= 0xFFFFFFFF:
+            # 编号用尽时才整体清空
+            for i in range(self.size):
+                self.seen[i] = 0
+                self.closed[i] = 0
+            self.query_id = 1
+        return self.query_id
+
+
+class ArrayPathFinder3D(PathFinder3D):
+    """使用扁平索引和数组缓冲区的3D A*路径规划器"""
+
+    def __init__(self, building_map: BuildingMap):
+        """
+        初始化路径规划器
+
+        Args:
+            building_map: 建筑物地图对象
+        """
+        super().__init__(building_map)
+        # 每个线程一套缓冲区，并发查询互不干扰
+        self._local = threading.local()
+        # 按连通方式（26方向/6方向）缓存编译后的邻接图
+        self.graphs: Dict[bool, CompiledGraph] = {}
+    
+    def get_graph(self, allow_diagonal: bool = True) -> CompiledGraph:
+        """
+        获取编译后的邻接图，首次使用时编译，地图变化后自动重建
+        
+        Args:
+            allow_diagonal: 是否允许对角线移动
+        
+        Returns:
+            CompiledGraph 对象
+        """
+        graph = self.graphs.get(allow_diagonal)
+        if graph is None:
+            graph = CompiledGraph(self.map, allow_diagonal, self.get_cost)
+            self.graphs[allow_diagonal] = graph
+        else:
+            graph.ensure_current()
+        return graph
+
+    def _get_buffers(self) -> SearchBuffers:
+        """获取当前线程的搜索缓冲区，地图尺寸变化时重新分配"""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None or buffers.size != self.map.grid.size:
+            buffers = SearchBuffers(self.map.grid.size)
+            self._local.buffers = buffers
+        return buffers
+
+    def encode(self, pos: Tuple[int, int, int]) -> int:
+        """将位置 (x, y, z) 编码为扁平索引"""
+        return (pos[0] * self.map.height + pos[1]) * self.map.depth + pos[2]
+
+    def decode(self, index: int) -> Tuple[int, int, int]:
+        """将扁平索引解码为位置 (x, y, z)"""
+        x, rest = divmod(index, self.map.height * self.map.depth)
+        y, z = divmod(rest, self.map.depth)
+        return (x, y, z)
+
+    def _goal_heuristic(self, goal: Tuple[int, int, int],
+                        allow_diagonal: bool) -> Callable[[int], float]:
+        """
+        返回某次查询使用的启发式函数，参数为扁平索引
+
+        子类可以重写以使用其他下界（返回 INF 表示无法到达终点）。
+        """
+        decode, heuristic = self.decode, self.heuristic
+        return lambda index: heuristic(decode(index), goal)
+
+    def find_path(self, start: Tuple[int, int, int],
+                  goal: Tuple[int, int, int],
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        使用A*算法查找路径（与 PathFinder3D.find_path 接口相同）
+
+        启发式和移动代价相同，但返回的路径和代价可能不同：距离相等时选择的路径不同，
+        而 PathFinder3D 在堆中原地修改节点的 f 值，偶尔返回更长的路径（例如
+        generate_building(40, 30, 4, seed=1) 上 (36,1,21) 到 (1,0,10)，'astar' 为49.342，
+        本方法为49.028，与精确Dijkstra相同）。欧几里得启发式在对角线代价1.414下略有高估，
+        因此本方法也不严格保证最优（benchmark.py --check 与精确Dijkstra对比）。
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许对角线移动
+            stats: 搜索统计对象（可选）
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+
+        if not self.map.is_walkable(*goal):
+            print(f"错误：终点 {goal} 不可通行")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        graph = self.get_graph(allow_diagonal)
+        heuristic = self._goal_heuristic(goal, allow_diagonal)
+        push, pop, graph_neighbors = heapq.heappush, heapq.heappop, graph.neighbors
+        if stats is not None:
+            push, pop = stats.wrap_heap(push, pop)
+            graph_neighbors = stats.wrap_neighbors(graph_neighbors)
+
+        buffers = self._get_buffers()
+        qid = buffers.next_query()
+        g, parent, seen, closed = (buffers.g, buffers.parent,
+                                   buffers.seen, buffers.closed)
+
+        start_index = self.encode(start)
+        goal_index = self.encode(goal)
+
+        g[start_index] = 0.0
+        parent[start_index] = -1
+        seen[start_index] = qid
+        h = heuristic(start_index)
+        if h == INF:
+            return stats.fail(UNREACHABLE) if stats is not None else None
+        open_heap = [(h, h, start_index)]  # (f, h, index)，惰性删除
+        if stats is not None:
+            stats.peak_open = 1
+
+        while open_heap:
+            _, _, current = pop(open_heap)
+            if closed[current] == qid:
+                continue  # 过期条目
+
+            if current == goal_index:
+                path = []
+                index = current
+                while index != -1:
+                    path.append(self.decode(index))
+                    index = parent[index]
+                if stats is not None:
+                    stats.finish(path)
+                return path[::-1]
+
+            closed[current] = qid
+            current_g = g[current]
+
+            neighbors, costs = graph_neighbors(current)
+            for neighbor, cost in zip(neighbors, costs):
+                if cost == INF or closed[neighbor] == qid:
+                    continue
+
+                tentative_g = current_g + cost
+                if seen[neighbor] == qid and tentative_g >= g[neighbor]:
+                    continue
+                seen[neighbor] = qid
+                h = heuristic(neighbor)
+                if h == INF:
+                    continue  # 已知无法从该网格到达终点
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                push(open_heap, (tentative_g + h, h, neighbor))
+
+        if stats is not None:
+            stats.finish(None)
+        return None
@@ -0,0 +1,124 @@
+"""
+批量导航
+将 BuildingMap.grid 放入 multiprocessing.shared_memory，由进程池并行处理
+大量查询，各任务之间不再重复序列化地图。地图是用 BuildingMap.load 只读映射的
+文件时，工作进程直接映射同一个文件，通过操作系统页缓存共享
+"""
+import os
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple, Optional, Dict, Sequence
+
+
+Cell = Tuple[int, int, int]
+
+# 工作进程内的导航系统（由 _init_worker 创建）
+_worker_navigation = None
+_worker_memory = None
+
+
+def _init_worker(memory_name: str, shape: Tuple[int, int, int], dtype: str,
+                 connectors: list):
+    """工作进程初始化：附加到共享内存中的网格"""
+    global _worker_navigation, _worker_memory
+    from building_map import BuildingMap
+    from navigation_3d import Navigation3D
+
+    _worker_memory = SharedMemory(name=memory_name)
+    grid = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_memory.buf)
+    building_map = BuildingMap.from_array(grid, copy=False)
+    building_map.connectors = connectors
+    _worker_navigation = Navigation3D.from_building_map(building_map)
+
+
+def _init_mapped_worker(path: str, connectors: list):
+    """工作进程初始化：只读映射地图文件"""
+    global _worker_navigation
+    from building_map import BuildingMap
+    from navigation_3d import Navigation3D
+
+    building_map = BuildingMap.load(path, mmap_mode='r')
+    building_map.connectors = connectors
+    _worker_navigation = Navigation3D.from_building_map(building_map)
+
+
+def _mapped_file(grid: np.ndarray) -> Optional[str]:
+    """网格是只读映射的 .npy 文件时返回文件路径"""
+    if isinstance(grid, np.memmap) and grid.mode == 'r' and grid.filename:
+        return grid.filename
+    return None
+
+
+def _route(navigation, start: Cell, goal: Cell, allow_diagonal: bool,
+           method: str) -> Dict:
+    """执行单个查询并返回带状态的结果"""
+    building_map = navigation.building_map
+    if not building_map.is_walkable(*start):
+        return {'status': 'invalid', 'path': None, 'error': f"起点 {start} 不可通行"}
+    if not building_map.is_walkable(*goal):
+        return {'status': 'invalid', 'path': None, 'error': f"终点 {goal} 不可通行"}
+    try:
+        path = navigation.navigate(start, goal, allow_diagonal, method)
+    except Exception as exc:  # 单个查询失败不影响整个批次
+        return {'status': 'error', 'path': None, 'error': repr(exc)}
+    if path is None:
+        return {'status': 'no_path', 'path': None, 'error': None}
+    return {'status': 'ok', 'path': path, 'error': None}
+
+
+def _worker_route(task: Tuple[Cell, Cell, bool, str]) -> Dict:
+    start, goal, allow_diagonal, method = task
+    return _route(_worker_navigation, start, goal, allow_diagonal, method)
+
+
+def navigate_many(navigation, starts: Sequence[Cell], goals: Sequence[Cell],
+                  allow_diagonal: bool = True, method: str = 'array',
+                  processes: Optional[int] = None,
+                  chunksize: int = 64) -> List[Dict]:
+    """
+    并行计算多条路径
+
+    Args:
+        navigation: Navigation3D 对象
+        starts: 起点列表
+        goals: 终点列表，与 starts 一一对应
+        allow_diagonal: 是否允许对角线移动
+        method: 寻路引擎名称
+        processes: 工作进程数，默认为CPU核数；为1时在当前进程内顺序计算
+        chunksize: 每次分发给工作进程的查询数
+
+    Returns:
+        与输入顺序一致的结果列表，每项为
+        {'status': 'ok'|'no_path'|'invalid'|'error', 'path': 路径或None, 'error': 说明或None}
+    """
+    if len(starts) != len(goals):
+        raise ValueError("starts 和 goals 的长度必须相同")
+
+    tasks = [(tuple(start), tuple(goal), allow_diagonal, method)
+             for start, goal in zip(starts, goals)]
+    if not tasks:
+        return []
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return [_route(navigation, *task) for task in tasks]
+
+    grid = navigation.building_map.grid
+    path = _mapped_file(grid)
+    if path is not None:
+        init_args = (path, navigation.building_map.connectors)
+        with Pool(processes, initializer=_init_mapped_worker, initargs=init_args) as pool:
+            return list(pool.imap(_worker_route, tasks, chunksize=chunksize))
+
+    memory = SharedMemory(create=True, size=max(grid.nbytes, 1))
+    try:
+        # 地图只复制一次到共享内存，工作进程直接映射使用
+        np.ndarray(grid.shape, dtype=grid.dtype, buffer=memory.buf)[...] = grid
+        init_args = (memory.name, grid.shape, grid.dtype.str,
+                     navigation.building_map.connectors)
+        with Pool(processes, initializer=_init_worker, initargs=init_args) as pool:
+            return list(pool.imap(_worker_route, tasks, chunksize=chunksize))
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,422 @@
+"""
+寻路引擎性能基准
+在 building_generator 生成的合成建筑上测量各寻路引擎和 Navigation3D 接口的
+查询延迟分位数、每秒展开节点数、峰值内存和地图构建时间，结果输出为JSON，
+可以与之前版本的结果对比，发现性能回退
+
+用法：
+    python benchmark.py --preset medium --output results.json
+    python benchmark.py --preset medium --compare results.json
+    python benchmark.py --preset small --check
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+from typing import List, Tuple, Optional, Dict
+from building_generator import generate_building
+from navigation_3d import Navigation3D
+from compiled_graph import dijkstra_buckets
+from search_stats import SearchStats
+
+
+Cell = Tuple[int, int, int]
+
+# 结果格式版本，格式变化时递增
+SCHEMA_VERSION = 1
+
+# 预设的建筑规模（传给 generate_building）
+PRESETS = {
+    'small': {'width': 40, 'depth': 30, 'floors': 3},
+    'medium': {'width': 120, 'depth': 80, 'floors': 10},
+    'large': {'width': 300, 'depth': 200, 'floors': 40},
+}
+
+# 除寻路引擎名称外，还可以测量 'nearest_exit'（navigate_to_nearest_exit）和
+# 'tour'（navigate_through_landmarks，每个 TOUR_SIZES 一项结果）
+DEFAULT_METHODS = ('astar', 'array', 'alt', 'bidirectional', 'floor', 'jps', 'hierarchical',
+                   'nearest_exit', 'tour')
+
+# 巡访测量的地标数和起点数（每次巡访比单个查询慢得多，只用前若干个查询的起点）
+TOUR_SIZES = (15, 18)
+TOUR_QUERIES = 10
+
+# 内存测量使用的查询数（tracemalloc 会明显拖慢查询，只用前若干个）
+MEMORY_QUERIES = 20
+
+# 延迟变化小于该值（毫秒）时不视为回退，避免亚毫秒级查询的计时噪声
+MIN_LATENCY_DELTA_MS = 0.05
+
+# --check 与精确Dijkstra对比路径代价的引擎（代价模型都是 get_cost）
+CHECK_METHODS = ('astar', 'array', 'alt', 'bidirectional')
+# 其中超出误差即视为失败的引擎（'astar' 偶尔返回更长的路径，只报告）
+STRICT_METHODS = ('array', 'alt', 'bidirectional')
+# 允许的相对误差（欧几里得启发式在对角线代价1.414下略有高估）
+CHECK_TOLERANCE = 1e-3
+
+
+def make_queries(nav: Navigation3D, count: int, seed: int = 0) -> List[Tuple[Cell, Cell]]:
+    """
+    随机选取可通行的起点和终点
+
+    Args:
+        nav: 导航系统
+        count: 查询数
+        seed: 随机种子
+
+    Returns:
+        (起点, 终点) 列表
+    """
+    grid = nav.building_map.grid
+    free = np.flatnonzero(np.asarray(grid).ravel() == 0)
+    if free.size == 0:
+        return []
+    rng = np.random.default_rng(seed)
+    picks = np.unravel_index(rng.choice(free, size=(count, 2)), grid.shape)
+    cells = np.stack(picks, axis=-1).tolist()
+    return [(tuple(start), tuple(goal)) for start, goal in cells]
+
+
+def _summary(samples: List[float]) -> Dict:
+    """延迟分布（毫秒）"""
+    if not samples:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None, 'mean': None}
+    values = np.array(samples) * 1000.0
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': float(values.max()), 'mean': float(values.mean())}
+
+
+def _query_function(nav: Navigation3D, method: str):
+    """返回执行单个查询的函数（不使用路径缓存），可选参数为 SearchStats"""
+    if method == 'nearest_exit':
+        return lambda start, goal, stats=None: nav.navigate_to_nearest_exit(start)
+    return lambda start, goal, stats=None: nav.navigate(start, goal, method=method,
+                                                         use_cache=False, stats=stats)
+
+
+def run_method(nav: Navigation3D, method: str,
+               queries: List[Tuple[Cell, Cell]], repeat: int = 3) -> Dict:
+    """
+    测量一个寻路引擎或接口
+
+    第一个查询单独计时（包含邻接图编译、距离表等首次使用时的准备工作），
+    之后逐个计时得到延迟分布（每个查询取 repeat 次中最快的一次，减少计时噪声）；
+    再用 SearchStats 重复一遍统计展开节点数、过期条目数和开放列表峰值，
+    最后用前 MEMORY_QUERIES 个查询测量峰值内存。
+
+    Args:
+        nav: 导航系统
+        method: 引擎名称或 'nearest_exit'
+        queries: (起点, 终点) 列表
+        repeat: 每个查询的计时次数
+
+    Returns:
+        测量结果字典
+    """
+    query = _query_function(nav, method)
+    result = {'method': method, 'queries': len(queries)}
+    if not queries:
+        return result
+
+    began = time.perf_counter()
+    query(*queries[0])
+    result['first_query_ms'] = (time.perf_counter() - began) * 1000.0
+
+    latencies = [float('inf')] * len(queries)
+    found = 0
+    for attempt in range(max(repeat, 1)):
+        for i, (start, goal) in enumerate(queries):
+            began = time.perf_counter()
+            path = query(start, goal)
+            latencies[i] = min(latencies[i], time.perf_counter() - began)
+            if attempt == 0:
+                found += path is not None
+    result['found'] = found
+    result['latency_ms'] = _summary(latencies)
+
+    expanded, stale, peak = 0, 0, 0
+    if method != 'nearest_exit':
+        stats = SearchStats(timing=False)
+        for start, goal in queries:
+            query(start, goal, stats)
+            expanded += stats.nodes_expanded or 0
+            stale += stats.stale_pops or 0
+            peak = max(peak, stats.peak_open)
+    if expanded:
+        result['nodes_expanded'] = expanded
+        result['nodes_per_second'] = expanded / sum(latencies) if sum(latencies) > 0 else None
+        result['stale_pops'] = stale
+        result['peak_open'] = peak
+    else:
+        result['nodes_expanded'] = None
+        result['nodes_per_second'] = None
+
+    tracemalloc.start()
+    try:
+        for start, goal in queries[:MEMORY_QUERIES]:
+            query(start, goal)
+        result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_tour(nav: Navigation3D, queries: List[Tuple[Cell, Cell]],
+             sizes: Tuple[int, ...] = TOUR_SIZES, repeat: int = 3) -> List[Dict]:
+    """
+    测量多地标巡访（如消防员搜索多个房间）
+
+    前 max(sizes) 个查询的终点注册为地标，前 TOUR_QUERIES 个查询的起点作为巡访起点。
+    first_query_ms 为清空最短路径树缓存后的第一次巡访（包含每个地标的Dijkstra），
+    latency_ms 为地标的树已缓存时的延迟（只需从起点搜索一次，地图不变时的常见情况）。
+
+    Args:
+        nav: 导航系统
+        queries: (起点, 终点) 列表
+        sizes: 地标数
+        repeat: 每个查询的计时次数
+
+    Returns:
+        每个地标数一项测量结果（method 为 'tour_<地标数>'）
+    """
+    results = []
+    rooms = [goal for _, goal in queries[:max(sizes, default=0)]]
+    starts = [start for start, _ in queries[:TOUR_QUERIES]]
+    for size in sizes:
+        result = {'method': f'tour_{size}', 'landmarks': size, 'queries': len(starts)}
+        results.append(result)
+        if len(rooms) < size or not starts:
+            continue
+        names = []
+        for i, room in enumerate(rooms[:size]):
+            nav.landmarks[f'_benchmark_{i}'] = room
+            names.append(f'_benchmark_{i}')
+        nav.tour_trees.clear()
+
+        began = time.perf_counter()
+        nav.navigate_through_landmarks(starts[0], names)
+        result['first_query_ms'] = (time.perf_counter() - began) * 1000.0
+        latencies = [float('inf')] * len(starts)
+        found = 0
+        for attempt in range(max(repeat, 1)):
+            for i, start in enumerate(starts):
+                began = time.perf_counter()
+                path = nav.navigate_through_landmarks(start, names)
+                latencies[i] = min(latencies[i], time.perf_counter() - began)
+                if attempt == 0:
+                    found += path is not None
+        result['found'] = found
+        result['latency_ms'] = _summary(latencies)
+        for name in names:
+            del nav.landmarks[name]
+    return results
+
+
+def check_paths(nav: Navigation3D, queries: List[Tuple[Cell, Cell]],
+                methods: Tuple[str, ...] = CHECK_METHODS,
+                allow_diagonal: bool = True) -> Dict[str, Dict]:
+    """
+    将各引擎的路径代价与精确Dijkstra的最短距离对比
+
+    Args:
+        nav: 导航系统
+        queries: (起点, 终点) 列表
+        methods: 要检查的引擎
+        allow_diagonal: 是否允许对角线移动
+
+    Returns:
+        {引擎: {'checked', 'longer', 'max_excess', 'max_relative', 'mismatched'}}，
+        mismatched 为一方找到路径而另一方没有的查询数
+    """
+    graph = nav.pathfinders['array'].get_graph(allow_diagonal)
+    encode = nav.pathfinders['array'].encode
+    exact = []
+    for start, goal in queries:
+        dist, _ = dijkstra_buckets(graph, [encode(start)], [encode(goal)])
+        exact.append(float(dist[encode(goal)]))
+
+    report = {}
+    for method in methods:
+        if method not in nav.pathfinders:
+            continue
+        result = {'checked': 0, 'longer': 0, 'max_excess': 0.0,
+                  'max_relative': 0.0, 'mismatched': 0}
+        for (start, goal), best in zip(queries, exact):
+            path = nav.navigate(start, goal, allow_diagonal, method=method, use_cache=False)
+            if (path is None) != (best == float('inf')):
+                result['mismatched'] += 1
+                continue
+            if path is None:
+                continue
+            result['checked'] += 1
+            excess = nav.get_path_length(path) - best
+            if excess > 1e-9:
+                result['longer'] += 1
+                result['max_excess'] = max(result['max_excess'], excess)
+                result['max_relative'] = max(result['max_relative'], excess / best)
+        report[method] = result
+    return report
+
+
+def run_benchmark(params: Dict, queries: int = 100,
+                  methods: Tuple[str, ...] = DEFAULT_METHODS, seed: int = 0,
+                  repeat: int = 3) -> Dict:
+    """
+    生成建筑并测量所有引擎
+
+    Args:
+        params: 传给 generate_building 的参数
+        queries: 每个引擎的查询数
+        methods: 要测量的引擎
+        seed: 建筑和查询的随机种子
+        repeat: 每个查询的计时次数
+
+    Returns:
+        可直接写成JSON的结果字典
+    """
+    tracemalloc.start()
+    began = time.perf_counter()
+    nav = generate_building(seed=seed, **params)
+    build_seconds = time.perf_counter() - began
+    build_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    grid = nav.building_map.grid
+    pairs = make_queries(nav, queries, seed)
+    results = []
+    for method in methods:
+        if method == 'tour':
+            results.extend(run_tour(nav, pairs, repeat=repeat))
+            continue
+        if method != 'nearest_exit' and method not in nav.pathfinders:
+            print(f"警告：未知的寻路方法 '{method}'，跳过", file=sys.stderr)
+            continue
+        results.append(run_method(nav, method, pairs, repeat))
+
+    report = {
+        'schema': SCHEMA_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'params': params,
+        'build': {
+            'seconds': build_seconds,
+            'peak_memory_bytes': build_peak,
+            'cells': int(grid.size),
+            'walkable_cells': int(np.count_nonzero(np.asarray(grid) == 0)),
+        },
+        'results': results,
+    }
+    try:
+        import resource
+        report['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        report['max_rss_kb'] = None
+    return report
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.5) -> List[str]:
+    """
+    与之前的结果对比，列出超过容差的性能回退
+
+    比较地图构建时间、各引擎的 p50/p90 延迟、每秒展开节点数和峰值内存。
+
+    Args:
+        baseline: 之前的结果
+        current: 本次的结果
+        tolerance: 允许的相对变化（0.5 表示变差不超过50%，低于此值的差异通常是计时噪声）
+
+    Returns:
+        回退说明列表，为空表示没有回退
+    """
+    regressions = []
+    if baseline.get('params') != current.get('params') or baseline.get('seed') != current.get('seed'):
+        regressions.append("警告：两次测量的建筑参数不同，结果不可比")
+
+    def check(name: str, old, new, higher_is_better: bool = False, min_delta: float = 0.0):
+        if old is None or new is None or old <= 0 or abs(new - old) < min_delta:
+            return
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{name}: {old:.4g} -> {new:.4g}（变差 {change:.0%}）")
+
+    check('build.seconds', baseline['build']['seconds'], current['build']['seconds'])
+    check('build.peak_memory_bytes', baseline['build']['peak_memory_bytes'],
+          current['build']['peak_memory_bytes'])
+    old_results = {r['method']: r for r in baseline.get('results', [])}
+    for result in current.get('results', []):
+        old = old_results.get(result['method'])
+        if old is None or 'latency_ms' not in old or 'latency_ms' not in result:
+            continue
+        method = result['method']
+        for key in ('p50', 'p90'):
+            check(f"{method}.latency_ms.{key}", old['latency_ms'][key], result['latency_ms'][key],
+                  min_delta=MIN_LATENCY_DELTA_MS)
+        check(f"{method}.nodes_per_second", old.get('nodes_per_second'),
+              result.get('nodes_per_second'), higher_is_better=True)
+        check(f"{method}.peak_memory_bytes", old.get('peak_memory_bytes'),
+              result.get('peak_memory_bytes'))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，有性能回退时返回1"""
+    parser = argparse.ArgumentParser(description="寻路引擎性能基准")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--width', type=int)
+    parser.add_argument('--depth', type=int)
+    parser.add_argument('--floors', type=int)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--methods', nargs='+', default=list(DEFAULT_METHODS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="每个查询的计时次数")
+    parser.add_argument('--output', help="结果JSON文件，默认输出到标准输出")
+    parser.add_argument('--compare', help="与之前的结果JSON对比")
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--check', action='store_true',
+                        help="将路径代价与精确Dijkstra对比，STRICT_METHODS 超出误差时返回1")
+    args = parser.parse_args(argv)
+
+    params = dict(PRESETS[args.preset])
+    for key in ('width', 'depth', 'floors'):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    report = run_benchmark(params, args.queries, tuple(args.methods), args.seed, args.repeat)
+    failures = []
+    if args.check:
+        nav = generate_building(seed=args.seed, **params)
+        methods = tuple(m for m in CHECK_METHODS if m in args.methods)
+        report['check'] = check_paths(nav, make_queries(nav, args.queries, args.seed), methods)
+        for method, result in report['check'].items():
+            if method in STRICT_METHODS and (result['mismatched'] or
+                                             result['max_relative'] > CHECK_TOLERANCE):
+                failures.append(f"{method}: 路径代价与精确Dijkstra不一致 {result}")
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for line in failures:
+        print(line, file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for line in regressions:
+            print(line, file=sys.stderr)
+        return 1 if regressions or failures else 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+双向A*路径规划引擎
+同时从起点和终点搜索，两个搜索相遇后按终止条件确认最短路径。
+使用平均势函数（两个方向的启发式之差的一半）：正向和反向搜索在约化代价下
+等价于双向Dijkstra，当两个开放列表的最小键值之和不小于已知最短路径时停止，
+返回的路径在 get_cost 代价下最优
+"""
+import heapq
+import threading
+from typing import List, Tuple, Optional, Callable
+from building_map import BuildingMap
+from array_pathfinder import ArrayPathFinder3D, SearchBuffers, INF
+from pathfinder_3d import STRAIGHT_COST, DIAGONAL_COST, FLOOR_COST
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+Cell = Tuple[int, int, int]
+
+
+def floor_distance(a: Cell, b: Cell, allow_diagonal: bool = True) -> float:
+    """
+    get_cost 代价模型下两点之间距离的下界（一致的启发式）
+
+    每跨一层至少花费 FLOOR_COST（水平偏移的附加代价为非负），同时最多在X和Z方向
+    各移动一格；剩余的水平距离按八方向（对角线代价 DIAGONAL_COST）计算。
+    6方向连通时为 FLOOR_COST * dy + dx + dz。比欧几里得距离更紧，跨楼层时尤其明显。
+
+    Args:
+        a: 位置1
+        b: 位置2
+        allow_diagonal: 是否允许对角线移动
+
+    Returns:
+        距离下界
+    """
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    dz = abs(a[2] - b[2])
+    if not allow_diagonal:
+        return FLOOR_COST * dy + STRAIGHT_COST * (dx + dz)
+    dx = max(dx - dy, 0)
+    dz = max(dz - dy, 0)
+    if dx < dz:
+        dx, dz = dz, dx
+    return FLOOR_COST * dy + DIAGONAL_COST * dz + STRAIGHT_COST * (dx - dz)
+
+
+class BidirectionalPathFinder(ArrayPathFinder3D):
+    """
+    双向A*（method='bidirectional'）
+
+    与 ArrayPathFinder3D 共用编译后的邻接图（CompiledGraph 的边是对称的，
+    反向搜索直接使用同一张图）。每次展开开放列表较小的一侧；一侧展开的节点
+    已被另一侧访问过时更新最短路径 mu，两侧最小键值之和不小于 mu 时结束。
+    use_heuristic=False 时为双向Dijkstra。
+    """
+
+    def __init__(self, building_map: BuildingMap, use_heuristic: bool = True):
+        """
+        初始化路径规划器
+
+        Args:
+            building_map: 建筑物地图对象
+            use_heuristic: 是否使用启发式（False 时为双向Dijkstra）
+        """
+        super().__init__(building_map)
+        self.use_heuristic = use_heuristic
+        self._reverse = threading.local()
+
+    def _get_reverse_buffers(self) -> SearchBuffers:
+        """获取当前线程反向搜索的缓冲区"""
+        buffers = getattr(self._reverse, 'buffers', None)
+        if buffers is None or buffers.size != self.map.grid.size:
+            buffers = SearchBuffers(self.map.grid.size)
+            self._reverse.buffers = buffers
+        return buffers
+
+    def _potential(self, start: Cell, goal: Cell,
+                   allow_diagonal: bool) -> Callable[[int], float]:
+        """
+        正向搜索的势函数 p(v) = (h_goal(v) - h_start(v)) / 2，反向搜索使用 -p(v)
+
+        两个方向的启发式都一致时，p 和 -p 也都一致，约化代价非负。
+        """
+        if not self.use_heuristic:
+            return lambda index: 0.0
+        decode = self.decode
+        return lambda index: (floor_distance(decode(index), goal, allow_diagonal) -
+                              floor_distance(decode(index), start, allow_diagonal)) / 2
+
+    def find_path(self, start: Cell, goal: Cell,
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """
+        使用双向A*查找路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许对角线移动
+            stats: 搜索统计对象（可选），两侧的展开和堆操作合计
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+
+        if not self.map.is_walkable(*goal):
+            print(f"错误：终点 {goal} 不可通行")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        start_index = self.encode(start)
+        goal_index = self.encode(goal)
+        if start_index == goal_index:
+            return stats.finish([start]) if stats is not None else [start]
+
+        graph = self.get_graph(allow_diagonal)
+        potential = self._potential(start, goal, allow_diagonal)
+        push, pop, graph_neighbors = heapq.heappush, heapq.heappop, graph.neighbors
+        if stats is not None:
+            push, pop = stats.wrap_heap(push, pop)
+            graph_neighbors = stats.wrap_neighbors(graph_neighbors)
+
+        forward, backward = self._get_buffers(), self._get_reverse_buffers()
+        qid = forward.next_query()
+        rid = backward.next_query()
+        g_f, parent_f, seen_f, closed_f = (forward.g, forward.parent,
+                                           forward.seen, forward.closed)
+        g_b, parent_b, seen_b, closed_b = (backward.g, backward.parent,
+                                           backward.seen, backward.closed)
+
+        g_f[start_index] = 0.0
+        parent_f[start_index] = -1
+        seen_f[start_index] = qid
+        g_b[goal_index] = 0.0
+        parent_b[goal_index] = -1
+        seen_b[goal_index] = rid
+        # 键值：正向 g_f + p，反向 g_b - p；惰性删除
+        open_f = [(potential(start_index), start_index)]
+        open_b = [(-potential(goal_index), goal_index)]
+        if stats is not None:
+            stats.peak_open = 1
+
+        best = INF      # 已知最短路径 mu
+        meeting = -1
+        while open_f and open_b:
+            # 约化代价下的双向Dijkstra终止条件
+            if open_f[0][0] + open_b[0][0] >= best:
+                break
+            # 展开开放列表较小的一侧
+            if len(open_f) <= len(open_b):
+                _, current = pop(open_f)
+                if closed_f[current] == qid:
+                    continue
+                closed_f[current] = qid
+                current_g = g_f[current]
+                neighbors, costs = graph_neighbors(current)
+                for neighbor, cost in zip(neighbors, costs):
+                    if cost == INF or closed_f[neighbor] == qid:
+                        continue
+                    tentative_g = current_g + cost
+                    if seen_f[neighbor] == qid and tentative_g >= g_f[neighbor]:
+                        continue
+                    seen_f[neighbor] = qid
+                    g_f[neighbor] = tentative_g
+                    parent_f[neighbor] = current
+                    push(open_f, (tentative_g + potential(neighbor), neighbor))
+                    if seen_b[neighbor] == rid and tentative_g + g_b[neighbor] < best:
+                        best = tentative_g + g_b[neighbor]
+                        meeting = neighbor
+            else:
+                _, current = pop(open_b)
+                if closed_b[current] == rid:
+                    continue
+                closed_b[current] = rid
+                current_g = g_b[current]
+                neighbors, costs = graph_neighbors(current)
+                for neighbor, cost in zip(neighbors, costs):
+                    if cost == INF or closed_b[neighbor] == rid:
+                        continue
+                    tentative_g = current_g + cost
+                    if seen_b[neighbor] == rid and tentative_g >= g_b[neighbor]:
+                        continue
+                    seen_b[neighbor] = rid
+                    g_b[neighbor] = tentative_g
+                    parent_b[neighbor] = current
+                    push(open_b, (tentative_g - potential(neighbor), neighbor))
+                    if seen_f[neighbor] == qid and tentative_g + g_f[neighbor] < best:
+                        best = tentative_g + g_f[neighbor]
+                        meeting = neighbor
+
+        if stats is not None and stats.nodes_expanded is not None:
+            # 没有单独的终点出队，未展开的出队都是过期条目
+            stats.stale_pops = stats.heap_pops - stats.nodes_expanded
+        if meeting == -1:
+            return stats.finish(None) if stats is not None else None
+
+        path = []
+        index = meeting
+        while index != -1:
+            path.append(self.decode(index))
+            index = parent_f[index]
+        path.reverse()
+        index = parent_b[meeting]
+        while index != -1:
+            path.append(self.decode(index))
+            index = parent_b[index]
+        if stats is not None:
+            stats.finish(path)
+        return path
@@ -0,0 +1,186 @@
+"""
+合成建筑生成器
+按参数生成接近真实的楼层布局：走廊、房间、楼梯间和电梯厅，
+用固定的随机种子保证同一组参数总是得到同一栋建筑，用于测试和性能基准
+"""
+import numpy as np
+from typing import List, Tuple
+from building_map import BuildingMap
+from navigation_3d import Navigation3D
+
+
+def generate_building(width: int = 60, depth: int = 40, floors: int = 5,
+                      corridor_width: int = 2, corridor_spacing: int = 18,
+                      block_length: int = 24, room_width: Tuple[int, int] = (4, 8),
+                      room_density: float = 0.8, stairwells: int = 2,
+                      elevator_banks: int = 1, elevators_per_bank: int = 2,
+                      exits: int = 2, seed: int = 0, dtype=np.uint8) -> Navigation3D:
+    """
+    生成一栋各层平面相同的合成建筑
+
+    每层沿X方向有若干条平行的主走廊（间距 corridor_spacing），每隔 block_length
+    有一条贯通的横向走廊；走廊之间的区域按 room_density 的概率划分为房间
+    （宽度在 room_width 范围内随机，每间一个门），否则为开敞办公区。
+    楼梯间位于第一条主走廊北侧，电梯厅位于其南侧；出口设在首层主走廊两端和
+    横向走廊端部。最后填平与走廊不连通的网格，保证所有可通行网格都能到达出口。
+
+    Args:
+        width: X方向大小
+        depth: Z方向大小
+        floors: 楼层数
+        corridor_width: 走廊宽度
+        corridor_spacing: 主走廊之间的距离
+        block_length: 横向走廊之间的距离
+        room_width: 房间宽度范围 (最小, 最大)
+        room_density: 走廊之间的区域划分为房间的概率（0~1）
+        stairwells: 楼梯间数量（均连接所有楼层）
+        elevator_banks: 电梯厅数量
+        elevators_per_bank: 每个电梯厅的电梯数（服务所有楼层）
+        exits: 首层出口数量（1~4）
+        seed: 随机种子
+        dtype: 网格的存储类型
+
+    Returns:
+        Navigation3D 对象，出口、楼梯和电梯已登记为地标
+        （'出口1'、'楼梯1'、'电梯1-1' 等，位置在首层）
+    """
+    if width < 12 or depth < 12 or floors < 1:
+        raise ValueError(f"建筑尺寸 {(width, floors, depth)} 过小，至少为 12x1x12")
+    if not 1 <= exits <= 4:
+        raise ValueError(f"出口数量 {exits} 应为1~4")
+    if room_width[0] < 1 or room_width[1] < room_width[0]:
+        raise ValueError(f"房间宽度范围 {room_width} 无效")
+    rng = np.random.default_rng(seed)
+    cw = corridor_width
+
+    plan = np.zeros((width, depth), dtype=bool)   # True 为墙
+    plan[[0, -1], :] = True
+    plan[:, [0, -1]] = True
+
+    # 主走廊（沿X方向）的起始Z坐标，以及横向走廊（沿Z方向）的起始X坐标
+    spines = list(range(max(corridor_spacing // 2, 6), depth - 1 - cw, corridor_spacing))
+    spines = [z for z in spines if z + cw <= depth - 2] or [depth // 2 - cw // 2]
+    cross = list(range(block_length, width - 1 - cw, block_length))
+    bays = _intervals(1, width - 1, cross, cw)
+
+    # 走廊之间的条带：(z起点, z终点, 靠走廊一侧的墙所在行)
+    strips = []
+    for i, spine in enumerate(spines):
+        start = 1 if i == 0 else (spines[i - 1] + cw + spine) // 2 + 1
+        strips.append((start, spine, spine - 1))
+        end = depth - 1 if i == len(spines) - 1 else (spine + cw + spines[i + 1]) // 2
+        strips.append((spine + cw, end, spine + cw))
+        if i < len(spines) - 1:
+            # 背靠背房间之间的墙
+            plan[:, end] = True
+
+    for z0, z1, door_row in strips:
+        if z1 - z0 < 2:
+            continue
+        for x0, x1 in bays:
+            if rng.random() >= room_density:
+                continue  # 开敞办公区
+            plan[x0:x1, door_row] = True
+            x = x0
+            while x < x1:
+                room_end = min(x + int(rng.integers(room_width[0], room_width[1] + 1)), x1)
+                if x1 - room_end <= room_width[0]:
+                    room_end = x1  # 剩余宽度不足一间时并入本间
+                if room_end < x1:
+                    plan[room_end, z0:z1] = True
+                plan[int(rng.integers(x, room_end)), door_row] = False
+                x = room_end + 1
+
+    for z in spines:
+        plan[1:-1, z:z + cw] = False
+    for x in cross:
+        plan[x:x + cw, 1:-1] = False
+
+    # 楼梯间在第一条主走廊北侧，电梯厅在南侧（每个核心筒外圈为墙，朝走廊一侧敞开）
+    spine = spines[0]
+    stair_cells = []
+    if spine >= 5:
+        for x in _spread(stairwells, 3, width - 4):
+            plan[x - 2:x + 3, spine - 4:spine] = True
+            plan[x - 1:x + 2, spine - 3:spine] = False
+            stair_cells.append((x, spine - 2))
+    bank_cells = []
+    bank_width = 2 * elevators_per_bank - 1
+    if spine + cw + 4 <= depth - 1 and elevators_per_bank > 0:
+        for x in _spread(elevator_banks, 3, width - 3 - bank_width, centered=True):
+            plan[x - 2:x + bank_width + 2, spine + cw:spine + cw + 4] = True
+            plan[x - 1:x + bank_width + 1, spine + cw:spine + cw + 3] = False
+            bank_cells.append([(x + 2 * i, spine + cw + 1) for i in range(elevators_per_bank)])
+
+    z_mid = spine + cw // 2
+    exit_cells = [(1, z_mid), (width - 2, z_mid)]
+    if cross:
+        exit_cells += [(cross[0], 1), (cross[-1], depth - 2)]
+    else:
+        exit_cells += [(width // 2, 1), (width // 2, depth - 2)]
+        plan[width // 2, 1:spine] = False
+        plan[width // 2, spine + cw:depth - 1] = False
+    exit_cells = exit_cells[:exits]
+
+    plan = _fill_unreachable(plan, exit_cells[0])
+    occupancy = np.repeat(plan[:, None, :], floors, axis=1)
+    building_map = BuildingMap.from_array(occupancy, dtype=dtype)
+    for x, z in stair_cells:
+        building_map.add_stairs(x, z, 0, floors - 1)
+    for bank in bank_cells:
+        for x, z in bank:
+            building_map.add_elevator(x, z, list(range(floors)))
+
+    nav = Navigation3D.from_building_map(building_map)
+    for i, (x, z) in enumerate(exit_cells):
+        nav.add_landmark(f"出口{i + 1}", (x, 0, z), is_exit=True)
+    for i, (x, z) in enumerate(stair_cells):
+        nav.add_landmark(f"楼梯{i + 1}", (x, 0, z))
+    for i, bank in enumerate(bank_cells):
+        for j, (x, z) in enumerate(bank):
+            nav.add_landmark(f"电梯{i + 1}-{j + 1}", (x, 0, z))
+    return nav
+
+
+def _intervals(start: int, end: int, cuts: List[int], width: int) -> List[Tuple[int, int]]:
+    """[start, end) 被若干条宽度为 width 的走廊切开后的区间"""
+    intervals = []
+    for cut in cuts:
+        if cut > start:
+            intervals.append((start, cut))
+        start = cut + width
+    if end > start:
+        intervals.append((start, end))
+    return intervals
+
+
+def _spread(count: int, low: int, high: int, centered: bool = False) -> List[int]:
+    """
+    在 [low, high] 内均匀分布的 count 个整数位置
+
+    centered 为 False 时包含两端（如楼梯间在走廊两头），为 True 时取各等分段的中点
+    """
+    if count <= 0 or high < low:
+        return []
+    if centered:
+        values = low + (high - low) * (np.arange(count) + 0.5) / count
+    else:
+        values = np.linspace(low, high, count)
+    return sorted(set(int(round(v)) for v in values))
+
+
+def _fill_unreachable(plan: np.ndarray, seed_cell: Tuple[int, int]) -> np.ndarray:
+    """将与 seed_cell 不连通（4邻域）的可通行网格设为墙"""
+    free = ~plan
+    reached = np.zeros_like(free)
+    reached[seed_cell] = free[seed_cell]
+    while True:
+        grown = reached.copy()
+        grown[1:] |= reached[:-1]
+        grown[:-1] |= reached[1:]
+        grown[:, 1:] |= reached[:, :-1]
+        grown[:, :-1] |= reached[:, 1:]
+        grown &= free
+        if (grown == reached).all():
+            return ~reached
+        reached = grown
@@ -2,14 +2,78 @@
 建筑物内部3D地图表示
 使用3D网格来表示建筑物内部结构
 """
+import json
 import numpy as np
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Callable
+
+
+# 同一楼层内的移动（6方向）
+AXIS_DIRECTIONS = (
+    (1, 0, 0), (-1, 0, 0),  # 前后
+    (0, 0, 1), (0, 0, -1),  # 左右
+    (0, 1, 0), (0, -1, 0),  # 上下楼层
+)
+
+# 对角线方向（与6方向合计26方向）
+DIAGONAL_DIRECTIONS = (
+    (1, 0, 1), (1, 0, -1), (-1, 0, 1), (-1, 0, -1),
+    (1, 1, 0), (1, -1, 0), (-1, 1, 0), (-1, -1, 0),
+    (0, 1, 1), (0, 1, -1), (0, -1, 1), (0, -1, -1),
+    (1, 1, 1), (1, 1, -1), (1, -1, 1), (1, -1, -1),
+    (-1, 1, 1), (-1, 1, -1), (-1, -1, 1), (-1, -1, -1),
+)
+
+ALL_DIRECTIONS = AXIS_DIRECTIONS + DIAGONAL_DIRECTIONS
+
+
+class VerticalConnector:
+    """垂直连接设施（楼梯或电梯），楼层之间只能通过它们移动"""
+    
+    def __init__(self, kind: str, x: int, z: int, floors: List[int],
+                 cost_per_floor: float = 2.0, boarding_cost: float = 0.0):
+        """
+        初始化垂直连接
+        
+        Args:
+            kind: 'stairs' 或 'elevator'
+            x, z: 所在的X和Z坐标
+            floors: 连接的楼层列表
+            cost_per_floor: 每经过一层的代价（默认与 get_cost 的垂直移动一致）
+            boarding_cost: 每次使用的固定代价（如等待电梯）
+        """
+        self.kind = kind
+        self.x = x
+        self.z = z
+        self.floors = sorted(set(floors))
+        self.cost_per_floor = cost_per_floor
+        self.boarding_cost = boarding_cost
+    
+    def edges(self) -> List[Tuple[int, int, float]]:
+        """
+        获取该设施提供的楼层间连接
+        
+        楼梯只连接相邻的楼层，电梯可以直达任意两个服务楼层。
+        
+        Returns:
+            (起始楼层, 到达楼层, 代价) 列表，两个方向各一条
+        """
+        if self.kind == 'stairs':
+            pairs = [(a, b) for a, b in zip(self.floors, self.floors[1:])]
+        else:
+            pairs = [(a, b) for i, a in enumerate(self.floors)
+                     for b in self.floors[i + 1:]]
+        edges = []
+        for a, b in pairs:
+            cost = self.boarding_cost + self.cost_per_floor * abs(b - a)
+            edges.append((a, b, cost))
+            edges.append((b, a, cost))
+        return edges
 
 
 class BuildingMap:
     """建筑物内部3D地图类"""
     
-    def __init__(self, width: int, height: int, depth: int):
+    def __init__(self, width: int, height: int, depth: int, dtype=int):
         """
         初始化3D地图
         
@@ -17,30 +81,333 @@ class BuildingMap:
             width: X轴方向大小（单位：网格）
             height: Y轴方向大小（楼层高度，单位：网格）
             depth: Z轴方向大小（单位：网格）
+            dtype: 网格的存储类型，np.uint8 为紧凑模式（每个网格1字节）
         """
         self.width = width
         self.height = height
         self.depth = depth
         # 0表示可通行，1表示障碍物
-        self.grid = np.zeros((width, height, depth), dtype=int)
+        self.grid = np.zeros((width, height, depth), dtype=dtype)
+        # 楼梯和电梯等垂直连接设施
+        self.connectors: List[VerticalConnector] = []
+        # 地图变化监听器，回调参数为变化区域 (x1, y1, z1, x2, y2, z2)
+        self._listeners: List[Callable[[int, int, int, int, int, int], None]] = []
+        # 地图版本号，每次修改递增
+        self.version = 0
+        # 修改记录：(版本号, (x1, y1, z1, x2, y2, z2), 类型)，
+        # 类型为 'blocked'（只增加障碍物）或 'freed'（有网格变为可通行）
+        self.changes: List[Tuple[int, Tuple[int, int, int, int, int, int], str]] = []
+        self.max_change_records = 10000
+    
+    def add_change_listener(self, callback: Callable[[int, int, int, int, int, int], None]):
+        """
+        注册地图变化监听器
+        
+        通过 set_obstacle/set_walkable 等方法修改地图时，会以变化区域的
+        包围盒 (x1, y1, z1, x2, y2, z2) 调用回调。直接写 self.grid 不会触发通知。
+        
+        Args:
+            callback: 回调函数
+        """
+        self._listeners.append(callback)
+    
+    def remove_change_listener(self, callback: Callable[[int, int, int, int, int, int], None]):
+        """移除地图变化监听器"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _notify_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int, kind: str = 'blocked'):
+        """递增版本号、记录变化区域，并通知所有监听器"""
+        self.version += 1
+        self.changes.append((self.version, (x1, y1, z1, x2, y2, z2), kind))
+        if len(self.changes) > self.max_change_records:
+            del self.changes[:len(self.changes) - self.max_change_records]
+        for callback in self._listeners:
+            callback(x1, y1, z1, x2, y2, z2)
+    
+    def changes_since(self, version: int) -> Optional[List[Tuple[int, Tuple[int, int, int, int, int, int], str]]]:
+        """
+        获取某个版本之后的修改记录
+        
+        Args:
+            version: 起始版本号（不含）
+        
+        Returns:
+            修改记录列表；若所需记录已被丢弃则返回None，调用方应视为整张地图都已变化
+        """
+        if version >= self.version:
+            return []
+        if not self.changes or self.changes[0][0] > version + 1:
+            return None
+        return [change for change in self.changes if change[0] > version]
+    
+    def _set_cell(self, x: int, y: int, z: int, value: int) -> bool:
+        """修改单个网格但不发出通知，返回是否发生了变化"""
+        if self.is_valid_position(x, y, z) and self.grid[x, y, z] != value:
+            self.grid[x, y, z] = value
+            return True
+        return False
         
     def set_obstacle(self, x: int, y: int, z: int):
         """设置障碍物"""
-        if self.is_valid_position(x, y, z):
-            self.grid[x, y, z] = 1
+        if self._set_cell(x, y, z, 1):
+            self._notify_change(x, y, z, x, y, z, 'blocked')
     
     def set_obstacle_region(self, x1: int, y1: int, z1: int, 
                            x2: int, y2: int, z2: int):
-        """设置一个区域的障碍物"""
-        for x in range(x1, min(x2 + 1, self.width)):
-            for y in range(y1, min(y2 + 1, self.height)):
-                for z in range(z1, min(z2 + 1, self.depth)):
-                    self.set_obstacle(x, y, z)
+        """设置一个区域的障碍物（整个区域只记录一次变化）"""
+        self.fill_region(x1, y1, z1, x2, y2, z2, 1)
+    
+    def _clip_box(self, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int
+                  ) -> Optional[Tuple[slice, slice, slice]]:
+        """将闭区间包围盒裁剪到地图范围内，返回切片；完全在地图外时返回None"""
+        x1, y1, z1 = max(x1, 0), max(y1, 0), max(z1, 0)
+        x2 = min(x2, self.width - 1)
+        y2 = min(y2, self.height - 1)
+        z2 = min(z2, self.depth - 1)
+        if x1 > x2 or y1 > y2 or z1 > z2:
+            return None
+        return (slice(x1, x2 + 1), slice(y1, y2 + 1), slice(z1, z2 + 1))
+    
+    def fill_region(self, x1: int, y1: int, z1: int,
+                    x2: int, y2: int, z2: int, value: int = 1):
+        """
+        将一个长方体区域整体设为障碍物或可通行（切片赋值）
+        
+        与逐个调用 set_obstacle/set_walkable 的效果相同：超出地图的部分被忽略，
+        整个区域只记录一次变化。
+        
+        Args:
+            x1, y1, z1: 区域起点（含）
+            x2, y2, z2: 区域终点（含）
+            value: 1 表示障碍物，0 表示可通行
+        """
+        if value not in (0, 1):
+            raise ValueError(f"网格值只能为0或1，而不是 {value}")
+        box = self._clip_box(x1, y1, z1, x2, y2, z2)
+        if box is None:
+            return
+        region = self.grid[box]
+        if not (region != value).any():
+            return
+        region[...] = value
+        self._notify_change(box[0].start, box[1].start, box[2].start,
+                            box[0].stop - 1, box[1].stop - 1, box[2].stop - 1,
+                            'blocked' if value == 1 else 'freed')
+    
+    def apply_mask(self, mask: np.ndarray, value: int = 1,
+                   origin: Tuple[int, int, int] = (0, 0, 0)):
+        """
+        按布尔掩码批量设置网格
+        
+        掩码为 True 的位置设为 value，其余位置不变。掩码可以小于地图，
+        由 origin 指定放置位置，超出地图的部分被忽略。只记录一次变化，
+        区域为实际发生变化的网格的包围盒。
+        
+        Args:
+            mask: 三维布尔数组
+            value: 1 表示障碍物，0 表示可通行
+            origin: 掩码 [0, 0, 0] 对应的地图位置
+        """
+        if value not in (0, 1):
+            raise ValueError(f"网格值只能为0或1，而不是 {value}")
+        mask = np.asarray(mask)
+        if mask.ndim != 3:
+            raise ValueError(f"掩码必须是三维数组，而不是 {mask.ndim} 维")
+        if mask.dtype != bool:
+            raise ValueError(f"掩码必须是布尔数组，而不是 {mask.dtype}")
+        ox, oy, oz = origin
+        box = self._clip_box(ox, oy, oz, ox + mask.shape[0] - 1,
+                             oy + mask.shape[1] - 1, oz + mask.shape[2] - 1)
+        if box is None:
+            return
+        region = self.grid[box]
+        sub_mask = mask[tuple(slice(b.start - o, b.stop - o)
+                              for b, o in zip(box, origin))]
+        changed = sub_mask & (region != value)
+        if not changed.any():
+            return
+        region[changed] = value
+        self._notify_changed_cells(changed, box, 'blocked' if value == 1 else 'freed')
+
+    def apply_batch(self, blocked: Optional[np.ndarray] = None,
+                    freed: Optional[np.ndarray] = None,
+                    origin: Tuple[int, int, int] = (0, 0, 0)) -> int:
+        """
+        一次设置障碍物和可通行网格，只记录一次变化
+
+        与先后调用 apply_mask(blocked, 1) 和 apply_mask(freed, 0) 的结果相同
+        （两者都为 True 的位置设为可通行），但版本号只递增一次，监听器只被通知一次；
+        有网格变为可通行时变化类型为 'freed'。
+
+        Args:
+            blocked: 设为障碍物的三维布尔掩码，可以为None
+            freed: 设为可通行的三维布尔掩码，与 blocked 形状相同，可以为None
+            origin: 掩码 [0, 0, 0] 对应的地图位置
+
+        Returns:
+            实际发生变化的网格数
+        """
+        masks = [np.asarray(m) for m in (blocked, freed) if m is not None]
+        if not masks:
+            return 0
+        for mask in masks:
+            if mask.ndim != 3 or mask.dtype != bool:
+                raise ValueError(f"掩码必须是三维布尔数组，而不是 {mask.ndim} 维 {mask.dtype}")
+        shape = masks[0].shape
+        if any(mask.shape != shape for mask in masks):
+            raise ValueError("blocked 和 freed 的形状必须相同")
+        ox, oy, oz = origin
+        box = self._clip_box(ox, oy, oz, ox + shape[0] - 1, oy + shape[1] - 1, oz + shape[2] - 1)
+        if box is None:
+            return 0
+        window = tuple(slice(b.start - o, b.stop - o) for b, o in zip(box, origin))
+        region = self.grid[box]
+        to_block = np.zeros(region.shape, dtype=bool)
+        to_free = np.zeros(region.shape, dtype=bool)
+        if blocked is not None:
+            to_block = np.asarray(blocked)[window] & (region != 1)
+        if freed is not None:
+            sub = np.asarray(freed)[window]
+            to_block &= ~sub
+            to_free = sub & (region != 0)
+        changed = to_block | to_free
+        count = int(np.count_nonzero(changed))
+        if count == 0:
+            return 0
+        region[to_block] = 1
+        region[to_free] = 0
+        self._notify_changed_cells(changed, box, 'freed' if to_free.any() else 'blocked')
+        return count
+
+    def _notify_changed_cells(self, changed: np.ndarray, box: Tuple[slice, slice, slice],
+                              kind: str):
+        """以发生变化的网格（box 内的布尔数组）的包围盒发出一次通知"""
+        bounds = []
+        for axis, b in enumerate(box):
+            other = tuple(i for i in range(3) if i != axis)
+            hit = np.flatnonzero(changed.any(axis=other))
+            bounds.append((b.start + hit[0], b.start + hit[-1]))
+        (bx1, bx2), (by1, by2), (bz1, bz2) = bounds
+        self._notify_change(int(bx1), int(by1), int(bz1), int(bx2), int(by2), int(bz2), kind)
+
+    @classmethod
+    def from_array(cls, occupancy: np.ndarray, dtype=int, copy: bool = True) -> 'BuildingMap':
+        """
+        由三维占用数组创建地图
+        
+        Args:
+            occupancy: 形状为 (width, height, depth) 的数组，0表示可通行，1表示障碍物
+                （也可以是布尔数组，True表示障碍物）
+            dtype: 网格的存储类型，np.uint8 为紧凑模式
+            copy: False 时直接使用 occupancy 作为网格，不分配新数组也不检查取值
+                （如共享内存中已检查过的网格），dtype 参数忽略
+        
+        Returns:
+            BuildingMap 对象
+        """
+        occupancy = np.asarray(occupancy)
+        if occupancy.ndim != 3:
+            raise ValueError(f"占用数组必须是三维的，而不是 {occupancy.ndim} 维")
+        if not copy:
+            building_map = cls(0, 0, 0, dtype=occupancy.dtype)
+            building_map.width, building_map.height, building_map.depth = occupancy.shape
+            building_map.grid = occupancy
+            return building_map
+        if occupancy.dtype != bool and not ((occupancy == 0) | (occupancy == 1)).all():
+            raise ValueError("占用数组的值只能为0或1")
+        building_map = cls(*occupancy.shape, dtype=dtype)
+        building_map.grid[...] = occupancy
+        return building_map
+    
+    @classmethod
+    def from_floor_masks(cls, masks: List[np.ndarray], dtype=int) -> 'BuildingMap':
+        """
+        由逐层的二维占用数组创建地图
+        
+        Args:
+            masks: 每层一个形状为 (width, depth) 的数组，按楼层从低到高排列，
+                0/False 表示可通行，1/True 表示障碍物
+            dtype: 网格的存储类型，np.uint8 为紧凑模式
+        
+        Returns:
+            BuildingMap 对象
+        """
+        if len(masks) == 0:
+            raise ValueError("至少需要一个楼层")
+        floors = [np.asarray(mask) for mask in masks]
+        for y, floor in enumerate(floors):
+            if floor.ndim != 2:
+                raise ValueError(f"楼层 {y} 的占用数组必须是二维的")
+            if floor.shape != floors[0].shape:
+                raise ValueError(f"楼层 {y} 的大小 {floor.shape} 与楼层 0 的 {floors[0].shape} 不一致")
+        return cls.from_array(np.stack(floors, axis=1), dtype)
+    
+    def save(self, path: str):
+        """
+        保存地图
+        
+        网格以 uint8 写入 .npy 文件（可被 load 内存映射），楼梯和电梯等
+        垂直连接写入同名的 .json 文件。
+        
+        Args:
+            path: .npy 文件路径
+        """
+        path = self._grid_path(path)
+        np.save(path, self.grid.astype(np.uint8, copy=False))
+        connectors = [{'kind': c.kind, 'x': c.x, 'z': c.z, 'floors': c.floors,
+                       'cost_per_floor': c.cost_per_floor,
+                       'boarding_cost': c.boarding_cost}
+                      for c in self.connectors]
+        with open(path[:-4] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'shape': list(self.grid.shape), 'connectors': connectors},
+                      f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'BuildingMap':
+        """
+        加载 save 保存的地图
+        
+        默认以只读方式内存映射网格：多个进程加载同一个文件时共享操作系统的
+        页缓存，只有实际访问到的部分才会读入内存。只读地图不能修改，
+        需要修改时使用 mmap_mode='c'（写时复制，不写回文件）或 None（读入内存）。
+        
+        Args:
+            path: .npy 文件路径
+            mmap_mode: 传给 np.load 的内存映射模式
+        
+        Returns:
+            BuildingMap 对象
+        """
+        path = cls._grid_path(path)
+        grid = np.load(path, mmap_mode=mmap_mode)
+        if grid.ndim != 3:
+            raise ValueError(f"地图文件 {path} 中的网格必须是三维的")
+        building_map = cls(0, 0, 0, dtype=grid.dtype)
+        building_map.width, building_map.height, building_map.depth = grid.shape
+        building_map.grid = grid
+        try:
+            with open(path[:-4] + '.json', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {'connectors': []}
+        for item in metadata['connectors']:
+            building_map.connectors.append(VerticalConnector(
+                item['kind'], item['x'], item['z'], item['floors'],
+                item['cost_per_floor'], item['boarding_cost']))
+        return building_map
+    
+    @staticmethod
+    def _grid_path(path: str) -> str:
+        """补全 .npy 扩展名（与 np.save 的行为一致）"""
+        path = str(path)
+        return path if path.endswith('.npy') else path + '.npy'
     
     def set_walkable(self, x: int, y: int, z: int):
         """设置可通行区域"""
-        if self.is_valid_position(x, y, z):
-            self.grid[x, y, z] = 0
+        if self._set_cell(x, y, z, 0):
+            self._notify_change(x, y, z, x, y, z, 'freed')
     
     def is_walkable(self, x: int, y: int, z: int) -> bool:
         """检查位置是否可通行"""
@@ -55,7 +422,7 @@ class BuildingMap:
                 0 <= z < self.depth)
     
     def add_stairs(self, x: int, z: int, start_floor: int, end_floor: int, 
-                   direction: str = 'up'):
+                   direction: str = 'up', cost_per_floor: float = 2.0):
         """
         添加楼梯
         
@@ -64,39 +431,53 @@ class BuildingMap:
             start_floor: 起始楼层
             end_floor: 结束楼层
             direction: 'up' 或 'down'
+            cost_per_floor: 每上下一层的代价
         """
         if direction == 'up':
-            for y in range(start_floor, min(end_floor + 1, self.height)):
-                self.set_walkable(x, y, z)
-                # 楼梯周围也设为可通行
-                for dx in [-1, 0, 1]:
-                    for dz in [-1, 0, 1]:
-                        if self.is_valid_position(x + dx, y, z + dz):
-                            self.set_walkable(x + dx, y, z + dz)
+            floors = range(start_floor, min(end_floor + 1, self.height))
         else:
-            for y in range(end_floor, min(start_floor + 1, self.height)):
-                self.set_walkable(x, y, z)
-                for dx in [-1, 0, 1]:
-                    for dz in [-1, 0, 1]:
-                        if self.is_valid_position(x + dx, y, z + dz):
-                            self.set_walkable(x + dx, y, z + dz)
+            floors = range(end_floor, min(start_floor + 1, self.height))
+        floors = [y for y in floors if 0 <= y < self.height]
+        self.connectors.append(VerticalConnector(
+            'stairs', x, z, [y for y in floors if self.is_valid_position(x, y, z)],
+            cost_per_floor))
+        
+        # 楼梯及其周围一圈设为可通行
+        if floors:
+            box = self._clip_box(x - 1, floors[0], z - 1, x + 1, floors[-1], z + 1)
+            if box is not None:
+                self.grid[box] = 0
+        # 新增的垂直连接也会改变连通性，即使网格本身没有变化也记录一次
+        self._notify_connector_change(x, z, floors)
+    
+    def _notify_connector_change(self, x: int, z: int, floors: List[int]):
+        """记录新增楼梯或电梯影响的区域（设施及其周围一圈）"""
+        floors = [y for y in floors if 0 <= y < self.height]
+        x1, x2 = max(x - 1, 0), min(x + 1, self.width - 1)
+        z1, z2 = max(z - 1, 0), min(z + 1, self.depth - 1)
+        if floors and x1 <= x2 and z1 <= z2:
+            self._notify_change(x1, min(floors), z1, x2, max(floors), z2, 'freed')
     
-    def add_elevator(self, x: int, z: int, floors: List[int]):
+    def add_elevator(self, x: int, z: int, floors: List[int],
+                     cost_per_floor: float = 2.0, boarding_cost: float = 0.0):
         """
         添加电梯
         
         Args:
             x, z: 电梯的X和Z坐标
             floors: 电梯服务的楼层列表
+            cost_per_floor: 每经过一层的代价
+            boarding_cost: 每次乘坐的固定代价（如等待时间）
         """
-        for y in floors:
-            if self.is_valid_position(x, y, z):
-                self.set_walkable(x, y, z)
-                # 电梯周围设为可通行
-                for dx in [-1, 0, 1]:
-                    for dz in [-1, 0, 1]:
-                        if self.is_valid_position(x + dx, y, z + dz):
-                            self.set_walkable(x + dx, y, z + dz)
+        served = [y for y in floors if self.is_valid_position(x, y, z)]
+        self.connectors.append(VerticalConnector('elevator', x, z, served,
+                                                 cost_per_floor, boarding_cost))
+        
+        # 电梯及其周围一圈设为可通行
+        box = self._clip_box(x - 1, 0, z - 1, x + 1, self.height - 1, z + 1)
+        if served and box is not None:
+            self.grid[box[0], served, box[2]] = 0
+        self._notify_connector_change(x, z, floors)
     
     def get_neighbors(self, x: int, y: int, z: int, 
                      allow_diagonal: bool = True) -> List[Tuple[int, int, int]]:
@@ -111,24 +492,7 @@ class BuildingMap:
             可通行的相邻位置列表
         """
         neighbors = []
-        
-        # 同一楼层内的移动（6方向或26方向）
-        directions = [
-            (1, 0, 0), (-1, 0, 0),  # 前后
-            (0, 0, 1), (0, 0, -1),  # 左右
-            (0, 1, 0), (0, -1, 0),  # 上下楼层
-        ]
-        
-        if allow_diagonal:
-            # 添加对角线方向（仅水平方向）
-            diagonal_directions = [
-                (1, 0, 1), (1, 0, -1), (-1, 0, 1), (-1, 0, -1),
-                (1, 1, 0), (1, -1, 0), (-1, 1, 0), (-1, -1, 0),
-                (0, 1, 1), (0, 1, -1), (0, -1, 1), (0, -1, -1),
-                (1, 1, 1), (1, 1, -1), (1, -1, 1), (1, -1, -1),
-                (-1, 1, 1), (-1, 1, -1), (-1, -1, 1), (-1, -1, -1),
-            ]
-            directions.extend(diagonal_directions)
+        directions = ALL_DIRECTIONS if allow_diagonal else AXIS_DIRECTIONS
         
         for dx, dy, dz in directions:
             nx, ny, nz = x + dx, y + dy, z + dz
@@ -139,30 +503,18 @@ class BuildingMap:
     
     def visualize_2d_slice(self, y: int, show_path: Optional[List[Tuple[int, int, int]]] = None):
         """
-        可视化某个楼层的2D切片
+        可视化某个楼层的2D切片（文本由 floor_renderer.floor_text 一次生成）
         
         Args:
             y: 楼层高度
             show_path: 可选，要显示的路径点列表
         """
+        from floor_renderer import floor_text
+        
         if y < 0 or y >= self.height:
             print(f"楼层 {y} 超出范围")
             return
         
         print(f"\n楼层 {y} 的俯视图 (X轴向右，Z轴向下):")
-        print("  ", end="")
-        for z in range(self.depth):
-            print(f"{z:2}", end="")
-        print()
-        
-        for x in range(self.width):
-            print(f"{x:2}", end=" ")
-            for z in range(self.depth):
-                if show_path and (x, y, z) in show_path:
-                    print(" *", end="")  # 路径点
-                elif self.grid[x, y, z] == 1:
-                    print(" #", end="")  # 障碍物
-                else:
-                    print(" .", end="")  # 可通行
-            print()
+        print(floor_text(self, y, show_path))
 
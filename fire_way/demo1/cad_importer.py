@@ -0,0 +1,326 @@
+"""
+CAD网格导入
+读取 Final_assembly/cad-to-route-converter 输出的JSON（RouteGridGenerator.generateGrid
+的结果，或 FormatConverter.toRoutePlanningFormat 的结果），每层一个文件，
+按楼层叠放为一个 BuildingMap。JSON以流式方式逐项解析，不会把整个文档读入内存
+"""
+import json
+import math
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Sequence, Iterator
+from building_map import BuildingMap
+from navigation_3d import Navigation3D
+
+
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _JsonStream:
+    """按块读取JSON文本，逐个解析数组元素或跳过不需要的值"""
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """读入下一块，已处理的部分被丢弃；没有更多内容时返回False"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，文档结束时返回空字符串"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON格式错误：位置附近应为 '{char}'")
+        self.pos += 1
+
+    def value(self):
+        """解析下一个完整的值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数字可能被块边界截断（如 "2." 被解析为2），读到下一块再确认
+            if (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        """
+        跳过下一个值
+
+        数组和对象不构造Python对象，而是把整块文本转为码点数组，用NumPy标记
+        字符串内外（引号计数，处理转义）并累加括号层数，找到匹配的右括号。
+        """
+        opening = self.peek()
+        if opening not in '[{':
+            self.value()
+            return
+        closing = ']' if opening == '[' else '}'
+        open_code, close_code = ord(opening), ord(closing)
+        depth = 0
+        in_string = False
+        escaped = False  # 上一块以未转义的反斜杠结尾
+        while True:
+            text = self.buffer[self.pos:]
+            if (not escaped and opening not in text and closing not in text
+                    and '\\' not in text):
+                # 整块都不含括号和转义（如扁平对象组成的大数组），只需更新引号奇偶
+                in_string ^= text.count('"') % 2 == 1
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    raise ValueError("JSON格式错误：文档意外结束")
+                continue
+            codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            quotes = codes == 34
+            backslashes = np.flatnonzero(codes == 92)
+            if escaped or backslashes.size:
+                # 反斜杠很少出现，逐个处理：被转义的引号不计数
+                last = -1
+                if escaped and codes.size:
+                    quotes[0] = False
+                    last = 0
+                escaped = False
+                for index in backslashes.tolist():
+                    if index == last:
+                        continue
+                    if index + 1 < codes.size:
+                        quotes[index + 1] = False
+                        last = index + 1
+                    else:
+                        escaped = True
+            quote_count = np.cumsum(quotes, dtype=np.int32)
+            outside = (quote_count + in_string) % 2 == 0
+            delta = ((codes == open_code) & outside).astype(np.int32)
+            delta -= (codes == close_code) & outside
+            levels = depth + np.cumsum(delta, dtype=np.int32)
+            closed = np.flatnonzero(levels == 0)
+            if closed.size:
+                self.pos += int(closed[0]) + 1
+                return
+            if codes.size:
+                depth = int(levels[-1])
+                in_string = bool((int(quote_count[-1]) + in_string) % 2)
+            self.pos = len(self.buffer)
+            if not self._fill():
+                raise ValueError("JSON格式错误：文档意外结束")
+
+    def items(self) -> Iterator:
+        """逐个解析数组中的元素"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("JSON格式错误：数组元素之间应为 ','")
+
+    def keys(self) -> Iterator[str]:
+        """逐个返回对象的键，调用方需要在取下一个键之前读完对应的值"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError("JSON格式错误：对象成员之间应为 ','")
+
+
+def _is_obstacle(cell) -> bool:
+    if isinstance(cell, dict):
+        return cell.get('type') == 'obstacle'
+    return bool(cell)
+
+
+def read_floor(path: str, chunk_size: int = 1 << 20) -> Dict:
+    """
+    流式读取一层的转换结果
+
+    有 grid 字段时按网格读取（'obstacle' 为障碍物，'walkable'、'door'、'exit' 可通行）；
+    没有 grid 字段时（toRoutePlanningFormat 的输出），由 nodes 的 gridX/gridY 得到
+    可通行网格，其余为障碍物。edges 等不需要的字段直接跳过。
+
+    Args:
+        path: JSON文件路径
+        chunk_size: 每次读取的字符数
+
+    Returns:
+        {'mask': 形状为 (gridWidth, gridHeight) 的uint8数组（1为障碍物）,
+         'exits': 出口列表, 'bounds': 边界信息或None}
+    """
+    rows = []
+    node_x, node_y = [], []
+    exits = []
+    bounds = None
+
+    with open(path, encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        for key in stream.keys():
+            if key == 'grid':
+                for row in stream.items():
+                    rows.append(np.fromiter((_is_obstacle(cell) for cell in row),
+                                            dtype=np.uint8, count=len(row)))
+            elif key == 'nodes' and not rows:
+                for node in stream.items():
+                    if node.get('type') != 'obstacle':
+                        node_x.append(node['gridX'])
+                        node_y.append(node['gridY'])
+            elif key == 'exits':
+                exits = list(stream.items())
+            elif key == 'bounds':
+                bounds = stream.value()
+            elif key == 'metadata':
+                for meta_key in stream.keys():
+                    if meta_key == 'bounds' and bounds is None:
+                        bounds = stream.value()
+                    else:
+                        stream.skip()
+            else:
+                stream.skip()
+
+    if rows:
+        if any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError(f"{path}：grid 各行的长度不一致")
+        # 转换器的 grid[y][x] 对应地图的 (x, z)
+        mask = np.stack(rows, axis=1)
+    elif node_x:
+        xs = np.array(node_x, dtype=np.int64)
+        ys = np.array(node_y, dtype=np.int64)
+        width = max(int(xs.max()) + 1, int(bounds.get('gridWidth', 0)) if bounds else 0)
+        depth = max(int(ys.max()) + 1, int(bounds.get('gridHeight', 0)) if bounds else 0)
+        mask = np.ones((width, depth), dtype=np.uint8)
+        mask[xs, ys] = 0
+    else:
+        raise ValueError(f"{path}：没有 grid 或 nodes 数据")
+    return {'mask': mask, 'exits': exits, 'bounds': bounds}
+
+
+def _grid_position(item: Dict, bounds: Optional[Dict],
+                   grid_size: float) -> Tuple[int, int]:
+    """出口或连接设施在该层网格中的坐标：优先使用 gridX/gridY，否则由世界坐标换算"""
+    if 'gridX' in item and 'gridY' in item:
+        return int(item['gridX']), int(item['gridY'])
+    min_x = bounds['minX'] if bounds else 0.0
+    min_y = bounds['minY'] if bounds else 0.0
+    return (math.floor((item['x'] - min_x) / grid_size),
+            math.floor((item['y'] - min_y) / grid_size))
+
+
+def import_building(floor_paths: Sequence[str],
+                    connectors: Optional[List[Dict]] = None,
+                    dtype=np.uint8,
+                    chunk_size: int = 1 << 20) -> Navigation3D:
+    """
+    将逐层的转换结果导入为一个三维导航系统
+
+    各层按 bounds 的 minX/minY 对齐到同一个坐标系（要求 gridSize 相同），
+    某层范围之外的网格为障碍物。每层的出口注册为安全出口地标，名称为
+    "F<楼层号>/<出口id>"（楼层号从1开始）。
+
+    Args:
+        floor_paths: 每层一个JSON文件，按楼层从低到高排列
+        connectors: 楼梯和电梯列表，每项为
+            {'kind': 'stairs'|'elevator', 'x': .., 'y': ..（世界坐标）
+             或 'gridX': .., 'gridY': ..（合并后网格坐标）,
+             'floors': [楼层下标, ...], 'cost_per_floor': 可选, 'boarding_cost': 可选}
+        dtype: 网格的存储类型，默认为紧凑的 np.uint8
+        chunk_size: 每次读取的字符数
+
+    Returns:
+        Navigation3D 对象
+    """
+    if not floor_paths:
+        raise ValueError("至少需要一个楼层文件")
+
+    # 每层只保留紧凑的占用数组，原始文档读完即释放
+    floors = [read_floor(path, chunk_size) for path in floor_paths]
+
+    all_bounds = [floor['bounds'] for floor in floors if floor['bounds']]
+    grid_sizes = {float(b.get('gridSize', 1.0)) for b in all_bounds}
+    if len(grid_sizes) > 1:
+        raise ValueError(f"各层的 gridSize 不一致：{sorted(grid_sizes)}")
+    grid_size = grid_sizes.pop() if grid_sizes else 1.0
+    min_x = min((b['minX'] for b in all_bounds), default=0.0)
+    min_y = min((b['minY'] for b in all_bounds), default=0.0)
+
+    offsets = []
+    for floor in floors:
+        bounds = floor['bounds']
+        if bounds:
+            offsets.append((round((bounds['minX'] - min_x) / grid_size),
+                            round((bounds['minY'] - min_y) / grid_size)))
+        else:
+            offsets.append((0, 0))
+    width = max(ox + floor['mask'].shape[0] for (ox, _), floor in zip(offsets, floors))
+    depth = max(oz + floor['mask'].shape[1] for (_, oz), floor in zip(offsets, floors))
+
+    navigation = Navigation3D.from_building_map(
+        _stack_floors(floors, offsets, width, depth, dtype))
+
+    for y, (floor, (ox, oz)) in enumerate(zip(floors, offsets)):
+        for index, exit_info in enumerate(floor['exits']):
+            gx, gz = _grid_position(exit_info, floor['bounds'], grid_size)
+            name = f"F{y + 1}/{exit_info.get('id', f'exit_{index + 1}')}"
+            navigation.add_landmark(name, (ox + gx, y, oz + gz), is_exit=True)
+
+    origin = {'minX': min_x, 'minY': min_y}
+    for connector in connectors or []:
+        x, z = _grid_position(connector, origin, grid_size)
+        floor_list = sorted(connector['floors'])
+        cost_per_floor = connector.get('cost_per_floor', 2.0)
+        kind = connector.get('kind')
+        if kind == 'stairs':
+            navigation.building_map.add_stairs(x, z, floor_list[0], floor_list[-1],
+                                               'up', cost_per_floor)
+        elif kind == 'elevator':
+            navigation.building_map.add_elevator(x, z, floor_list, cost_per_floor,
+                                                 connector.get('boarding_cost', 0.0))
+        else:
+            raise ValueError(f"未知的连接设施类型 '{kind}'")
+    return navigation
+
+
+def _stack_floors(floors: List[Dict], offsets: List[Tuple[int, int]],
+                  width: int, depth: int, dtype) -> BuildingMap:
+    """把各层占用数组按偏移写入三维网格，写入后释放该层数组"""
+    building_map = BuildingMap(width, len(floors), depth, dtype=dtype)
+    building_map.grid[...] = 1
+    for y, ((ox, oz), floor) in enumerate(zip(offsets, floors)):
+        mask = floor.pop('mask')
+        building_map.grid[ox:ox + mask.shape[0], y, oz:oz + mask.shape[1]] = mask
+    return building_map
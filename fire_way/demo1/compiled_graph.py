@@ -0,0 +1,250 @@
+"""
+编译后的邻接图（CSR压缩稀疏行格式）
+将 BuildingMap.grid 中可通行的网格一次性编译为邻接表和边代价数组，
+寻路时直接读取，不再逐个方向检查边界和查询网格
+"""
+import heapq
+import numpy as np
+from typing import Callable, Tuple, Optional, Iterable
+from building_map import BuildingMap, ALL_DIRECTIONS, AXIS_DIRECTIONS
+
+
+class CompiledGraph:
+    """
+    建筑物地图的CSR邻接图
+
+    节点编号为网格的扁平索引 (x * height + y) * depth + z。
+    第 i 个网格的邻居为 indices[indptr[i]:indptr[i + 1]]，对应的移动代价为
+    costs 的同一区间，direction 记录该边在 self.directions 中的方向编号
+    （26方向和6方向时即 ALL_DIRECTIONS 中的编号）。
+    每一行内的邻居顺序与 BuildingMap.get_neighbors 相同。
+    """
+
+    def __init__(self, building_map: BuildingMap, allow_diagonal: bool = True,
+                 cost_function: Optional[Callable[[Tuple[int, int, int], Tuple[int, int, int]], float]] = None,
+                 same_floor: bool = False):
+        """
+        编译邻接图并注册地图变化监听
+
+        Args:
+            building_map: 建筑物地图对象
+            allow_diagonal: True 为26方向连通，False 为6方向连通
+            cost_function: 移动代价函数，通常为 PathFinder3D.get_cost
+            same_floor: True 时只编译同层移动（8方向或4方向），即楼层图模型的层内图
+        """
+        if cost_function is None:
+            from pathfinder_3d import PathFinder3D
+            cost_function = PathFinder3D(building_map).get_cost
+
+        self.map = building_map
+        self.allow_diagonal = allow_diagonal
+        self.directions = ALL_DIRECTIONS if allow_diagonal else AXIS_DIRECTIONS
+        if same_floor:
+            self.directions = tuple(d for d in self.directions if d[1] == 0)
+        # 代价只与移动方向有关，每个方向计算一次
+        self.direction_costs = np.array(
+            [cost_function((0, 0, 0), d) for d in self.directions], dtype=np.float64)
+
+        self.indptr = None
+        self.indices = None
+        self.costs = None
+        self.direction = None
+        self.dirty = True
+        self.build()
+        building_map.add_change_listener(self._on_map_change)
+
+    def build(self):
+        """使用NumPy平移切片向量化地重新编译整张图"""
+        width, height, depth = self.map.width, self.map.height, self.map.depth
+        size = width * height * depth
+        walkable = self.map.grid == 0
+        flat_index = np.arange(size, dtype=np.int64).reshape(width, height, depth)
+
+        sources = []
+        direction_codes = []
+        for code, (dx, dy, dz) in enumerate(self.directions):
+            src = tuple(slice(max(0, -d), n - max(0, d))
+                        for d, n in zip((dx, dy, dz), (width, height, depth)))
+            dst = tuple(slice(max(0, d), n - max(0, -d))
+                        for d, n in zip((dx, dy, dz), (width, height, depth)))
+            mask = walkable[src] & walkable[dst]
+            rows = flat_index[src][mask]
+            sources.append(rows)
+            direction_codes.append(np.full(rows.size, code, dtype=np.int8))
+
+        sources = np.concatenate(sources)
+        direction_codes = np.concatenate(direction_codes)
+        # 稳定排序保证同一行内按方向顺序排列
+        order = np.argsort(sources, kind='stable')
+        sources = sources[order]
+        direction_codes = direction_codes[order]
+
+        offsets = np.array([dx * height * depth + dy * depth + dz
+                            for dx, dy, dz in self.directions], dtype=np.int64)
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=self.indptr[1:])
+        self.indices = (sources + offsets[direction_codes]).astype(np.int32)
+        self.costs = self.direction_costs[direction_codes]
+        self.direction = direction_codes
+        self.dirty = False
+
+    def ensure_current(self):
+        """若地图变化后尚未重建，则重新编译"""
+        if self.dirty:
+            self.build()
+
+    def neighbors(self, index: int):
+        """
+        获取某个网格的邻居
+
+        Args:
+            index: 网格扁平索引
+
+        Returns:
+            (邻居索引列表, 移动代价列表)，已删除的边代价为 inf
+        """
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end].tolist(), self.costs[start:end].tolist()
+
+    def _on_map_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int):
+        """
+        地图变化回调
+
+        单个网格变为障碍物时原地删除相关的边（代价置为 inf），
+        其余变化（新增可通行区域、区域修改）标记为待重建，下次使用前重新编译。
+        """
+        if self.dirty:
+            return
+        single_cell = (x1, y1, z1) == (x2, y2, z2)
+        if not single_cell or self.map.grid[x1, y1, z1] == 0:
+            self.dirty = True
+            return
+
+        index = (x1 * self.map.height + y1) * self.map.depth + z1
+        start, end = self.indptr[index], self.indptr[index + 1]
+        for neighbor in self.indices[start:end].tolist():
+            # 图是对称的，删除反向边
+            n_start, n_end = self.indptr[neighbor], self.indptr[neighbor + 1]
+            row = self.indices[n_start:n_end]
+            self.costs[n_start:n_end][row == index] = np.inf
+        self.costs[start:end] = np.inf
+
+
+def dijkstra(graph: CompiledGraph, sources: Iterable[int],
+             targets: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    在编译图上运行（多源）Dijkstra
+
+    图是对称的，因此从多个源点出发得到的距离也就是各网格到最近源点的距离。
+
+    Args:
+        graph: 编译后的邻接图
+        sources: 源点扁平索引列表，距离为0
+        targets: 可选，所有目标确定最短距离后提前结束
+
+    Returns:
+        (dist, parent)：各网格的最短距离（未到达为 inf）和
+        最短路径树中的父节点索引（源点和未到达为 -1）
+    """
+    graph.ensure_current()
+    size = graph.indptr.size - 1
+    indptr = graph.indptr.tolist()
+    indices, costs = graph.indices, graph.costs
+    inf = float('inf')
+    dist = [inf] * size
+    parent = [-1] * size
+    done = bytearray(size)
+
+    heap = []
+    for source in sources:
+        dist[source] = 0.0
+        heap.append((0.0, source))
+    heapq.heapify(heap)
+
+    remaining = set(targets) if targets is not None else None
+    while heap:
+        d, current = heapq.heappop(heap)
+        if done[current]:
+            continue
+        done[current] = 1
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+
+        start, end = indptr[current], indptr[current + 1]
+        for neighbor, cost in zip(indices[start:end].tolist(), costs[start:end].tolist()):
+            nd = d + cost
+            if nd < dist[neighbor]:
+                dist[neighbor] = nd
+                parent[neighbor] = current
+                heapq.heappush(heap, (nd, neighbor))
+
+    return np.array(dist, dtype=np.float64), np.array(parent, dtype=np.int64)
+
+
+
+def dijkstra_buckets(graph: CompiledGraph, sources: Iterable[int],
+                     targets: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    向量化的（多源）Dijkstra，接口和距离与 dijkstra 相同
+
+    所有边的代价都不小于最小边代价 w，因此开放列表中距离小于 当前最小距离 + w 的
+    网格已是最终距离（之后任何更新至少为 当前最小距离 + w）。每轮一次确定这一批网格，
+    并用NumPy松弛它们的全部出边，轮数约为 最大距离 / w，而不是网格数。
+    距离相等的最短路径中选取的父节点可能与 dijkstra 不同。
+
+    Args:
+        graph: 编译后的邻接图
+        sources: 源点扁平索引列表，距离为0
+        targets: 可选，所有目标确定最短距离后提前结束
+
+    Returns:
+        (dist, parent)：各网格的最短距离（未确定为 inf）和
+        最短路径树中的父节点索引（源点和未到达为 -1，int32）
+    """
+    graph.ensure_current()
+    size = graph.indptr.size - 1
+    indptr, indices, costs = graph.indptr, graph.indices, graph.costs
+    finite = costs[np.isfinite(costs)]
+    step = float(finite.min()) if finite.size else 1.0
+
+    dist = np.full(size, np.inf)
+    parent = np.full(size, -1, dtype=np.int32)
+    settled = np.zeros(size, dtype=bool)
+    in_open = np.zeros(size, dtype=bool)
+    sources = np.asarray(list(sources), dtype=np.int64)
+    dist[sources] = 0.0
+    in_open[sources] = True
+    targets = None if targets is None else np.asarray(list(targets), dtype=np.int64)
+
+    while True:
+        # 开放列表用布尔数组表示，每轮扫描一次，不需要去重
+        open_nodes = np.flatnonzero(in_open)
+        if open_nodes.size == 0:
+            break
+        d = dist[open_nodes]
+        settle = open_nodes[d < d.min() + step]
+        settled[settle] = True
+        in_open[settle] = False
+        if targets is not None and settled[targets].all():
+            break
+
+        # 展开本批网格的全部出边
+        starts = indptr[settle]
+        degrees = indptr[settle + 1] - starts
+        edges = np.arange(int(degrees.sum())) + np.repeat(starts - (np.cumsum(degrees) - degrees),
+                                                          degrees)
+        neighbors = indices[edges]
+        candidate = np.repeat(dist[settle], degrees) + costs[edges]
+        # 已确定的网格距离不大于本批的距离 + w，比较即可排除，不需要单独检查
+        better = candidate < dist[neighbors]
+        neighbors, candidate = neighbors[better], candidate[better]
+        np.minimum.at(dist, neighbors, candidate)
+        won = dist[neighbors] == candidate
+        parent[neighbors[won]] = np.repeat(settle, degrees)[better][won]
+        in_open[neighbors] = True
+
+    dist[~settled] = np.inf
+    return dist, parent
@@ -0,0 +1,329 @@
+"""
+考虑通行能力的人群疏散分配
+楼层图模型中楼梯、电梯和出口是瓶颈：每个楼梯梯段、每部电梯和每个出口都有
+通行能力（人/秒），分配给它的人越多，排队时间越长。先为每个楼梯、电梯和出口
+计算一次同层距离场，再在由它们组成的小型抽象图上按拥堵代价迭代调整
+每个人的路线（逐次平均法），直到没有人能通过换路明显缩短疏散时间
+"""
+import heapq
+import numpy as np
+from typing import List, Tuple, Optional, Dict
+from building_map import BuildingMap
+from compiled_graph import CompiledGraph, dijkstra_buckets
+from floor_graph import shaft_cells
+from pathfinder_3d import PathFinder3D
+
+
+Cell = Tuple[int, int, int]
+
+# 默认通行能力（人/秒）：每个楼梯梯段、每部电梯、每个出口
+DEFAULT_CAPACITY = {'stairs': 1.0, 'elevator': 0.3, 'exit': 1.5}
+
+
+class EvacuationPlanner:
+    """
+    楼层图模型上的疏散分配器
+
+    人员先在本层走到某个楼梯/电梯或出口，经楼梯逐层（电梯可直达）下行或上行，
+    再在到达楼层继续走向下一个设施或出口。资源的排队时间按
+    分配到该资源的人数 / 通行能力 估计（所有人同时开始疏散时最后一人的等待时间），
+    经过多个资源时排队时间相加，是偏保守的估计。
+    """
+
+    def __init__(self, building_map: BuildingMap, allow_diagonal: bool = True,
+                 capacities: Optional[Dict[str, float]] = None,
+                 walking_speed: float = 1.0):
+        """
+        初始化疏散分配器（距离场在第一次分配时计算，地图变化后重新计算）
+
+        Args:
+            building_map: 建筑物地图对象
+            allow_diagonal: 是否允许同层对角线移动
+            capacities: 通行能力，键为 'stairs'、'elevator'、'exit'（同类默认值）
+                或资源名称（见 assign 返回的 'loads'，如 '出口A'、'stairs@(3,3):0-1'）
+            walking_speed: 行走速度（网格/秒）
+        """
+        self.map = building_map
+        self.allow_diagonal = allow_diagonal
+        self.capacities = dict(DEFAULT_CAPACITY)
+        self.capacities.update(capacities or {})
+        self.walking_speed = walking_speed
+        self.graph = CompiledGraph(building_map, allow_diagonal,
+                                   PathFinder3D(building_map).get_cost, same_floor=True)
+        self._fields = None
+
+    def _encode(self, pos: Cell) -> int:
+        return (pos[0] * self.map.height + pos[1]) * self.map.depth + pos[2]
+
+    def _decode(self, index: int) -> Cell:
+        x, rest = divmod(index, self.map.height * self.map.depth)
+        return (x, rest // self.map.depth, rest % self.map.depth)
+
+    def _compute_fields(self, exits: Dict[str, Cell]):
+        """
+        为每个楼梯/电梯（所有服务楼层同时作为源点）和每个出口运行一次同层Dijkstra
+
+        Returns:
+            (channels, distance, parent)：channels 为 [('connector', 设施) 或 ('exit', 名称)]，
+            distance[k] 为各网格在本层到第 k 个通道的距离（float32），parent[k] 为下一跳
+        """
+        key = (self.map.version, len(self.map.connectors), tuple(sorted(exits.items())))
+        if self._fields is not None and self._fields[0] == key:
+            return self._fields[1]
+        channels, sources = [], []
+        for connector in self.map.connectors:
+            cells = [self._encode((connector.x, y, connector.z)) for y in connector.floors
+                     if self.map.is_walkable(connector.x, y, connector.z)]
+            if len(cells) > 1:
+                channels.append(('connector', connector))
+                sources.append(cells)
+        for name, pos in exits.items():
+            if self.map.is_walkable(*pos):
+                channels.append(('exit', name))
+                sources.append([self._encode(pos)])
+
+        distance = np.empty((len(channels), self.map.grid.size), dtype=np.float32)
+        parent = np.empty((len(channels), self.map.grid.size), dtype=np.int32)
+        for k, cells in enumerate(sources):
+            dist, tree = dijkstra_buckets(self.graph, cells)
+            distance[k] = dist
+            parent[k] = tree
+        fields = (channels, distance, parent)
+        self._fields = (key, fields)
+        return fields
+
+    def _capacity(self, name: str, kind: str) -> float:
+        return self.capacities.get(name, self.capacities[kind])
+
+    def _build_network(self, channels, distance):
+        """
+        构建抽象图：节点为（设施, 楼层）和出口，边为同层步行、楼梯梯段和电梯运行
+
+        Returns:
+            (node_of, nodes, edges, resources)：node_of[k, y] 为第 k 个通道在 y 层的节点
+            （出口为其节点，不在该层为 -1）；edges 为 [(u, v, 步行代价, 资源编号或 -1)]；
+            resources 为 [(名称, 通行能力)]，出口节点的资源编号与节点编号对应关系记录在
+            nodes[v] = (网格索引, 出口资源编号或 -1)
+        """
+        height = self.map.height
+        node_of = np.full((len(channels), height), -1, dtype=np.int64)
+        nodes, resources, edges = [], [], []
+        resource_ids: Dict[str, int] = {}
+        for k, (kind, item) in enumerate(channels):
+            if kind == 'exit':
+                cell = int(np.flatnonzero(distance[k] == 0)[0])
+                node_of[k, self._decode(cell)[1]] = len(nodes)
+                nodes.append((cell, len(resources)))
+                resources.append((item, self._capacity(item, 'exit')))
+            else:
+                for y in item.floors:
+                    if self.map.is_walkable(item.x, y, item.z):
+                        node_of[k, y] = len(nodes)
+                        nodes.append((self._encode((item.x, y, item.z)), -1))
+
+        for k, (kind, item) in enumerate(channels):
+            if kind != 'connector':
+                continue
+            label = f"{item.kind}@({item.x},{item.z})"
+            elevator = None
+            if item.kind == 'elevator':
+                elevator = len(resources)
+                resources.append((label, self._capacity(label, 'elevator')))
+            for y1, y2, cost in item.edges():
+                u, v = node_of[k, y1], node_of[k, y2]
+                if u < 0 or v < 0:
+                    continue
+                if elevator is None:
+                    name = f"{label}:{min(y1, y2)}-{max(y1, y2)}"
+                    resource = resource_ids.get(name)
+                    if resource is None:
+                        resource = resource_ids[name] = len(resources)
+                        resources.append((name, self._capacity(name, 'stairs')))
+                else:
+                    resource = elevator
+                edges.append((int(u), int(v), cost, resource))
+
+        # 同层步行：从设施节点到同层其他设施和出口
+        for u, (cell, _) in enumerate(nodes):
+            y = self._decode(cell)[1]
+            for k in range(len(channels)):
+                v = node_of[k, y]
+                if v < 0 or v == u:
+                    continue
+                d = float(distance[k, cell])
+                if d < np.inf:
+                    edges.append((u, int(v), d, -1))
+        return node_of, nodes, edges, resources
+
+    def assign(self, starts: List[Cell], exits: Dict[str, Cell],
+               iterations: int = 30, seed: int = 0) -> Dict:
+        """
+        为所有人分配疏散路线
+
+        每轮按当前各资源的排队时间找出每个人的最快路线，在能缩短疏散时间的人中
+        随机选取 1/(轮数+1) 改走新路线，直到没有人需要换路或达到迭代次数。
+
+        Args:
+            starts: 每个人的起始位置
+            exits: 出口名称到位置的映射
+            iterations: 最多迭代轮数
+            seed: 随机选取换路人员的种子
+
+        Returns:
+            字典：'agents' 为与 starts 顺序一致的结果列表，每项包含 'status'（'ok'、
+            'no_path' 或 'invalid'）、'path'、'exit'、'time'（步行时间加排队时间，秒）；
+            'evacuation_time' 为所有人中最长的疏散时间；'loads' 为各资源分配的人数；
+            'iterations' 为实际迭代轮数
+        """
+        channels, distance, parent = self._compute_fields(exits)
+        node_of, nodes, edges, resources = self._build_network(channels, distance)
+        capacity = np.array([c for _, c in resources], dtype=np.float64)
+        speed = self.walking_speed
+
+        valid = np.array([self.map.is_valid_position(*s) and self.map.is_walkable(*s)
+                          for s in starts], dtype=bool)
+        cells = np.array([self._encode(s) if ok else 0 for s, ok in zip(starts, valid)],
+                         dtype=np.int64)
+        floors = (cells // self.map.depth) % self.map.height
+        # walk[i, k]：第 i 个人在本层走到第 k 个通道的距离
+        walk = distance[:, cells].T.astype(np.float64) if channels else np.zeros((len(starts), 0))
+        entry = node_of[:, floors].T if channels else np.zeros((len(starts), 0), dtype=np.int64)
+        reachable = valid & (np.isfinite(walk) & (entry >= 0)).any(axis=1)
+
+        incoming = [[] for _ in nodes]
+        for u, v, cost, resource in edges:
+            incoming[v].append((u, cost, resource))
+        exit_nodes = [v for v, (_, resource) in enumerate(nodes) if resource >= 0]
+
+        routes: List[Tuple[Tuple[int, ...], List[int], float]] = []
+        route_ids: Dict[Tuple[int, ...], int] = {}
+        choice = np.full(len(starts), -1, dtype=np.int64)
+        first = np.full(len(starts), -1, dtype=np.int64)
+        rng = np.random.default_rng(seed)
+
+        def route_of(node: int, next_node: List[int], via: List[Tuple[float, int]]) -> int:
+            """从节点沿下一跳走到出口的路线编号"""
+            sequence, used, travel = [node], [], 0.0
+            while next_node[node] >= 0:
+                cost, resource = via[node]
+                travel += cost
+                if resource >= 0:
+                    used.append(resource)
+                node = next_node[node]
+                sequence.append(node)
+            used.append(nodes[node][1])
+            key = tuple(sequence)
+            if key not in route_ids:
+                route_ids[key] = len(routes)
+                routes.append((key, used, travel))
+            return route_ids[key]
+
+        done = 0
+        for done in range(1, iterations + 1):
+            loads = np.zeros(len(resources))
+            if (choice >= 0).any():
+                counts = np.bincount(choice[choice >= 0], minlength=len(routes))
+                for r, count in enumerate(counts):
+                    if count:
+                        loads[routes[r][1]] += count
+            delay = loads / capacity
+
+            # 抽象图上从出口反向Dijkstra：出口代价为其排队时间
+            dist = [np.inf] * len(nodes)
+            next_node = [-1] * len(nodes)
+            via = [(0.0, -1)] * len(nodes)
+            heap = []
+            for v in exit_nodes:
+                dist[v] = delay[nodes[v][1]]
+                heap.append((dist[v], v))
+            heapq.heapify(heap)
+            while heap:
+                d, v = heapq.heappop(heap)
+                if d > dist[v]:
+                    continue
+                for u, cost, resource in incoming[v]:
+                    nd = d + cost / speed + (delay[resource] if resource >= 0 else 0.0)
+                    if nd < dist[u]:
+                        dist[u] = nd
+                        next_node[u] = v
+                        via[u] = (cost, resource)
+                        heapq.heappush(heap, (nd, u))
+
+            # 末尾的 inf 对应 entry 为 -1（通道不在该层）
+            node_dist = np.array(dist + [np.inf])
+            total = walk / speed + node_dist[entry]
+            best_channel = total.argmin(axis=1)
+            best = total[np.arange(len(starts)), best_channel]
+            current = np.full(len(starts), np.inf)
+            assigned = np.flatnonzero(choice >= 0)
+            if assigned.size:
+                route_cost = np.array([travel / speed + delay[used].sum()
+                                       for _, used, travel in routes])
+                current[assigned] = (walk[assigned, first[assigned]] / speed +
+                                     route_cost[choice[assigned]])
+
+            candidates = np.flatnonzero(reachable & (best < current - 1e-9))
+            if candidates.size == 0:
+                break
+            if done > 1:
+                # 逐次平均：每轮只让一部分人换路，避免所有人同时涌向同一条路线
+                size = max(1, int(np.ceil(candidates.size / (done + 1))))
+                candidates = rng.choice(candidates, size=size, replace=False)
+            for i in candidates:
+                k = int(best_channel[i])
+                choice[i] = route_of(int(entry[i, k]), next_node, via)
+                first[i] = k
+
+        loads = np.zeros(len(resources))
+        for r, count in enumerate(np.bincount(choice[choice >= 0], minlength=len(routes))):
+            if count:
+                loads[routes[r][1]] += count
+        delay = loads / capacity
+
+        agents = []
+        for i, start in enumerate(starts):
+            if not valid[i]:
+                agents.append({'status': 'invalid', 'path': None, 'exit': None, 'time': None})
+                continue
+            if choice[i] < 0:
+                agents.append({'status': 'no_path', 'path': None, 'exit': None, 'time': None})
+                continue
+            key, used, travel = routes[choice[i]]
+            agents.append({
+                'status': 'ok',
+                'path': self._expand(int(cells[i]), int(first[i]), key, nodes, node_of, parent),
+                'exit': resources[nodes[key[-1]][1]][0],
+                'time': float((walk[i, first[i]] + travel) / speed + delay[used].sum()),
+            })
+
+        times = [agent['time'] for agent in agents if agent['time'] is not None]
+        return {
+            'agents': agents,
+            'evacuation_time': max(times) if times else 0.0,
+            'loads': {name: int(load) for (name, _), load in zip(resources, loads) if load},
+            'iterations': done,
+        }
+
+    def _expand(self, cell: int, channel: int, route: Tuple[int, ...],
+                nodes, node_of, parent) -> List[Cell]:
+        """把抽象路线展开为逐格路径（同层沿距离场的下一跳，跨层用 shaft_cells 补全）"""
+        path = [self._decode(cell)]
+        path.extend(self._walk(cell, channel, parent))
+        for u, v in zip(route, route[1:]):
+            target = nodes[v][0]
+            if self._decode(target)[1] == path[-1][1]:
+                # 同层步行：沿目标通道的距离场走
+                k = int(np.flatnonzero((node_of == v).any(axis=1))[0])
+                path.extend(self._walk(nodes[u][0], k, parent))
+            else:
+                path.extend(shaft_cells(self.map, path[-1], self._decode(target)))
+        return path
+
+    def _walk(self, cell: int, channel: int, parent: np.ndarray) -> List[Cell]:
+        cells = []
+        row = parent[channel]
+        cell = int(row[cell])
+        while cell != -1:
+            cells.append(self._decode(cell))
+            cell = int(row[cell])
+        return cells
@@ -45,7 +45,7 @@ def create_sample_building():
     nav.building_map.add_elevator(13, 16, [0, 1, 2, 3, 4])
     
     # 添加地标
-    nav.add_landmark("入口", (1, 0, 1))
+    nav.add_landmark("入口", (1, 0, 1), is_exit=True)
     nav.add_landmark("电梯A", (10, 0, 3))
     nav.add_landmark("电梯B", (13, 0, 16))
     nav.add_landmark("楼梯1", (3, 0, 3))
@@ -160,6 +160,25 @@ def example5_path_comparison():
         print(f"步数: {info['steps']}")
 
 
+def example6_nearest_exit():
+    """示例6：疏散到最近的安全出口（出口距离场）"""
+    print("\n" + "=" * 60)
+    print("示例6：疏散到最近的安全出口")
+    print("=" * 60)
+    
+    nav = create_sample_building()
+    nav.add_landmark("后门", (18, 0, 18), is_exit=True)
+    
+    # 距离场只计算一次，之后每个人的路线都是沿方向场行走
+    for start in [(9, 2, 9), (11, 3, 11), (15, 1, 5)]:
+        path = nav.navigate_to_nearest_exit(start)
+        if path:
+            info = nav.get_path_info(path)
+            print(f"{start} -> {path[-1]}，路径长度: {info['length']:.2f}")
+        else:
+            print(f"{start} 无法到达出口")
+
+
 if __name__ == "__main__":
     # 运行所有示例
     example1_basic_navigation()
@@ -167,6 +186,7 @@ if __name__ == "__main__":
     example3_multi_landmark_navigation()
     example4_cross_floor_navigation()
     example5_path_comparison()
+    example6_nearest_exit()
     
     print("\n" + "=" * 60)
     print("所有示例运行完成！")
@@ -0,0 +1,117 @@
+"""
+多源出口距离场
+从所有出口地标出发运行一次反向多源Dijkstra（向量化的 dijkstra_buckets），记录每个网格到最近出口的距离
+和下一步移动方向，之后任意位置的疏散路线只需沿方向场逐步行走
+"""
+import numpy as np
+from typing import List, Tuple, Optional
+from building_map import ALL_DIRECTIONS
+from compiled_graph import CompiledGraph, dijkstra_buckets
+
+
+# 由坐标差 (dx+1, dy+1, dz+1) 查方向编号
+_DIRECTION_CODES = np.full((3, 3, 3), -1, dtype=np.int8)
+for _code, (_dx, _dy, _dz) in enumerate(ALL_DIRECTIONS):
+    _DIRECTION_CODES[_dx + 1, _dy + 1, _dz + 1] = _code
+
+
+class ExitDistanceField:
+    """到最近出口的距离场和下一跳方向场"""
+
+    def __init__(self, graph: CompiledGraph, exits: List[Tuple[int, int, int]]):
+        """
+        初始化距离场（首次查询时计算）
+
+        Args:
+            graph: 编译后的邻接图，决定连通方式和移动代价
+            exits: 出口位置列表
+        """
+        self.graph = graph
+        self.map = graph.map
+        self.exits = list(exits)
+        self.distance: Optional[np.ndarray] = None   # 到最近出口的距离，不可达为 inf
+        self.next_hop: Optional[np.ndarray] = None   # ALL_DIRECTIONS 中的方向编号，-1 表示出口或不可达
+        self.stale = True
+        self.map.add_change_listener(self._on_map_change)
+
+    def set_exits(self, exits: List[Tuple[int, int, int]]):
+        """更新出口列表，下次查询时重新计算"""
+        self.exits = list(exits)
+        self.stale = True
+
+    def _on_map_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int):
+        """地图变化后标记距离场过期，下次查询时重新计算"""
+        self.stale = True
+
+    def _encode(self, pos: Tuple[int, int, int]) -> int:
+        return (pos[0] * self.map.height + pos[1]) * self.map.depth + pos[2]
+
+    def compute(self):
+        """运行多源Dijkstra，重新计算距离场和方向场"""
+        height, depth = self.map.height, self.map.depth
+        sources = [self._encode(pos) for pos in self.exits
+                   if self.map.is_walkable(*pos)]
+        distance, parent = dijkstra_buckets(self.graph, sources)
+
+        # 父节点即下一跳，将坐标差转换为方向编号
+        cells = np.flatnonzero(parent >= 0)
+        targets = parent[cells]
+        dx = targets // (height * depth) - cells // (height * depth)
+        dy = (targets // depth) % height - (cells // depth) % height
+        dz = targets % depth - cells % depth
+        next_hop = np.full(parent.size, -1, dtype=np.int8)
+        next_hop[cells] = _DIRECTION_CODES[dx + 1, dy + 1, dz + 1]
+
+        self.distance = distance
+        self.next_hop = next_hop
+        self.stale = False
+
+    def ensure_current(self):
+        """若距离场过期则重新计算"""
+        if self.stale:
+            self.compute()
+
+    def distance_to_exit(self, pos: Tuple[int, int, int]) -> float:
+        """
+        查询到最近出口的距离
+
+        Args:
+            pos: 位置 (x, y, z)
+
+        Returns:
+            距离，不可通行或无法到达出口时为 inf
+        """
+        if not self.map.is_walkable(*pos):
+            return float('inf')
+        self.ensure_current()
+        return float(self.distance[self._encode(pos)])
+
+    def route(self, start: Tuple[int, int, int]) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        沿方向场行走得到到最近出口的路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+
+        Returns:
+            路径点列表，如果无法到达任何出口则返回None
+        """
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return None
+        self.ensure_current()
+
+        index = self._encode(start)
+        if self.distance[index] == float('inf'):
+            return None
+
+        path = [start]
+        x, y, z = start
+        code = int(self.next_hop[index])
+        while code >= 0:
+            dx, dy, dz = ALL_DIRECTIONS[code]
+            x, y, z = x + dx, y + dy, z + dz
+            path.append((x, y, z))
+            code = int(self.next_hop[self._encode((x, y, z))])
+        return path
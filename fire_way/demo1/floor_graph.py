@@ -0,0 +1,261 @@
+"""
+楼层图模型
+每个楼层是一个2D网格（8邻域或4邻域），楼层之间只能通过
+BuildingMap.connectors 中登记的楼梯和电梯移动
+"""
+import heapq
+import threading
+from typing import List, Tuple, Optional, Dict, Callable
+from building_map import BuildingMap, ALL_DIRECTIONS
+from array_pathfinder import SearchBuffers
+from pathfinder_3d import PathFinder3D
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+# 同一楼层内的移动方向：前4个为直线，后4个为对角线
+HORIZONTAL_DIRECTIONS = tuple(d for d in ALL_DIRECTIONS if d[1] == 0)
+
+
+def shaft_cells(building_map: BuildingMap, start: Tuple[int, int, int],
+                end: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    """
+    展开一次垂直连接设施（楼梯、电梯）上的移动
+
+    电梯直达多层时只补全井道中可通行的中间楼层，被阻挡的楼层直接跳过，
+    所以返回的相邻两点之间可能跨越多层。
+
+    Args:
+        building_map: 建筑物地图对象
+        start: 出发位置（不包含在结果中）
+        end: 到达位置，与 start 的 x、z 相同
+
+    Returns:
+        从 start 之后到 end（包含）依次经过的路径点
+    """
+    x, y, z = start
+    ty = end[1]
+    step = 1 if ty > y else -1
+    cells = [(x, mid, z) for mid in range(y + step, ty, step)
+             if building_map.is_walkable(x, mid, z)]
+    cells.append(tuple(end))
+    return cells
+
+
+class FloorGraph(PathFinder3D):
+    """
+    按楼层分层的路径规划器
+
+    同层移动代价与 get_cost 一致，跨层移动只能经过垂直连接设施，
+    代价由设施自身的 cost_per_floor 和 boarding_cost 决定。
+    电梯直达多层时，返回的路径只补全井道中可通行的中间楼层，
+    因此相邻两个路径点的楼层差可能大于1（见 shaft_cells）。
+    """
+
+    def __init__(self, building_map: BuildingMap):
+        """
+        初始化楼层图
+
+        Args:
+            building_map: 建筑物地图对象
+        """
+        super().__init__(building_map)
+        self._local = threading.local()
+        self.free = bytearray()
+        # 扁平索引 -> [(到达位置索引, 代价), ...]
+        self.vertical_edges: Dict[int, List[Tuple[int, float]]] = {}
+        self.min_floor_cost = 0.0
+        self._connector_count = -1
+        self._free_dirty = True
+        building_map.add_change_listener(self._on_map_change)
+
+    def _on_map_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int):
+        """单个网格变化时原地更新，区域变化时下次查询前重建"""
+        if self._free_dirty:
+            return
+        if (x1, y1, z1) == (x2, y2, z2):
+            self.free[self._encode(x1, y1, z1)] = 1 if self.map.grid[x1, y1, z1] == 0 else 0
+        else:
+            self._free_dirty = True
+
+    def _encode(self, x: int, y: int, z: int) -> int:
+        return (x * self.map.height + y) * self.map.depth + z
+
+    def refresh(self):
+        """同步可通行状态和垂直连接"""
+        if self._free_dirty:
+            self.free = bytearray((self.map.grid.ravel() == 0).tobytes())
+            self._free_dirty = False
+        if self._connector_count != len(self.map.connectors):
+            self.vertical_edges = {}
+            floor_costs = []
+            for connector in self.map.connectors:
+                floor_costs.append(connector.cost_per_floor)
+                for y1, y2, cost in connector.edges():
+                    source = self._encode(connector.x, y1, connector.z)
+                    target = self._encode(connector.x, y2, connector.z)
+                    self.vertical_edges.setdefault(source, []).append((target, cost))
+            self.min_floor_cost = min(floor_costs) if floor_costs else 0.0
+            self._connector_count = len(self.map.connectors)
+
+    def _get_buffers(self) -> SearchBuffers:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None or buffers.size != self.map.grid.size:
+            buffers = SearchBuffers(self.map.grid.size)
+            self._local.buffers = buffers
+        return buffers
+
+    def floor_heuristic(self, pos1: Tuple[int, int, int],
+                        pos2: Tuple[int, int, int],
+                        allow_diagonal: bool = True) -> float:
+        """
+        楼层图的启发式：同层八方向（或曼哈顿）距离加上跨层的最低代价
+
+        Args:
+            pos1: 位置1
+            pos2: 位置2
+            allow_diagonal: 是否允许对角线移动
+
+        Returns:
+            不高估的估计代价
+        """
+        dx = abs(pos1[0] - pos2[0])
+        dz = abs(pos1[2] - pos2[2])
+        if allow_diagonal:
+            diagonal = min(dx, dz)
+            horizontal = self.get_cost((0, 0, 0), (1, 0, 1)) * diagonal + (max(dx, dz) - diagonal)
+        else:
+            horizontal = dx + dz
+        return horizontal + abs(pos1[1] - pos2[1]) * self.min_floor_cost
+
+    def find_path(self, start: Tuple[int, int, int],
+                  goal: Tuple[int, int, int],
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        在楼层图上使用A*查找路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许同层对角线移动
+            stats: 搜索统计对象（可选，不记录邻居生成耗时）
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+
+        if not self.map.is_walkable(*goal):
+            print(f"错误：终点 {goal} 不可通行")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        self.refresh()
+        path = self._search(start, goal, allow_diagonal, stats=stats)
+        return stats.finish(path) if stats is not None else path
+
+    def _search(self, start: Tuple[int, int, int], goal: Tuple[int, int, int],
+                allow_diagonal: bool,
+                cell_filter: Optional[Callable[[int], bool]] = None,
+                stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        楼层图上的A*主循环
+
+        Args:
+            start: 起始位置
+            goal: 目标位置
+            allow_diagonal: 是否允许同层对角线移动
+            cell_filter: 可选，按扁平索引限制搜索范围
+            stats: 搜索统计对象（可选，计数累加，由调用方调用 begin/finish）
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        width, height, depth = self.map.width, self.map.height, self.map.depth
+        hd = height * depth
+        directions = HORIZONTAL_DIRECTIONS if allow_diagonal else HORIZONTAL_DIRECTIONS[:4]
+        moves = [(dx, dz, dx * hd + dz, self.get_cost((0, 0, 0), (dx, 0, dz)))
+                 for dx, _, dz in directions]
+        free = self.free
+        vertical = self.vertical_edges.get
+        heuristic = self.floor_heuristic
+        push, pop = heapq.heappush, heapq.heappop
+        if stats is not None:
+            push, pop = stats.wrap_heap(push, pop)
+            # 每展开一个节点查询一次垂直连接，以此计数（邻居生成是内联的，不单独计时）
+            vertical = stats.wrap_neighbors(vertical, timed=False)
+
+        buffers = self._get_buffers()
+        qid = buffers.next_query()
+        g, parent, seen, closed = (buffers.g, buffers.parent,
+                                   buffers.seen, buffers.closed)
+
+        start_index = self._encode(*start)
+        goal_index = self._encode(*goal)
+        g[start_index] = 0.0
+        parent[start_index] = -1
+        seen[start_index] = qid
+        h = heuristic(start, goal, allow_diagonal)
+        open_heap = [(h, h, start_index)]
+        if stats is not None:
+            stats.peak_open = max(stats.peak_open, 1)
+
+        while open_heap:
+            _, _, current = pop(open_heap)
+            if closed[current] == qid:
+                continue
+
+            if current == goal_index:
+                return self._reconstruct(parent, current)
+
+            closed[current] = qid
+            current_g = g[current]
+            x, rest = divmod(current, hd)
+            y, z = divmod(rest, depth)
+
+            candidates = []
+            for dx, dz, offset, cost in moves:
+                nx, nz = x + dx, z + dz
+                if 0 <= nx < width and 0 <= nz < depth:
+                    candidates.append((current + offset, cost))
+            candidates.extend(vertical(current, ()))
+
+            for neighbor, cost in candidates:
+                if not free[neighbor] or closed[neighbor] == qid:
+                    continue
+                if cell_filter is not None and not cell_filter(neighbor):
+                    continue
+                tentative_g = current_g + cost
+                if seen[neighbor] == qid and tentative_g >= g[neighbor]:
+                    continue
+                seen[neighbor] = qid
+                nx, rest = divmod(neighbor, hd)
+                h = heuristic((nx, rest // depth, rest % depth), goal, allow_diagonal)
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                push(open_heap, (tentative_g + h, h, neighbor))
+
+        return None
+
+    def _reconstruct(self, parent, index: int) -> List[Tuple[int, int, int]]:
+        """回溯父节点得到路径，电梯直达时用 shaft_cells 补全中间楼层"""
+        hd = self.map.height * self.map.depth
+        cells = []
+        while index != -1:
+            x, rest = divmod(index, hd)
+            cells.append((x, rest // self.map.depth, rest % self.map.depth))
+            index = parent[index]
+        cells.reverse()
+
+        path = [cells[0]]
+        for cell in cells[1:]:
+            if cell[1] == path[-1][1]:
+                path.append(cell)
+            else:
+                path.extend(shaft_cells(self.map, path[-1], cell))
+        return path
@@ -0,0 +1,216 @@
+"""
+楼层平面渲染
+不依赖图形界面，用NumPy一次生成楼层平面图（障碍物、楼梯和电梯、火焰和烟气、
+路线）的RGB数组，可编码为PNG（只用标准库 zlib）或输出为文本；
+整栋建筑的所有楼层在同一次数组运算中生成
+"""
+import os
+import zlib
+import struct
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Sequence
+from building_map import BuildingMap
+from hazard_field import HazardField
+from path_analysis import path_to_array
+
+
+Cell = Tuple[int, int, int]
+
+# 颜色（RGB）
+COLORS: Dict[str, Tuple[int, int, int]] = {
+    'walkable': (245, 245, 240),
+    'obstacle': (60, 60, 60),
+    'stairs': (70, 130, 200),
+    'elevator': (150, 90, 190),
+    'smoke': (120, 120, 120),
+    'fire': (220, 40, 20),
+    'path': (255, 170, 0),
+    'start': (40, 170, 60),
+    'end': (200, 0, 90),
+}
+
+# 烟气达到不安全浓度时与底色混合的最大比例
+SMOKE_OPACITY = 0.7
+
+# 文本输出中每个网格的字符（与 BuildingMap.visualize_2d_slice 一致）
+TEXT_CELLS = {
+    'walkable': ' .',
+    'obstacle': ' #',
+    'smoke': ' ~',     # 烟气达到不安全浓度
+    'fire': ' !',      # 火焰达到不安全强度
+    'path': ' *',
+}
+
+
+def render_floors(building_map: BuildingMap,
+                  floors: Optional[Sequence[int]] = None,
+                  path=None,
+                  hazard: Optional[HazardField] = None,
+                  scale: int = 1) -> List[np.ndarray]:
+    """
+    渲染多个楼层的平面图
+
+    所有楼层一次完成：按网格类别查调色板得到底色，与烟气和火焰按浓度混合，
+    再按路线的坐标直接写入路线颜色。图像的行为X轴，列为Z轴
+    （与 visualize_2d_slice 的方向一致）。
+
+    Args:
+        building_map: 建筑物地图对象
+        floors: 要渲染的楼层，默认为全部楼层
+        path: 可选，路线（路径点列表或 (N, 3) 数组），起点和终点用单独的颜色
+        hazard: 可选，危险场（显示火焰和烟气）
+        scale: 每个网格放大为 scale x scale 个像素
+
+    Returns:
+        每个楼层一个 (width*scale, depth*scale, 3) 的 uint8 数组
+    """
+    if scale < 1:
+        raise ValueError(f"放大倍数 {scale} 必须为正整数")
+    if floors is None:
+        floors = range(building_map.height)
+    floors = [int(y) for y in floors]
+    for y in floors:
+        if y < 0 or y >= building_map.height:
+            raise ValueError(f"楼层 {y} 超出范围")
+
+    # 先把楼层轴移到最前面：(楼层数, width, depth)
+    grid = np.moveaxis(building_map.grid[:, floors, :], 1, 0)
+    category = np.where(grid != 0, 1, 0).astype(np.uint8)
+    layer_of = {y: i for i, y in enumerate(floors)}
+    for connector in building_map.connectors:
+        code = 3 if connector.kind == 'elevator' else 2
+        for y in connector.floors:
+            i = layer_of.get(y)
+            if i is not None and category[i, connector.x, connector.z] == 0:
+                category[i, connector.x, connector.z] = code
+    palette = np.array([COLORS['walkable'], COLORS['obstacle'],
+                        COLORS['stairs'], COLORS['elevator']], dtype=np.uint8)
+    image = palette[category]
+
+    if hazard is not None:
+        walkable = (category != 1)[..., None]
+        smoke = np.moveaxis(hazard.smoke[:, floors, :], 1, 0)
+        fire = np.moveaxis(hazard.fire[:, floors, :], 1, 0)
+        smoke_alpha = np.clip(smoke / hazard.smoke_limit, 0.0, 1.0)[..., None] * SMOKE_OPACITY
+        fire_alpha = np.clip(fire / hazard.fire_limit, 0.0, 1.0)[..., None]
+        blended = image * (1 - smoke_alpha) + np.array(COLORS['smoke']) * smoke_alpha
+        blended = blended * (1 - fire_alpha) + np.array(COLORS['fire']) * fire_alpha
+        image = np.where(walkable, blended.astype(np.uint8), image)
+
+    points = path_to_array(path) if path is not None else None
+    if points is not None and len(points):
+        layer = np.array([layer_of.get(y, -1) for y in range(building_map.height)])
+        for cells, color in ((points, COLORS['path']), (points[:1], COLORS['start']),
+                             (points[-1:], COLORS['end'])):
+            shown = layer[cells[:, 1]]
+            on_floor = shown >= 0
+            image[shown[on_floor], cells[on_floor, 0], cells[on_floor, 2]] = color
+
+    if scale > 1:
+        image = image.repeat(scale, axis=1).repeat(scale, axis=2)
+    return list(image)
+
+
+def render_floor(building_map: BuildingMap, y: int, path=None,
+                 hazard: Optional[HazardField] = None, scale: int = 1) -> np.ndarray:
+    """
+    渲染一个楼层的平面图（见 render_floors）
+
+    Returns:
+        (width*scale, depth*scale, 3) 的 uint8 数组
+    """
+    return render_floors(building_map, [y], path, hazard, scale)[0]
+
+
+def floor_text(building_map: BuildingMap, y: int, path=None,
+               hazard: Optional[HazardField] = None) -> str:
+    """
+    生成楼层平面的文本图（格式与 visualize_2d_slice 相同）
+
+    Args:
+        building_map: 建筑物地图对象
+        y: 楼层
+        path: 可选，路线（只显示该楼层的路径点）
+        hazard: 可选，危险场（不安全的网格显示为 ~ 或 !）
+
+    Returns:
+        多行文本（X轴向下，Z轴向右）
+    """
+    if y < 0 or y >= building_map.height:
+        raise ValueError(f"楼层 {y} 超出范围")
+    cells = np.where(building_map.grid[:, y, :] != 0,
+                     TEXT_CELLS['obstacle'], TEXT_CELLS['walkable'])
+    if hazard is not None:
+        walkable = building_map.grid[:, y, :] == 0
+        cells[walkable & (hazard.smoke[:, y, :] >= hazard.smoke_limit)] = TEXT_CELLS['smoke']
+        cells[walkable & (hazard.fire[:, y, :] >= hazard.fire_limit)] = TEXT_CELLS['fire']
+    points = path_to_array(path) if path is not None else None
+    if points is not None and len(points):
+        points = points[points[:, 1] == y]
+        cells[points[:, 0], points[:, 2]] = TEXT_CELLS['path']
+
+    header = "  " + "".join(f"{z:2}" for z in range(building_map.depth))
+    rows = [f"{x:2} " + "".join(row) for x, row in enumerate(cells.tolist())]
+    return "\n".join([header] + rows)
+
+
+def encode_png(image: np.ndarray, compress_level: int = 6) -> bytes:
+    """
+    将 (H, W, 3) 的 uint8 RGB数组编码为PNG（每行不做预测滤波）
+
+    Args:
+        image: RGB图像
+        compress_level: zlib 压缩级别（1 最快，9 最小）
+
+    Returns:
+        PNG文件内容
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError(f"图像的形状应为 (H, W, 3)，实际为 {image.shape}")
+    height, width = image.shape[:2]
+    # 每行前加一个滤波类型字节 0
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), compress_level)) +
+            chunk(b'IEND', b''))
+
+
+def save_png(image: np.ndarray, filename: str, compress_level: int = 6):
+    """将RGB数组保存为PNG文件"""
+    with open(filename, 'wb') as f:
+        f.write(encode_png(image, compress_level))
+
+
+def save_floor_images(building_map: BuildingMap, directory: str, path=None,
+                      hazard: Optional[HazardField] = None, scale: int = 4,
+                      prefix: str = 'floor', compress_level: int = 1) -> List[str]:
+    """
+    将所有楼层渲染为PNG文件（如供监控面板显示）
+
+    Args:
+        building_map: 建筑物地图对象
+        directory: 输出目录（不存在时创建）
+        path: 可选，路线
+        hazard: 可选，危险场
+        scale: 每个网格的像素数
+        prefix: 文件名前缀，文件名为 {prefix}_{楼层}.png
+        compress_level: zlib 压缩级别
+
+    Returns:
+        按楼层顺序的文件路径列表
+    """
+    os.makedirs(directory, exist_ok=True)
+    filenames = []
+    for y, image in enumerate(render_floors(building_map, None, path, hazard, scale)):
+        filename = os.path.join(directory, f"{prefix}_{y}.png")
+        save_png(image, filename, compress_level)
+        filenames.append(filename)
+    return filenames
@@ -0,0 +1,513 @@
+"""
+火灾危险场
+用NumPy元胞自动机模拟火焰和烟气在建筑内的蔓延（每一步用平移切片一次更新整栋建筑），
+由传感器事件设置火点和烟气，预测每个网格变得不安全的时间，
+并提供按到达时间避开危险网格的A*搜索
+"""
+import heapq
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Iterable
+from building_map import BuildingMap
+from array_pathfinder import ArrayPathFinder3D, INF
+from pathfinder_3d import HEURISTIC_SCALE
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+Cell = Tuple[int, int, int]
+
+# 与 Final_assembly/fire-alert-system/config/thresholds.json 一致
+TEMPERATURE_ALERT = 60.0     # °C
+TEMPERATURE_CRITICAL = 80.0
+SMOKE_ALERT = 50.0           # ppm
+SMOKE_CRITICAL = 80.0
+
+
+class HazardField:
+    """
+    火焰和烟气的元胞自动机模型
+
+    fire 为燃烧强度，smoke 为相对烟气浓度（1.0 对应 SMOKE_CRITICAL），两者均为
+    与地图同形状的 float32 数组，取值 0~1（第一次点火或加烟之前为只读的全零视图，
+    不分配内存，因此没有火情的导航系统不为危险场占用内存）。障碍物网格视为不燃的墙，火焰和烟气
+    只在同层相邻的可通行网格之间传播；楼层之间只经楼梯间和电梯井（登记的垂直
+    连接所在的列）传播，烟气只向上流动。
+    """
+
+    def __init__(self, building_map: BuildingMap, time_step: float = 1.0,
+                 fire_growth: float = 0.1, fire_spread: float = 0.05,
+                 smoke_production: float = 0.2, smoke_diffusion: float = 0.2,
+                 smoke_rise: float = 0.2, fire_limit: float = 0.05,
+                 smoke_limit: float = SMOKE_ALERT / SMOKE_CRITICAL):
+        """
+        初始化危险场（初始无火无烟）
+
+        Args:
+            building_map: 建筑物地图对象
+            time_step: 每一步代表的时间（秒）
+            fire_growth: 已燃网格每秒的增长率
+            fire_spread: 相邻网格每秒的引燃率
+            smoke_production: 燃烧强度为1的网格每秒产生的烟气
+            smoke_diffusion: 相邻网格之间每秒交换的浓度差比例
+            smoke_rise: 竖井中每秒向上一层流动的烟气比例
+            fire_limit: 燃烧强度达到该值的网格不安全
+            smoke_limit: 烟气浓度达到该值的网格不安全（默认对应 SMOKE_ALERT）
+        """
+        if 4 * smoke_diffusion * time_step + smoke_rise * time_step > 1.0:
+            raise ValueError("smoke_diffusion 或 smoke_rise 相对 time_step 过大，"
+                             "烟气模型将不稳定")
+        self.map = building_map
+        self.time_step = time_step
+        self.fire_growth = fire_growth
+        self.fire_spread = fire_spread
+        self.smoke_production = smoke_production
+        self.smoke_diffusion = smoke_diffusion
+        self.smoke_rise = smoke_rise
+        self.fire_limit = fire_limit
+        self.smoke_limit = smoke_limit
+
+        # 第一次写入火焰或烟气之前为只读的全零视图（不占内存），写入时才分配数组
+        self.fire = np.broadcast_to(np.float32(0.0), building_map.grid.shape)
+        self.smoke = self.fire
+        self._allocated = False
+        self.time = 0.0
+        # 状态每次变化（点火、加烟、推进）加1，用于判断预测是否过期
+        self.revision = 0
+        # 有火焰或烟气的区域（含一个网格的余量），只在该区域内更新
+        self._active: Optional[List[int]] = None
+        self._openings = None
+        self._forecast = None
+        building_map.add_change_listener(self._on_map_change)
+
+    def _on_map_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int):
+        """地图变化后下次使用前重新计算开口"""
+        self._openings = None
+
+    def _get_openings(self):
+        """
+        计算网格之间的开口：同层相邻的可通行网格对，以及竖井中上下相邻的网格对
+
+        Returns:
+            (walkable, horizontal, shafts)：walkable 为可通行掩码（float32），
+            horizontal 为 [(src切片, dst切片, 掩码)]，shafts[x, y, z] 表示
+            (x, y, z) 与 (x, y + 1, z) 之间是否连通
+        """
+        if self._openings is not None:
+            return self._openings
+        walkable = self.map.grid == 0
+        horizontal = []
+        for axis in (0, 2):
+            src = [slice(None)] * 3
+            dst = [slice(None)] * 3
+            src[axis], dst[axis] = slice(None, -1), slice(1, None)
+            src, dst = tuple(src), tuple(dst)
+            horizontal.append((src, dst, (walkable[src] & walkable[dst]).astype(np.float32)))
+
+        columns = np.zeros(walkable.shape, dtype=bool)
+        for connector in self.map.connectors:
+            if connector.floors and self.map.is_valid_position(connector.x, 0, connector.z):
+                columns[connector.x, connector.floors[0]:connector.floors[-1], connector.z] = True
+        shafts = (columns[:, :-1] & walkable[:, :-1] & walkable[:, 1:]).astype(np.float32)
+
+        walkable = walkable.astype(np.float32)
+        if self._allocated:
+            # 新增的墙中不再有火焰和烟气
+            self.fire *= walkable
+            self.smoke *= walkable
+        self._openings = (walkable, horizontal, shafts)
+        return self._openings
+
+    def _advance(self, fire: np.ndarray, smoke: np.ndarray, steps: int,
+                 box: Optional[List[int]]) -> Optional[List[int]]:
+        """
+        将给定的火焰和烟气数组原地推进若干步
+
+        每一步火焰和烟气最多传播一个网格，因此只需更新活动区域 box
+        （[x1, y1, z1, x2, y2, z2)，已包含一个网格的余量），每步后向外扩展一格。
+
+        Returns:
+            推进后的活动区域，没有火焰和烟气时为None
+        """
+        if box is None:
+            return None
+        walkable, horizontal, shafts = self._get_openings()
+        shape = fire.shape
+        dt = self.time_step
+        for _ in range(steps):
+            view = tuple(slice(box[i], box[i + 3]) for i in range(3))
+            f, s, w = fire[view], smoke[view], walkable[view]
+            heat = np.zeros_like(f)
+            delta = np.zeros_like(s)
+            pairs = []
+            for axis, (src, dst, mask) in zip((0, 2), horizontal):
+                local = list(view)
+                local[axis] = slice(box[axis], box[axis + 3] - 1)
+                pairs.append((src, dst, mask[tuple(local)]))
+            vertical = shafts[view[0], box[1]:box[4] - 1, view[2]]
+
+            # 火焰：相邻燃烧网格引燃，已燃网格自身增长，强度以1为上限
+            for src, dst, mask in pairs:
+                heat[src] += f[dst] * mask
+                heat[dst] += f[src] * mask
+            heat[:, :-1] += f[:, 1:] * vertical
+            heat[:, 1:] += f[:, :-1] * vertical
+            heat *= self.fire_spread * dt
+            heat += (self.fire_growth * dt) * f
+            heat *= 1.0 - f
+            heat *= w
+            f += heat
+            np.minimum(f, 1.0, out=f)
+
+            # 烟气：燃烧产生，同层按浓度差扩散（守恒），竖井中向上流动
+            s += (self.smoke_production * dt) * f
+            for src, dst, mask in pairs:
+                flux = (s[dst] - s[src]) * mask
+                flux *= self.smoke_diffusion * dt
+                delta[src] += flux
+                delta[dst] -= flux
+            rising = s[:, :-1] * vertical
+            rising *= self.smoke_rise * dt
+            delta[:, :-1] -= rising
+            delta[:, 1:] += rising
+            s += delta
+            np.clip(s, 0.0, 1.0, out=s)
+
+            box = _expand(box, shape)
+        return box
+
+    def step(self, steps: int = 1):
+        """
+        将危险场推进若干个时间步
+
+        Args:
+            steps: 步数
+        """
+        self._active = self._advance(self.fire, self.smoke, steps, self._active)
+        self.time += steps * self.time_step
+        self.revision += 1
+
+    def ignite(self, pos: Cell, intensity: float = 1.0):
+        """
+        设置火点
+
+        Args:
+            pos: 位置 (x, y, z)
+            intensity: 燃烧强度（0~1）
+        """
+        self._seed([pos], [intensity], [0.0])
+
+    def add_smoke(self, pos: Cell, level: float):
+        """
+        设置某个网格的烟气浓度（取与现有浓度的较大者）
+
+        Args:
+            pos: 位置 (x, y, z)
+            level: 相对烟气浓度（0~1）
+        """
+        self._seed([pos], [0.0], [level])
+
+    def _seed(self, cells: List[Cell], fire: Iterable[float], smoke: Iterable[float]) -> int:
+        """将火焰和烟气一次写入多个可通行网格（取较大者），返回写入的网格数"""
+        walkable = self._get_openings()[0]
+        seeds = [(tuple(cell), f, s) for cell, f, s in zip(cells, fire, smoke)
+                 if self.map.is_valid_position(*cell)]
+        if not seeds:
+            return 0
+        if not self._allocated:
+            self.fire = np.zeros(self.map.grid.shape, dtype=np.float32)
+            self.smoke = np.zeros(self.map.grid.shape, dtype=np.float32)
+            self._allocated = True
+        cells, fire, smoke = zip(*seeds)
+        fire = np.clip(np.array(fire, dtype=np.float32), 0.0, 1.0)
+        smoke = np.clip(np.array(smoke, dtype=np.float32), 0.0, 1.0)
+        index = tuple(np.array(cells).T)
+        np.maximum.at(self.fire, index, fire * walkable[index])
+        np.maximum.at(self.smoke, index, smoke * walkable[index])
+        for cell in cells:
+            seed_box = _expand(list(cell) + [c + 1 for c in cell], self.fire.shape)
+            if self._active is None:
+                self._active = seed_box
+            else:
+                self._active = ([min(a, b) for a, b in zip(self._active[:3], seed_box[:3])] +
+                                [max(a, b) for a, b in zip(self._active[3:], seed_box[3:])])
+        self.revision += 1
+        return len(cells)
+
+    def seed_from_events(self, events: List[Dict],
+                         locations: Optional[Dict[str, Cell]] = None) -> int:
+        """
+        由传感器事件设置火点和烟气
+
+        事件格式与 fire-alert-system 的 SensorHandler 相同：
+        {'temperature', 'smoke', 'co', 'location', 'coordinates'（可选）}。
+        位置优先取 coordinates（[x, y, z] 或 {'x', 'y', 'z'}），否则在 locations
+        中按 location 查找。温度超过 TEMPERATURE_ALERT 的位置按超出程度设置燃烧强度，
+        烟气浓度按 smoke / SMOKE_CRITICAL 换算。
+
+        Args:
+            events: 传感器事件列表
+            locations: 位置名称到网格的映射（如 Navigation3D.landmarks）
+
+        Returns:
+            生效的事件数
+        """
+        locations = locations or {}
+        cells, fire, smoke = [], [], []
+        for event in events:
+            if not _valid_event(event):
+                print(f"警告：无效的传感器数据 {event}")
+                continue
+            cell = _event_cell(event, locations)
+            if cell is None or not self.map.is_valid_position(*cell):
+                print(f"警告：无法确定传感器 '{event.get('location')}' 的位置")
+                continue
+            cells.append(cell)
+            if event['temperature'] > TEMPERATURE_ALERT:
+                level = ((event['temperature'] - TEMPERATURE_ALERT) /
+                         (TEMPERATURE_CRITICAL - TEMPERATURE_ALERT))
+                fire.append(min(max(level, 0.1), 1.0))
+            else:
+                fire.append(0.0)
+            smoke.append(event['smoke'] / SMOKE_CRITICAL)
+        return self._seed(cells, fire, smoke)
+
+    def unsafe_mask(self) -> np.ndarray:
+        """当前不安全的网格（布尔数组）"""
+        return (self.fire >= self.fire_limit) | (self.smoke >= self.smoke_limit)
+
+    def forecast(self, horizon: float) -> np.ndarray:
+        """
+        从当前状态向前模拟，预测每个网格变得不安全的时间
+
+        网格一旦不安全即视为此后一直不安全。状态和地图未变化时直接返回上次的结果。
+
+        Args:
+            horizon: 预测时长（秒）
+
+        Returns:
+            与地图同形状的 float32 数组：距现在多少秒后不安全（现在已不安全为0，
+            预测时长内不会不安全为 inf）
+        """
+        key = (self.revision, self.map.version, horizon)
+        if self._forecast is not None and self._forecast[0] == key:
+            return self._forecast[1]
+        self._get_openings()
+        fire, smoke = self.fire.copy(), self.smoke.copy()
+        unsafe_time = np.full(fire.shape, np.inf, dtype=np.float32)
+        unsafe_time[self.unsafe_mask()] = 0.0
+        box = self._active
+        for k in range(1, int(horizon / self.time_step) + 1):
+            if box is None:
+                break
+            view = tuple(slice(box[i], box[i + 3]) for i in range(3))
+            box = self._advance(fire, smoke, 1, box)
+            newly = (fire[view] >= self.fire_limit) | (smoke[view] >= self.smoke_limit)
+            local = unsafe_time[view]
+            newly &= np.isinf(local)
+            local[newly] = k * self.time_step
+        self._forecast = (key, unsafe_time)
+        return unsafe_time
+
+    def get_info(self) -> Dict:
+        """
+        获取危险场概况
+
+        Returns:
+            包含时间、燃烧和不安全网格数、最大烟气浓度的字典
+        """
+        return {
+            'time': self.time,
+            'burning_cells': int(np.count_nonzero(self.fire >= self.fire_limit)),
+            'unsafe_cells': int(np.count_nonzero(self.unsafe_mask())),
+            'max_smoke': float(self.smoke.max()) if self.smoke.size else 0.0,
+        }
+
+
+def _expand(box: List[int], shape: Tuple[int, int, int]) -> List[int]:
+    """将区域 [x1, y1, z1, x2, y2, z2) 向外扩展一格（限制在地图范围内）"""
+    return ([max(box[i] - 1, 0) for i in range(3)] +
+            [min(box[i + 3] + 1, shape[i]) for i in range(3)])
+
+
+def _valid_event(event: Dict) -> bool:
+    """与 SensorHandler.validateData 相同的有效性检查"""
+    if not isinstance(event, dict) or not event.get('location'):
+        return False
+    for key, low, high in (('temperature', -50, 200), ('smoke', 0, 1000), ('co', 0, 1000)):
+        value = event.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        if not low <= value <= high:
+            return False
+    return True
+
+
+def _event_cell(event: Dict, locations: Dict[str, Cell]) -> Optional[Cell]:
+    """事件对应的网格"""
+    coordinates = event.get('coordinates')
+    if isinstance(coordinates, dict):
+        try:
+            return (int(coordinates['x']), int(coordinates['y']), int(coordinates['z']))
+        except (KeyError, TypeError, ValueError):
+            return None
+    if isinstance(coordinates, (list, tuple)) and len(coordinates) == 3:
+        return tuple(int(c) for c in coordinates)
+    cell = locations.get(event['location'])
+    return tuple(cell) if cell is not None else None
+
+
+class HazardPathFinder(ArrayPathFinder3D):
+    """
+    避开危险区域的时间相关A*（method='hazard'）
+
+    人员以 walking_speed（网格/秒）行走，烟气中速度降低：进入网格的代价乘以
+    1 + smoke_penalty * 当前烟气浓度。到达某个网格的时间（代价 / walking_speed）
+    不早于该网格预测的不安全时间减去 safety_margin 时，不进入该网格。
+    到达时间随代价单调增加，因此最早到达即最优，搜索结果在该约束下是最优的。
+    结果随危险场变化，不写入路径缓存。
+    """
+
+    cacheable = False
+
+    def __init__(self, building_map: BuildingMap, hazard: HazardField,
+                 walking_speed: float = 1.0, smoke_penalty: float = 2.0,
+                 safety_margin: float = 5.0, horizon: float = 120.0):
+        """
+        初始化路径规划器
+
+        Args:
+            building_map: 建筑物地图对象
+            hazard: 危险场
+            walking_speed: 行走速度（网格/秒）
+            smoke_penalty: 烟气浓度为1时代价增加的倍数
+            safety_margin: 需要比网格变得不安全提前多少秒离开（秒）
+            horizon: 预测时长（秒），超出后的危险不考虑
+        """
+        super().__init__(building_map)
+        self.hazard = hazard
+        self.walking_speed = walking_speed
+        self.smoke_penalty = smoke_penalty
+        self.safety_margin = safety_margin
+        self.horizon = horizon
+        self._tables = None
+
+    def _get_tables(self) -> Tuple[List[float], List[float]]:
+        """
+        每个网格的代价倍数和到达代价上限（危险场或地图变化后重新计算）
+
+        Returns:
+            (multiplier, limit)：到达代价不小于 limit 的网格不能进入
+        """
+        key = (self.hazard.revision, self.map.version, self.walking_speed,
+               self.smoke_penalty, self.safety_margin, self.horizon)
+        if self._tables is None or self._tables[0] != key:
+            multiplier = 1.0 + self.smoke_penalty * self.hazard.smoke.astype(np.float64)
+            unsafe_time = self.hazard.forecast(self.horizon).astype(np.float64)
+            limit = (unsafe_time - self.safety_margin) * self.walking_speed
+            self._tables = (key, multiplier.ravel().tolist(), limit.ravel().tolist())
+        return self._tables[1], self._tables[2]
+
+    def find_path(self, start: Cell, goal: Cell,
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """
+        查找在到达前不会变得不安全的路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许对角线移动
+            stats: 搜索统计对象（可选）
+
+        Returns:
+            路径点列表，如果找不到安全路径则返回None
+        """
+        return self.find_path_to_any(start, [goal], allow_diagonal, stats)
+
+    def find_path_to_any(self, start: Cell, goals: List[Cell],
+                         allow_diagonal: bool = True,
+                         stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """
+        查找到任一目标（如安全出口）的最早到达的安全路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goals: 目标位置列表
+            allow_diagonal: 是否允许对角线移动
+            stats: 搜索统计对象（可选，有多个目标时记录的终点为None）
+
+        Returns:
+            路径点列表，如果找不到安全路径则返回None
+        """
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goals[0] if len(goals) == 1 else None)
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+        goals = [tuple(goal) for goal in goals if self.map.is_walkable(*goal)]
+        if not goals:
+            print("错误：没有可通行的目标")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        graph = self.get_graph(allow_diagonal)
+        multiplier, limit = self._get_tables()
+        heuristic = self.heuristic
+        decode = self.decode
+
+        def h(index: int) -> float:
+            pos = decode(index)
+            return min(heuristic(pos, goal) for goal in goals) * HEURISTIC_SCALE
+
+        buffers = self._get_buffers()
+        qid = buffers.next_query()
+        g, parent, seen, closed = (buffers.g, buffers.parent,
+                                   buffers.seen, buffers.closed)
+        goal_indices = {self.encode(goal) for goal in goals}
+
+        # 起点即使已处于危险中也可以出发
+        start_index = self.encode(start)
+        g[start_index] = 0.0
+        parent[start_index] = -1
+        seen[start_index] = qid
+        open_heap = [(h(start_index), start_index)]
+        push, pop, graph_neighbors = heapq.heappush, heapq.heappop, graph.neighbors
+        if stats is not None:
+            push, pop = stats.wrap_heap(push, pop)
+            graph_neighbors = stats.wrap_neighbors(graph_neighbors)
+            stats.peak_open = 1
+
+        while open_heap:
+            _, current = pop(open_heap)
+            if closed[current] == qid:
+                continue
+
+            if current in goal_indices:
+                path = []
+                index = current
+                while index != -1:
+                    path.append(decode(index))
+                    index = parent[index]
+                if stats is not None:
+                    stats.finish(path)
+                return path[::-1]
+
+            closed[current] = qid
+            current_g = g[current]
+
+            neighbors, costs = graph_neighbors(current)
+            for neighbor, cost in zip(neighbors, costs):
+                if cost == INF or closed[neighbor] == qid:
+                    continue
+                tentative_g = current_g + cost * multiplier[neighbor]
+                if tentative_g >= limit[neighbor]:
+                    continue  # 到达时已不安全
+                if seen[neighbor] == qid and tentative_g >= g[neighbor]:
+                    continue
+                seen[neighbor] = qid
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                push(open_heap, (tentative_g + h(neighbor), neighbor))
+
+        if stats is not None:
+            stats.finish(None)
+        return None
@@ -0,0 +1,363 @@
+"""
+分层路径规划（HPA*）
+将每个楼层按固定大小切分为簇，找出簇之间的入口，预先计算簇内入口之间的距离，
+查询时先在抽象图上搜索，再只在选中的簇内细化路径
+"""
+import heapq
+from typing import List, Tuple, Optional, Dict, Set
+from building_map import BuildingMap
+from floor_graph import FloorGraph, HORIZONTAL_DIRECTIONS
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+INF = float('inf')
+
+Cell = Tuple[int, int, int]
+ClusterKey = Tuple[int, int, int]  # (楼层, 簇X编号, 簇Z编号)
+
+
+class HierarchicalPlanner(FloorGraph):
+    """
+    基于楼层图模型的分层规划器
+
+    代价模型与 FloorGraph 相同（同层8邻域/4邻域，跨层经楼梯和电梯）。
+    抽象图只在入口处跨簇，查询先在抽象图上选出经过的簇，再在这些簇
+    组成的走廊内用A*细化。与HPA*一样，结果是近似最优的。
+    """
+
+    def __init__(self, building_map: BuildingMap, cluster_size: int = 10):
+        """
+        初始化分层规划器（抽象图在首次查询时构建）
+
+        Args:
+            building_map: 建筑物地图对象
+            cluster_size: 簇的边长（网格数）
+        """
+        super().__init__(building_map)
+        self.cluster_size = cluster_size
+        self.allow_diagonal: Optional[bool] = None
+        # (楼层, 簇X, 簇Z, 轴) -> 该簇与 +X（轴0）或 +Z（轴1）相邻簇之间的入口
+        # (本簇单元, 相邻簇单元, 穿越代价)
+        self.entrances: Dict[Tuple[int, int, int, int], List[Tuple[Cell, Cell, float]]] = {}
+        # 簇 -> {抽象节点: [(同簇抽象节点, 代价), ...]}
+        self.intra_edges: Dict[ClusterKey, Dict[Cell, List[Tuple[Cell, float]]]] = {}
+        # 抽象节点 -> [(相邻簇的抽象节点, 代价), ...]
+        self.links: Dict[Cell, List[Tuple[Cell, float]]] = {}
+        self.dirty_clusters: Set[ClusterKey] = set()
+        self._built_connectors = -1
+
+    def _on_map_change(self, x1: int, y1: int, z1: int,
+                       x2: int, y2: int, z2: int):
+        """记录受影响的簇，下次查询前只重建这些簇"""
+        super()._on_map_change(x1, y1, z1, x2, y2, z2)
+        s = self.cluster_size
+        for y in range(max(y1, 0), min(y2, self.map.height - 1) + 1):
+            for cx in range(max(x1, 0) // s, min(x2, self.map.width - 1) // s + 1):
+                for cz in range(max(z1, 0) // s, min(z2, self.map.depth - 1) // s + 1):
+                    self.dirty_clusters.add((y, cx, cz))
+
+    def cluster_of(self, pos: Cell) -> ClusterKey:
+        """获取位置所在的簇"""
+        return (pos[1], pos[0] // self.cluster_size, pos[2] // self.cluster_size)
+
+    def cluster_bounds(self, cluster: ClusterKey) -> Tuple[int, int, int, int]:
+        """簇的范围 (x_min, x_max, z_min, z_max)，上界不含"""
+        _, cx, cz = cluster
+        s = self.cluster_size
+        return (cx * s, min((cx + 1) * s, self.map.width),
+                cz * s, min((cz + 1) * s, self.map.depth))
+
+    def _free(self, x: int, y: int, z: int) -> bool:
+        return self.free[self._encode(x, y, z)] == 1
+
+    # ---------- 抽象图构建 ----------
+
+    def _build_entrances(self, y: int, cx: int, cz: int, axis: int):
+        """查找簇 (y, cx, cz) 与 +X 或 +Z 方向相邻簇之间的入口"""
+        s = self.cluster_size
+        key = (y, cx, cz, axis)
+        x_min, x_max, z_min, z_max = self.cluster_bounds((y, cx, cz))
+        if axis == 0:
+            if x_max >= self.map.width:
+                self.entrances.pop(key, None)
+                return
+            pairs = [((x_max - 1, y, z), (x_max, y, z)) for z in range(z_min, z_max)]
+        else:
+            if z_max >= self.map.depth:
+                self.entrances.pop(key, None)
+                return
+            pairs = [((x, y, z_max - 1), (x, y, z_max)) for x in range(x_min, x_max)]
+
+        # 将连续可通行的边界段合并，短段取中点，长段取两端
+        open_pairs = [self._free(*a) and self._free(*b) for a, b in pairs]
+        entrances = []
+        run: List[Tuple[Cell, Cell, float]] = []
+        for (a, b), is_open in zip(pairs + [(None, None)], open_pairs + [False]):
+            if is_open:
+                run.append((a, b, 1.0))
+                continue
+            if run:
+                if len(run) < 6:
+                    entrances.append(run[len(run) // 2])
+                else:
+                    entrances.extend([run[0], run[-1]])
+                run = []
+
+        # 只能斜穿边界的位置也作为入口，避免丢失连通性
+        if self.allow_diagonal:
+            diagonal_cost = self.get_cost((0, 0, 0), (1, 0, 1))
+            for i, (a, _) in enumerate(pairs):
+                if open_pairs[i] or not self._free(*a):
+                    continue
+                for j in (i - 1, i + 1):
+                    if 0 <= j < len(pairs) and not open_pairs[j] and self._free(*pairs[j][1]):
+                        entrances.append((a, pairs[j][1], diagonal_cost))
+        self.entrances[key] = entrances
+
+    def _cluster_nodes(self, cluster: ClusterKey) -> List[Cell]:
+        """簇内的抽象节点：入口单元和垂直连接设施所在的单元"""
+        y, cx, cz = cluster
+        nodes = []
+        for key, own_side in (((y, cx, cz, 0), 0), ((y, cx, cz, 1), 0),
+                              ((y, cx - 1, cz, 0), 1), ((y, cx, cz - 1, 1), 1)):
+            for entrance in self.entrances.get(key, ()):
+                nodes.append(entrance[own_side])
+        x_min, x_max, z_min, z_max = self.cluster_bounds(cluster)
+        for connector in self.map.connectors:
+            if (x_min <= connector.x < x_max and z_min <= connector.z < z_max
+                    and y in connector.floors and self._free(connector.x, y, connector.z)):
+                nodes.append((connector.x, y, connector.z))
+        return list(dict.fromkeys(nodes))
+
+    def _build_intra_edges(self, cluster: ClusterKey):
+        """预先计算簇内抽象节点之间的距离"""
+        nodes = self._cluster_nodes(cluster)
+        edges: Dict[Cell, List[Tuple[Cell, float]]] = {}
+        for i, node in enumerate(nodes):
+            dist, _ = self._local_search(node, cluster, set(nodes[i + 1:]))
+            edges.setdefault(node, [])
+            for other in nodes[i + 1:]:
+                if other in dist:
+                    edges[node].append((other, dist[other]))
+                    edges.setdefault(other, []).append((node, dist[other]))
+        self.intra_edges[cluster] = edges
+
+    def _rebuild_links(self):
+        """根据入口和垂直连接重建簇之间的连接"""
+        self.links = {}
+        for entrances in self.entrances.values():
+            for a, b, cost in entrances:
+                self.links.setdefault(a, []).append((b, cost))
+                self.links.setdefault(b, []).append((a, cost))
+        for connector in self.map.connectors:
+            for y1, y2, cost in connector.edges():
+                a = (connector.x, y1, connector.z)
+                b = (connector.x, y2, connector.z)
+                if self._free(*a) and self._free(*b):
+                    self.links.setdefault(a, []).append((b, cost))
+
+    def _clusters(self):
+        s = self.cluster_size
+        for y in range(self.map.height):
+            for cx in range((self.map.width + s - 1) // s):
+                for cz in range((self.map.depth + s - 1) // s):
+                    yield (y, cx, cz)
+
+    def build(self, allow_diagonal: bool = True):
+        """构建整个抽象图"""
+        self.refresh()
+        self.allow_diagonal = allow_diagonal
+        self._built_connectors = len(self.map.connectors)
+        self.entrances = {}
+        self.intra_edges = {}
+        for y, cx, cz in self._clusters():
+            self._build_entrances(y, cx, cz, 0)
+            self._build_entrances(y, cx, cz, 1)
+        for cluster in self._clusters():
+            self._build_intra_edges(cluster)
+        self._rebuild_links()
+        self.dirty_clusters = set()
+
+    def update(self, allow_diagonal: bool = True):
+        """重建受地图变化影响的簇，未变化的簇保留原有结果"""
+        if (self.allow_diagonal != allow_diagonal
+                or self._built_connectors != len(self.map.connectors)):
+            self.build(allow_diagonal)
+            return
+        self.refresh()
+        if not self.dirty_clusters:
+            return
+
+        affected = set()
+        for y, cx, cz in self.dirty_clusters:
+            # 重新查找该簇四条边界上的入口，边界两侧的簇都需要更新
+            for key in ((y, cx, cz, 0), (y, cx, cz, 1), (y, cx - 1, cz, 0), (y, cx, cz - 1, 1)):
+                if key[1] >= 0 and key[2] >= 0:
+                    self._build_entrances(*key)
+            affected.update([(y, cx, cz), (y, cx + 1, cz), (y, cx - 1, cz),
+                             (y, cx, cz + 1), (y, cx, cz - 1)])
+        s = self.cluster_size
+        for cluster in affected:
+            _, cx, cz = cluster
+            if 0 <= cx * s < self.map.width and 0 <= cz * s < self.map.depth:
+                self._build_intra_edges(cluster)
+        self._rebuild_links()
+        self.dirty_clusters = set()
+
+    # ---------- 簇内搜索 ----------
+
+    def _local_search(self, source: Cell, cluster: ClusterKey,
+                      targets: Optional[Set[Cell]] = None) -> Tuple[Dict[Cell, float], Dict[Cell, Cell]]:
+        """
+        限制在一个簇内的同层Dijkstra
+
+        Args:
+            source: 起点
+            cluster: 搜索范围
+            targets: 可选，全部到达后提前结束
+
+        Returns:
+            (距离字典, 父节点字典)
+        """
+        x_min, x_max, z_min, z_max = self.cluster_bounds(cluster)
+        y = source[1]
+        directions = HORIZONTAL_DIRECTIONS if self.allow_diagonal else HORIZONTAL_DIRECTIONS[:4]
+        moves = [(dx, dz, self.get_cost((0, 0, 0), (dx, 0, dz))) for dx, _, dz in directions]
+        remaining = set(targets) if targets is not None else None
+
+        dist = {source: 0.0}
+        parent: Dict[Cell, Cell] = {}
+        done = set()
+        heap = [(0.0, source)]
+        while heap:
+            d, current = heapq.heappop(heap)
+            if current in done:
+                continue
+            done.add(current)
+            if remaining is not None:
+                remaining.discard(current)
+                if not remaining:
+                    break
+            x, _, z = current
+            for dx, dz, cost in moves:
+                nx, nz = x + dx, z + dz
+                if not (x_min <= nx < x_max and z_min <= nz < z_max):
+                    continue
+                if not self._free(nx, y, nz):
+                    continue
+                neighbor = (nx, y, nz)
+                nd = d + cost
+                if nd < dist.get(neighbor, INF):
+                    dist[neighbor] = nd
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (nd, neighbor))
+        return {cell: dist[cell] for cell in done}, parent
+
+    # ---------- 查询 ----------
+
+    def find_path(self, start: Cell, goal: Cell,
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """
+        分层查找路径：抽象图上搜索后在选中的簇内细化
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许同层对角线移动
+            stats: 搜索统计对象（可选，累计抽象图搜索和细化搜索，不含簇内接入搜索）
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+
+        if not self.map.is_walkable(*goal):
+            print(f"错误：终点 {goal} 不可通行")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        self.update(allow_diagonal)
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+
+        # 将起点和终点临时接入抽象图
+        start_nodes = self._cluster_nodes(start_cluster)
+        start_dist, _ = self._local_search(start, start_cluster, set(start_nodes) | {goal})
+        start_edges = [(n, start_dist[n]) for n in start_nodes if n in start_dist]
+        if start_cluster == goal_cluster and goal in start_dist:
+            start_edges.append((goal, start_dist[goal]))
+        goal_nodes = self._cluster_nodes(goal_cluster)
+        goal_dist, _ = self._local_search(goal, goal_cluster, set(goal_nodes))
+        goal_edges = {n: goal_dist[n] for n in goal_nodes if n in goal_dist}
+
+        abstract_path = self._abstract_search(start, goal, start_edges, goal_edges,
+                                              allow_diagonal, stats)
+        if abstract_path is None:
+            return stats.finish(None) if stats is not None else None
+
+        # 只在抽象路径经过的簇（走廊）内细化
+        corridor = {self.cluster_of(cell) for cell in abstract_path}
+        s, height, depth = self.cluster_size, self.map.height, self.map.depth
+
+        def in_corridor(index: int) -> bool:
+            x, rest = divmod(index, height * depth)
+            return (rest // depth, x // s, rest % depth // s) in corridor
+
+        path = self._search(start, goal, allow_diagonal, in_corridor, stats)
+        if stats is not None:
+            if path is not None:
+                # 抽象图搜索和细化搜索各弹出一次终点
+                stats.stale_pops = stats.heap_pops - stats.nodes_expanded - 2
+            stats.finish(path)
+        return path
+
+    def _abstract_search(self, start: Cell, goal: Cell,
+                         start_edges: List[Tuple[Cell, float]],
+                         goal_edges: Dict[Cell, float],
+                         allow_diagonal: bool,
+                         stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """在抽象图上运行A*"""
+        g = {start: 0.0}
+        parent: Dict[Cell, Optional[Cell]] = {start: None}
+        closed = set()
+        h = self.floor_heuristic(start, goal, allow_diagonal)
+        heap = [(h, h, start)]
+        push, pop, links = heapq.heappush, heapq.heappop, self.links.get
+        if stats is not None:
+            push, pop = stats.wrap_heap(push, pop)
+            links = stats.wrap_neighbors(links, timed=False)
+            stats.peak_open = max(stats.peak_open, 1)
+        while heap:
+            _, _, current = pop(heap)
+            if current in closed:
+                continue
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                return path[::-1]
+            closed.add(current)
+
+            edges = list(self.intra_edges.get(self.cluster_of(current), {}).get(current, ()))
+            edges.extend(links(current, ()))
+            if current == start:
+                edges.extend(start_edges)
+            if current in goal_edges:
+                edges.append((goal, goal_edges[current]))
+
+            for neighbor, cost in edges:
+                if neighbor in closed:
+                    continue
+                tentative_g = g[current] + cost
+                if tentative_g >= g.get(neighbor, INF):
+                    continue
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                h = self.floor_heuristic(neighbor, goal, allow_diagonal)
+                push(heap, (tentative_g + h, h, neighbor))
+        return None
@@ -0,0 +1,213 @@
+"""
+增量式路径重规划（D* Lite）
+在多次调用之间保留搜索状态，地图发生少量变化（如火情封锁网格）时
+只修复受影响的部分，而不是从头重新搜索
+"""
+import heapq
+from typing import List, Tuple, Optional, Iterable, Dict
+from building_map import BuildingMap, ALL_DIRECTIONS, AXIS_DIRECTIONS
+from pathfinder_3d import PathFinder3D, HEURISTIC_SCALE
+
+
+INF = float('inf')
+
+
+class DStarLite:
+    """
+    D* Lite 增量规划器（Koenig & Likhachev 2002，优化版本）
+
+    从终点向起点反向搜索，终点固定，起点可以随人员移动而改变。
+    规划器只根据 update_cells 报告的变化更新自己的地图快照，
+    未报告的地图修改不会被感知。
+    """
+
+    def __init__(self, building_map: BuildingMap, goal: Tuple[int, int, int],
+                 allow_diagonal: bool = True,
+                 pathfinder: Optional[PathFinder3D] = None):
+        """
+        初始化规划器
+
+        Args:
+            building_map: 建筑物地图对象
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许对角线移动
+            pathfinder: 提供 get_cost 代价模型的路径规划器
+        """
+        self.map = building_map
+        self.goal = goal
+        self.directions = ALL_DIRECTIONS if allow_diagonal else AXIS_DIRECTIONS
+        self.pathfinder = pathfinder or PathFinder3D(building_map)
+        # 规划器已知的可通行状态快照
+        self.free = bytearray((building_map.grid.ravel() == 0).tobytes())
+
+        self.start: Optional[Tuple[int, int, int]] = None
+        self.last_start: Optional[Tuple[int, int, int]] = None
+        self.km = 0.0
+        self.g: Dict[Tuple[int, int, int], float] = {}
+        self.rhs: Dict[Tuple[int, int, int], float] = {goal: 0.0}
+        self.open_heap: List = []
+        self.open_keys: Dict[Tuple[int, int, int], Tuple[float, float]] = {}
+        self.expanded = 0  # 累计展开的节点数
+
+    def _index(self, pos: Tuple[int, int, int]) -> int:
+        return (pos[0] * self.map.height + pos[1]) * self.map.depth + pos[2]
+
+    def _is_free(self, pos: Tuple[int, int, int]) -> bool:
+        return self.map.is_valid_position(*pos) and self.free[self._index(pos)] == 1
+
+    def _neighbors(self, pos: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+        """地图范围内的相邻位置（不论是否可通行）"""
+        x, y, z = pos
+        return [(x + dx, y + dy, z + dz) for dx, dy, dz in self.directions
+                if self.map.is_valid_position(x + dx, y + dy, z + dz)]
+
+    def _cost(self, a: Tuple[int, int, int], b: Tuple[int, int, int]) -> float:
+        if not (self._is_free(a) and self._is_free(b)):
+            return INF
+        return self.pathfinder.get_cost(a, b)
+
+    def _heuristic(self, a: Tuple[int, int, int], b: Tuple[int, int, int]) -> float:
+        return self.pathfinder.heuristic(a, b) * HEURISTIC_SCALE
+
+    def _key(self, pos: Tuple[int, int, int]) -> Tuple[float, float]:
+        value = min(self.g.get(pos, INF), self.rhs.get(pos, INF))
+        return (value + self._heuristic(self.start, pos) + self.km, value)
+
+    def _update_vertex(self, pos: Tuple[int, int, int]):
+        g, rhs = self.g.get(pos, INF), self.rhs.get(pos, INF)
+        if g != rhs:
+            key = self._key(pos)
+            if self.open_keys.get(pos) != key:
+                self.open_keys[pos] = key
+                heapq.heappush(self.open_heap, (key, pos))
+        else:
+            self.open_keys.pop(pos, None)
+
+    def _best_successor(self, pos: Tuple[int, int, int]) -> Tuple[float, Optional[Tuple[int, int, int]]]:
+        """返回 min(c(pos, s) + g(s)) 及对应的后继"""
+        best, best_pos = INF, None
+        for neighbor in self._neighbors(pos):
+            value = self._cost(pos, neighbor) + self.g.get(neighbor, INF)
+            if value < best:
+                best, best_pos = value, neighbor
+        return best, best_pos
+
+    def _top_key(self) -> Tuple[float, float]:
+        """弹出过期条目后返回队首键值"""
+        while self.open_heap:
+            key, pos = self.open_heap[0]
+            if self.open_keys.get(pos) == key:
+                return key
+            heapq.heappop(self.open_heap)
+        return (INF, INF)
+
+    def _compute_shortest_path(self):
+        start = self.start
+        while True:
+            top_key = self._top_key()
+            start_rhs = self.rhs.get(start, INF)
+            if not (top_key < self._key(start) or start_rhs > self.g.get(start, INF)):
+                break
+            if top_key == (INF, INF):
+                break
+
+            _, u = heapq.heappop(self.open_heap)
+            del self.open_keys[u]
+            self.expanded += 1
+            new_key = self._key(u)
+            g_u, rhs_u = self.g.get(u, INF), self.rhs.get(u, INF)
+
+            if top_key < new_key:
+                self.open_keys[u] = new_key
+                heapq.heappush(self.open_heap, (new_key, u))
+            elif g_u > rhs_u:
+                self.g[u] = rhs_u
+                for s in self._neighbors(u):
+                    if s != self.goal:
+                        value = self._cost(s, u) + rhs_u
+                        if value < self.rhs.get(s, INF):
+                            self.rhs[s] = value
+                    self._update_vertex(s)
+            else:
+                self.g[u] = INF
+                for s in self._neighbors(u) + [u]:
+                    if s != self.goal and self.rhs.get(s, INF) == self._cost(s, u) + g_u:
+                        self.rhs[s] = self._best_successor(s)[0]
+                    self._update_vertex(s)
+
+    def update_cells(self, cells: Iterable[Tuple[int, int, int]]):
+        """
+        报告发生变化的网格（如 set_obstacle 封锁或 set_walkable 恢复的位置）
+
+        只修复受这些网格影响的搜索状态，实际重规划在下次 plan 时进行。
+
+        Args:
+            cells: 发生变化的位置列表
+        """
+        for cell in cells:
+            if not self.map.is_valid_position(*cell):
+                continue
+            index = self._index(cell)
+            now_free = 1 if self.map.is_walkable(*cell) else 0
+            if self.free[index] == now_free:
+                continue
+
+            neighbors = self._neighbors(cell)
+            # 变化前相关边的代价
+            old_costs = {n: self._cost(n, cell) for n in neighbors}
+            self.free[index] = now_free
+
+            if self.start is None:
+                continue
+            for u, v in [(n, cell) for n in neighbors] + [(cell, n) for n in neighbors]:
+                c_old = old_costs[u] if v == cell else old_costs[v]
+                c_new = self._cost(u, v)
+                if u != self.goal:
+                    if c_old > c_new:
+                        value = c_new + self.g.get(v, INF)
+                        if value < self.rhs.get(u, INF):
+                            self.rhs[u] = value
+                    elif self.rhs.get(u, INF) == c_old + self.g.get(v, INF):
+                        self.rhs[u] = self._best_successor(u)[0]
+                self._update_vertex(u)
+
+    def plan(self, start: Tuple[int, int, int]) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        从当前位置规划到终点的路径，复用之前的搜索结果
+
+        Args:
+            start: 当前所在位置 (x, y, z)
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return None
+
+        if not self._is_free(self.goal):
+            print(f"错误：终点 {self.goal} 不可通行")
+            return None
+
+        if self.start is None:
+            self.start = self.last_start = start
+            self._update_vertex(self.goal)
+        elif start != self.start:
+            self.start = start
+            self.km += self._heuristic(self.last_start, start)
+            self.last_start = start
+
+        self._compute_shortest_path()
+
+        # 起点的 rhs 即经过最优后继到达终点的代价
+        if self.rhs.get(start, INF) == INF:
+            return None
+
+        path = [start]
+        current = start
+        while current != self.goal:
+            _, current = self._best_successor(current)
+            if current is None or len(path) > self.map.grid.size:
+                return None
+            path.append(current)
+        return path
@@ -0,0 +1,202 @@
+"""
+跳点搜索（Jump Point Search）
+在楼层图模型上对同层8方向移动进行跳跃，跳过开阔区域中大量对称的等价路径，
+跨层移动仍然经过楼梯和电梯
+"""
+import heapq
+from typing import List, Tuple, Optional
+from floor_graph import FloorGraph, HORIZONTAL_DIRECTIONS, shaft_cells
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+Cell = Tuple[int, int, int]
+
+
+class JumpPointSearch(FloorGraph):
+    """
+    楼层图上的跳点搜索
+
+    代价模型与 FloorGraph 相同，返回的路径代价与 FloorGraph 的A*一致，
+    但在开阔区域展开的节点数少得多。楼梯和电梯所在的单元始终作为跳点，
+    以便从那里换层。只允许4方向移动时退回到 FloorGraph 的A*。
+    """
+
+    def _free_at(self, x: int, y: int, z: int) -> bool:
+        return (0 <= x < self.map.width and 0 <= z < self.map.depth
+                and self.free[self._encode(x, y, z)] == 1)
+
+    def _has_forced(self, x: int, y: int, z: int, dx: int, dz: int) -> bool:
+        """检查 (x, y, z) 沿 (dx, dz) 方向前进时是否有强制邻居"""
+        free = self._free_at
+        if dx and dz:
+            return ((not free(x - dx, y, z) and free(x - dx, y, z + dz)) or
+                    (not free(x, y, z - dz) and free(x + dx, y, z - dz)))
+        if dx:
+            return ((not free(x, y, z + 1) and free(x + dx, y, z + 1)) or
+                    (not free(x, y, z - 1) and free(x + dx, y, z - 1)))
+        return ((not free(x + 1, y, z) and free(x + 1, y, z + dz)) or
+                (not free(x - 1, y, z) and free(x - 1, y, z + dz)))
+
+    def _jump(self, x: int, y: int, z: int, dx: int, dz: int,
+              goal: Cell) -> Optional[Cell]:
+        """从 (x, y, z) 沿 (dx, dz) 跳跃，返回遇到的跳点"""
+        while True:
+            x, z = x + dx, z + dz
+            if not self._free_at(x, y, z):
+                return None
+            if (x, y, z) == goal or self._encode(x, y, z) in self.vertical_edges:
+                return (x, y, z)
+            if self._has_forced(x, y, z, dx, dz):
+                return (x, y, z)
+            if dx and dz:
+                # 斜向跳跃时，沿两个分量方向能找到跳点则当前位置也是跳点
+                if (self._jump(x, y, z, dx, 0, goal) is not None or
+                        self._jump(x, y, z, 0, dz, goal) is not None):
+                    return (x, y, z)
+
+    def _pruned_directions(self, x: int, y: int, z: int,
+                           direction: Optional[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """根据到达方向剪枝后需要搜索的方向"""
+        if direction is None:
+            return [(dx, dz) for dx, _, dz in HORIZONTAL_DIRECTIONS]
+        dx, dz = direction
+        free = self._free_at
+        directions = []
+        if dx and dz:
+            directions.extend([(dx, 0), (0, dz), (dx, dz)])
+            if not free(x - dx, y, z):
+                directions.append((-dx, dz))
+            if not free(x, y, z - dz):
+                directions.append((dx, -dz))
+        elif dx:
+            directions.append((dx, 0))
+            if not free(x, y, z + 1):
+                directions.append((dx, 1))
+            if not free(x, y, z - 1):
+                directions.append((dx, -1))
+        else:
+            directions.append((0, dz))
+            if not free(x + 1, y, z):
+                directions.append((1, dz))
+            if not free(x - 1, y, z):
+                directions.append((-1, dz))
+        return directions
+
+    def find_path(self, start: Cell, goal: Cell,
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Cell]]:
+        """
+        使用跳点搜索查找路径
+
+        Args:
+            start: 起始位置 (x, y, z)
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许同层对角线移动（False 时退回A*）
+            stats: 搜索统计对象（可选，展开数按跳点计，邻居生成耗时包含跳跃）
+
+        Returns:
+            路径点列表，如果找不到路径则返回None
+        """
+        if not allow_diagonal:
+            return super().find_path(start, goal, allow_diagonal, stats)
+
+        push, pop, successors_of = heapq.heappush, heapq.heappop, self._successors
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+            push, pop = stats.wrap_heap(push, pop)
+            successors_of = stats.wrap_neighbors(successors_of)
+
+        if not self.map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return stats.fail(START_BLOCKED) if stats is not None else None
+
+        if not self.map.is_walkable(*goal):
+            print(f"错误：终点 {goal} 不可通行")
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
+
+        self.refresh()
+
+        g = {start: 0.0}
+        parent = {start: None}
+        # 到达各跳点时的同层移动方向，经垂直移动或起点为 None
+        arrival = {start: None}
+        closed = set()
+        h = self.floor_heuristic(start, goal)
+        open_heap = [(h, h, start)]
+        if stats is not None:
+            stats.peak_open = 1
+
+        while open_heap:
+            _, _, current = pop(open_heap)
+            if current in closed:
+                continue
+            if current == goal:
+                path = self._expand_jump_path(current, parent)
+                return stats.finish(path) if stats is not None else path
+            closed.add(current)
+
+            for neighbor, cost, direction in successors_of(current, arrival[current], goal):
+                if neighbor in closed:
+                    continue
+                tentative_g = g[current] + cost
+                if tentative_g >= g.get(neighbor, float('inf')):
+                    continue
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                arrival[neighbor] = direction
+                h = self.floor_heuristic(neighbor, goal)
+                push(open_heap, (tentative_g + h, h, neighbor))
+
+        return stats.finish(None) if stats is not None else None
+
+    def _successors(self, current: Cell, arrival: Optional[Tuple[int, int]],
+                    goal: Cell) -> List[Tuple[Cell, float, Optional[Tuple[int, int]]]]:
+        """
+        展开一个跳点：沿剪枝后的方向跳跃，并加入楼梯和电梯连接的网格
+
+        Args:
+            current: 当前跳点
+            arrival: 到达该跳点时的同层移动方向 (dx, dz)
+            goal: 目标位置
+
+        Returns:
+            [(后继网格, 代价, 移动方向)]，垂直移动的方向为None
+        """
+        height, depth = self.map.height, self.map.depth
+        straight_cost = self.get_cost((0, 0, 0), (1, 0, 0))
+        diagonal_cost = self.get_cost((0, 0, 0), (1, 0, 1))
+        x, y, z = current
+        successors = []
+        for dx, dz in self._pruned_directions(x, y, z, arrival):
+            jump_point = self._jump(x, y, z, dx, dz, goal)
+            if jump_point is None:
+                continue
+            steps = max(abs(jump_point[0] - x), abs(jump_point[2] - z))
+            cost = steps * (diagonal_cost if dx and dz else straight_cost)
+            successors.append((jump_point, cost, (dx, dz)))
+        for target, cost in self.vertical_edges.get(self._encode(x, y, z), ()):
+            if self.free[target]:
+                tx, rest = divmod(target, height * depth)
+                successors.append(((tx, rest // depth, rest % depth), cost, None))
+        return successors
+
+    def _expand_jump_path(self, cell: Cell, parent) -> List[Cell]:
+        """将跳点序列展开为逐格路径"""
+        jump_points = []
+        while cell is not None:
+            jump_points.append(cell)
+            cell = parent[cell]
+        jump_points.reverse()
+
+        path = [jump_points[0]]
+        for x, y, z in jump_points[1:]:
+            px, py, pz = path[-1]
+            if y != py:
+                path.extend(shaft_cells(self.map, path[-1], (x, y, z)))
+                continue
+            dx = (x > px) - (x < px)
+            dz = (z > pz) - (z < pz)
+            while (px, pz) != (x, z):
+                px, pz = px + dx, pz + dz
+                path.append((px, y, pz))
+        return path
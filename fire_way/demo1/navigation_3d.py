@@ -2,15 +2,37 @@
 建筑物内三维立体导航系统
 整合地图和路径规划功能
 """
-from typing import List, Tuple, Optional, Dict
+import json
+from typing import List, Tuple, Optional, Dict, Callable
 from building_map import BuildingMap
 from pathfinder_3d import PathFinder3D
+from array_pathfinder import ArrayPathFinder3D
+from exit_field import ExitDistanceField
+from incremental_planner import DStarLite
+from floor_graph import FloorGraph
+from hierarchical_planner import HierarchicalPlanner
+from jump_point_search import JumpPointSearch
+from batch_navigation import navigate_many
+from route_cache import RouteCache
+from tour_planner import plan_tour, ShortestPathTrees
+from alt_heuristic import ALTPathFinder
+from bidirectional_search import BidirectionalPathFinder
+from hazard_field import HazardField, HazardPathFinder
+from evacuation import EvacuationPlanner
+from search_stats import SearchStats, UNKNOWN_METHOD
+from sensor_ingest import SensorIngestor
+from path_smoothing import simplify_path
+from floor_renderer import render_floors, save_floor_images
+from voxel_mesh import export_mesh
+from path_analysis import (path_to_array, array_to_path, path_length, path_info,
+                           batch_path_info)
 
 
 class Navigation3D:
     """3D导航系统主类"""
     
-    def __init__(self, width: int, height: int, depth: int):
+    def __init__(self, width: int, height: int, depth: int,
+                 building_map: Optional[BuildingMap] = None):
         """
         初始化导航系统
         
@@ -18,31 +40,173 @@ class Navigation3D:
             width: 地图宽度（X轴）
             height: 地图高度（Y轴，楼层数）
             depth: 地图深度（Z轴）
+            building_map: 可选，已构建好的地图（如 BuildingMap.from_array 的结果），
+                大小必须与 width/height/depth 一致
         """
-        self.building_map = BuildingMap(width, height, depth)
+        if building_map is None:
+            building_map = BuildingMap(width, height, depth)
+        elif building_map.grid.shape != (width, height, depth):
+            raise ValueError(f"地图大小 {building_map.grid.shape} 与 "
+                             f"{(width, height, depth)} 不一致")
+        self.building_map = building_map
         self.pathfinder = PathFinder3D(self.building_map)
+        # 火焰和烟气的蔓延模型，由传感器事件驱动
+        self.hazard = HazardField(self.building_map)
+        # 可选的寻路引擎：'astar' 为节点对象实现，'array' 为数组缓冲区实现，
+        # 'floor' 为楼层图模型（只能经楼梯/电梯跨层），'hierarchical' 为楼层图上的HPA*，
+        # 'jps' 为楼层图上的跳点搜索，'alt' 为使用锚点距离下界的数组A*，
+        # 'hazard' 为按到达时间避开火焰和烟气的A*，'bidirectional' 为从两端同时搜索的A*
+        self.pathfinders = {
+            'astar': self.pathfinder,
+            'array': ArrayPathFinder3D(self.building_map),
+            'floor': FloorGraph(self.building_map),
+            'hierarchical': HierarchicalPlanner(self.building_map),
+            'jps': JumpPointSearch(self.building_map),
+            'alt': ALTPathFinder(self.building_map),
+            'hazard': HazardPathFinder(self.building_map, self.hazard),
+            'bidirectional': BidirectionalPathFinder(self.building_map),
+        }
         self.landmarks: Dict[str, Tuple[int, int, int]] = {}
+        self.exits: List[str] = []  # 作为安全出口的地标名称
+        # 按连通方式缓存的出口距离场
+        self.exit_fields: Dict[bool, ExitDistanceField] = {}
+        self.tour_trees: Dict[bool, ShortestPathTrees] = {}
+        # 按连通方式缓存的疏散分配器
+        self.evacuation_planners: Dict[bool, EvacuationPlanner] = {}
+        # 最近查询的路径缓存，地图变化时按修改记录淘汰
+        self.route_cache = RouteCache(self.building_map)
+        # 每次 navigate 结束后调用的统计回调（见 add_search_hook）
+        self.search_hooks: List[Callable[[SearchStats], None]] = []
+    
+    @classmethod
+    def from_building_map(cls, building_map: BuildingMap) -> 'Navigation3D':
+        """
+        使用已构建好的地图创建导航系统
+        
+        Args:
+            building_map: 建筑物地图对象
+        
+        Returns:
+            Navigation3D 对象
+        """
+        return cls(building_map.width, building_map.height, building_map.depth,
+                   building_map)
+    
+    def save(self, path: str):
+        """
+        保存地图（见 BuildingMap.save）、地标和出口（<名称>.landmarks.json）
+        以及已计算的ALT锚点距离表
+        
+        Args:
+            path: .npy 文件路径
+        """
+        self.building_map.save(path)
+        landmarks = {name: [int(v) for v in position]
+                     for name, position in self.landmarks.items()}
+        with open(self._landmark_path(path), 'w', encoding='utf-8') as f:
+            json.dump({'landmarks': landmarks, 'exits': self.exits}, f, ensure_ascii=False)
+        self.pathfinders['alt'].save_tables(path)
     
-    def add_landmark(self, name: str, position: Tuple[int, int, int]):
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'Navigation3D':
+        """
+        加载 save 保存的地图、地标和ALT距离表
+        
+        Args:
+            path: .npy 文件路径
+            mmap_mode: 传给 np.load 的内存映射模式（'r' 时地图只读，
+                需要修改地图时使用 'c' 或 None）
+        
+        Returns:
+            Navigation3D 对象
+        """
+        navigation = cls.from_building_map(BuildingMap.load(path, mmap_mode))
+        try:
+            with open(cls._landmark_path(path), encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {'landmarks': {}, 'exits': []}
+        exits = set(metadata['exits'])
+        for name, position in metadata['landmarks'].items():
+            navigation.add_landmark(name, tuple(position), name in exits)
+        navigation.pathfinders['alt'].load_tables(path, mmap_mode)
+        return navigation
+    
+    @staticmethod
+    def _landmark_path(path: str) -> str:
+        """地标文件路径：地图文件旁的 <名称>.landmarks.json"""
+        return BuildingMap._grid_path(path)[:-4] + '.landmarks.json'
+    
+    def add_landmark(self, name: str, position: Tuple[int, int, int],
+                     is_exit: bool = False):
         """
         添加地标点
         
         Args:
             name: 地标名称（如"电梯A"、"会议室1"等）
             position: 地标位置 (x, y, z)
+            is_exit: 是否为安全出口
         """
         if self.building_map.is_walkable(*position):
             self.landmarks[name] = position
+            if is_exit and name not in self.exits:
+                self.exits.append(name)
+            elif not is_exit and name in self.exits:
+                self.exits.remove(name)
+            self._update_exit_fields()
         else:
             print(f"警告：地标 {name} 的位置 {position} 不可通行")
     
+    def _update_exit_fields(self):
+        """出口变化后通知已创建的距离场"""
+        exits = [self.landmarks[name] for name in self.exits]
+        for field in self.exit_fields.values():
+            field.set_exits(exits)
+    
+    def get_exit_field(self, allow_diagonal: bool = True) -> ExitDistanceField:
+        """
+        获取出口距离场，首次使用时创建，地图或出口变化后在下次查询时重新计算
+        
+        Args:
+            allow_diagonal: 是否允许对角线移动
+        
+        Returns:
+            ExitDistanceField 对象
+        """
+        field = self.exit_fields.get(allow_diagonal)
+        if field is None:
+            graph = self.pathfinders['array'].get_graph(allow_diagonal)
+            field = ExitDistanceField(graph, [self.landmarks[name] for name in self.exits])
+            self.exit_fields[allow_diagonal] = field
+        return field
+    
+    def get_evacuation_planner(self, allow_diagonal: bool = True) -> EvacuationPlanner:
+        """
+        获取疏散分配器，首次使用时创建（可修改其 capacities 调整通行能力）
+        
+        Args:
+            allow_diagonal: 是否允许同层对角线移动
+        
+        Returns:
+            EvacuationPlanner 对象
+        """
+        planner = self.evacuation_planners.get(allow_diagonal)
+        if planner is None:
+            planner = EvacuationPlanner(self.building_map, allow_diagonal)
+            self.evacuation_planners[allow_diagonal] = planner
+        return planner
+    
     def get_landmark(self, name: str) -> Optional[Tuple[int, int, int]]:
         """获取地标位置"""
         return self.landmarks.get(name)
     
     def navigate(self, start: Tuple[int, int, int], 
                  goal: Tuple[int, int, int],
-                 allow_diagonal: bool = True) -> Optional[List[Tuple[int, int, int]]]:
+                 allow_diagonal: bool = True,
+                 method: str = 'astar',
+                 use_cache: bool = True,
+                 stats: Optional[SearchStats] = None,
+                 as_array: bool = False):
         """
         导航从起点到终点
         
@@ -50,11 +214,109 @@ class Navigation3D:
             start: 起始位置 (x, y, z)
             goal: 目标位置 (x, y, z)
             allow_diagonal: 是否允许对角线移动
+            method: 寻路引擎名称，见 self.pathfinders
+            use_cache: 是否使用路径缓存（见 self.route_cache）
+            stats: 搜索统计对象（可选）；未传入但登记了回调时自动创建（不分项计时）
+            as_array: 为True时以 (N, 3) 整数数组返回路径
         
         Returns:
-            路径点列表，如果找不到路径则返回None
+            路径点列表（或数组），如果找不到路径则返回None
+        """
+        if stats is None and self.search_hooks:
+            stats = SearchStats(timing=False)
+        if stats is not None:
+            stats.begin(method, start, goal)
+
+        pathfinder = self.pathfinders.get(method)
+        if pathfinder is None:
+            print(f"错误：未知的寻路方法 '{method}'")
+            if stats is not None:
+                stats.fail(UNKNOWN_METHOD)
+                self._report_search(stats)
+            return None
+        # 起点或终点不可通行时不缓存，保留寻路引擎的错误提示；
+        # 结果随危险场变化的引擎（cacheable = False）不缓存
+        use_cache = (use_cache and getattr(pathfinder, 'cacheable', True)
+                     and self.building_map.is_walkable(*start)
+                     and self.building_map.is_walkable(*goal))
+        if use_cache:
+            key = (tuple(start), tuple(goal), allow_diagonal, method)
+            hit, path = self.route_cache.get(key)
+            if hit:
+                if stats is not None:
+                    stats.cache_hit = True
+                    stats.finish(path)
+                    self._report_search(stats)
+                return path_to_array(path) if as_array else path
+        path = pathfinder.find_path(start, goal, allow_diagonal, stats=stats)
+        if stats is not None:
+            stats.engine = method
+            self._report_search(stats)
+        if use_cache:
+            self.route_cache.put(key, path)
+        return path_to_array(path) if as_array else path
+    
+    def add_search_hook(self, callback: Callable[[SearchStats], None]):
+        """
+        登记统计回调，每次 navigate 结束后以 SearchStats 调用
+        （可在回调中导出计数器和直方图，如 stats.as_dict()）
+        
+        Args:
+            callback: 回调函数
+        """
+        if callback not in self.search_hooks:
+            self.search_hooks.append(callback)
+    
+    def remove_search_hook(self, callback: Callable[[SearchStats], None]):
+        """移除统计回调"""
+        if callback in self.search_hooks:
+            self.search_hooks.remove(callback)
+    
+    def _report_search(self, stats: SearchStats):
+        """将一次搜索的统计交给已登记的回调，回调出错不影响导航结果"""
+        for callback in list(self.search_hooks):
+            try:
+                callback(stats)
+            except Exception as e:
+                print(f"警告：搜索统计回调出错：{e}")
+    
+    def navigate_many(self, starts: List[Tuple[int, int, int]],
+                      goals: List[Tuple[int, int, int]],
+                      allow_diagonal: bool = True,
+                      method: str = 'array',
+                      processes: Optional[int] = None) -> List[Dict]:
         """
-        return self.pathfinder.find_path(start, goal, allow_diagonal)
+        批量导航：地图放入共享内存，由进程池并行计算
+        
+        Args:
+            starts: 起点列表
+            goals: 终点列表，与 starts 一一对应
+            allow_diagonal: 是否允许对角线移动
+            method: 寻路引擎名称
+            processes: 工作进程数，默认为CPU核数
+        
+        Returns:
+            与输入顺序一致的结果列表，每项包含 'status'（'ok'、'no_path'、
+            'invalid' 或 'error'）、'path' 和 'error'
+        """
+        return navigate_many(self, starts, goals, allow_diagonal, method, processes)
+    
+    def create_incremental_planner(self, goal: Tuple[int, int, int],
+                                   allow_diagonal: bool = True) -> DStarLite:
+        """
+        创建到固定终点的增量规划器（D* Lite）
+        
+        地图变化后调用 planner.update_cells(changed_cells) 报告变化的网格，
+        再调用 planner.plan(current_position) 得到修复后的路径。
+        
+        Args:
+            goal: 目标位置 (x, y, z)
+            allow_diagonal: 是否允许对角线移动
+        
+        Returns:
+            DStarLite 规划器
+        """
+        return DStarLite(self.building_map, goal, allow_diagonal, self.pathfinder)
     
     def navigate_to_landmark(self, start: Tuple[int, int, int], 
                              landmark_name: str,
@@ -76,16 +338,95 @@ class Navigation3D:
             return None
         return self.navigate(start, goal, allow_diagonal)
     
+    def navigate_to_nearest_exit(self, start: Tuple[int, int, int],
+                                 allow_diagonal: bool = True,
+                                 avoid_hazard: bool = False) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        导航到最近的安全出口（读取预先计算的出口距离场）
+        
+        Args:
+            start: 起始位置
+            allow_diagonal: 是否允许对角线移动
+            avoid_hazard: True 时按危险场的预测避开到达前会变得不安全的网格，
+                选择最早安全到达的出口
+        
+        Returns:
+            路径点列表，如果没有出口或无法到达则返回None
+        """
+        if not self.exits:
+            print("错误：没有设置安全出口")
+            return None
+        if avoid_hazard:
+            exits = [self.landmarks[name] for name in self.exits]
+            return self.pathfinders['hazard'].find_path_to_any(start, exits, allow_diagonal)
+        return self.get_exit_field(allow_diagonal).route(start)
+    
+    def evacuate(self, starts: List[Tuple[int, int, int]],
+                 allow_diagonal: bool = True,
+                 iterations: int = 30) -> Optional[Dict]:
+        """
+        同时为多人分配疏散路线，考虑楼梯、电梯和出口的通行能力（楼层图模型）
+        
+        Args:
+            starts: 每个人的起始位置
+            allow_diagonal: 是否允许同层对角线移动
+            iterations: 最多迭代轮数
+        
+        Returns:
+            见 EvacuationPlanner.assign：'agents'（每人的 'status'、'path'、'exit'、'time'）、
+            'evacuation_time'、'loads'、'iterations'；没有设置出口时返回None
+        """
+        if not self.exits:
+            print("错误：没有设置安全出口")
+            return None
+        exits = {name: self.landmarks[name] for name in self.exits}
+        return self.get_evacuation_planner(allow_diagonal).assign(starts, exits, iterations)
+    
+    def ingest_sensor_events(self, events: List[Dict], steps: int = 0) -> int:
+        """
+        用传感器事件更新危险场（位置可以是事件的 coordinates 或地标名称）
+        
+        Args:
+            events: SensorHandler 格式的传感器事件列表
+            steps: 写入后推进的时间步数
+        
+        Returns:
+            生效的事件数
+        """
+        applied = self.hazard.seed_from_events(events, self.landmarks)
+        if steps > 0:
+            self.hazard.step(steps)
+        return applied
+    
+    def create_sensor_ingestor(self, regions: Optional[Dict[str, Tuple[int, int, int, int, int, int]]] = None,
+                               window: float = 0.5, radius: int = 0) -> SensorIngestor:
+        """
+        创建传感器事件的批量写入器：窗口内的事件合并后一次写入地图和危险场
+        
+        Args:
+            regions: 传感器编号或位置名称 -> 区域 (x1, y1, z1, x2, y2, z2)
+            window: 缓存窗口（秒）
+            radius: 未登记区域的传感器影响的水平半径
+        
+        Returns:
+            SensorIngestor 对象（位置名称按地标查找）
+        """
+        return SensorIngestor(self.building_map, regions, window, self.hazard,
+                              self.landmarks, radius)
+    
     def navigate_through_landmarks(self, start: Tuple[int, int, int],
                                    landmark_names: List[str],
-                                   allow_diagonal: bool = True) -> Optional[List[Tuple[int, int, int]]]:
+                                   allow_diagonal: bool = True,
+                                   optimize_order: bool = True) -> Optional[List[Tuple[int, int, int]]]:
         """
-        依次导航经过多个地标
+        导航经过多个地标（访问顺序由系统决定）
         
         Args:
             start: 起始位置
             landmark_names: 地标名称列表
             allow_diagonal: 是否允许对角线移动
+            optimize_order: True 时用真实距离矩阵求最短访问顺序（见 tour_planner），
+                False 时按直线距离贪心选择下一个地标
         
         Returns:
             完整路径，如果找不到则返回None
@@ -98,66 +439,104 @@ class Navigation3D:
                 return None
             goals.append(pos)
         
-        return self.pathfinder.find_path_multiple_goals(start, goals, allow_diagonal)
+        if not optimize_order:
+            return self.pathfinder.find_path_multiple_goals(start, goals, allow_diagonal)
+        if not self.building_map.is_walkable(*start):
+            print(f"错误：起点 {start} 不可通行")
+            return None
+        trees = self.get_tour_trees(allow_diagonal)
+        return plan_tour(trees.graph, start, goals, trees=trees)
+    
+    def get_tour_trees(self, allow_diagonal: bool = True) -> ShortestPathTrees:
+        """
+        获取以地标为根的最短路径树缓存，首次使用时创建，地图变化后在下次查询时重新计算
+        
+        Args:
+            allow_diagonal: 是否允许对角线移动
+        
+        Returns:
+            ShortestPathTrees 对象
+        """
+        trees = self.tour_trees.get(allow_diagonal)
+        if trees is None:
+            trees = ShortestPathTrees(self.pathfinders['array'].get_graph(allow_diagonal))
+            self.tour_trees[allow_diagonal] = trees
+        return trees
+    
+    def prepare_tour(self, landmark_names: List[str], allow_diagonal: bool = True) -> int:
+        """
+        预先计算地标的最短路径树（如加载地图或地图更新后），
+        之后 navigate_through_landmarks 只需从起点搜索一次
+        
+        Args:
+            landmark_names: 地标名称列表
+            allow_diagonal: 是否允许对角线移动
+        
+        Returns:
+            已准备的地标数（找不到或不可通行的地标跳过）
+        """
+        trees = self.get_tour_trees(allow_diagonal)
+        prepared = 0
+        for name in landmark_names:
+            pos = self.get_landmark(name)
+            if pos is None or not self.building_map.is_walkable(*pos):
+                print(f"警告：跳过地标 '{name}'")
+                continue
+            trees.get(pos)
+            prepared += 1
+        return prepared
     
-    def get_path_length(self, path: List[Tuple[int, int, int]]) -> float:
+    def get_path_length(self, path) -> float:
         """
         计算路径长度
         
         Args:
-            path: 路径点列表
+            path: 路径点列表或 (N, 3) 数组
         
         Returns:
             路径总长度
         """
-        if not path or len(path) < 2:
-            return 0.0
+        return path_length(path)
+    
+    def simplify_path(self, path: List[Tuple[int, int, int]],
+                      lookahead: int = 256) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        将逐格路径缩减为转折点和楼层转换点（相邻两点之间的直线不经过障碍物）
         
-        total_length = 0.0
-        for i in range(len(path) - 1):
-            total_length += self.pathfinder.get_cost(path[i], path[i + 1])
+        简化后的路径用于显示和下发，长度等信息仍应由原路径计算。
+        
+        Args:
+            path: 路径点列表
+            lookahead: 每次最多向前检查的路径点数
         
-        return total_length
+        Returns:
+            简化后的路径点列表
+        """
+        return simplify_path(self.building_map, path, lookahead)
     
-    def get_path_info(self, path: List[Tuple[int, int, int]]) -> Dict:
+    def get_path_info(self, path) -> Dict:
         """
         获取路径详细信息
         
         Args:
-            path: 路径点列表
+            path: 路径点列表或 (N, 3) 数组
         
         Returns:
             包含路径信息的字典
         """
-        if not path:
-            return {
-                'length': 0,
-                'steps': 0,
-                'floor_changes': 0,
-                'floors_visited': set()
-            }
-        
-        length = self.get_path_length(path)
-        steps = len(path) - 1
-        floor_changes = 0
-        floors_visited = set()
-        
-        for i in range(len(path) - 1):
-            current_floor = path[i][1]
-            next_floor = path[i + 1][1]
-            floors_visited.add(current_floor)
-            floors_visited.add(next_floor)
-            if current_floor != next_floor:
-                floor_changes += 1
-        
-        return {
-            'length': length,
-            'steps': steps,
-            'floor_changes': floor_changes,
-            'floors_visited': sorted(floors_visited),
-            'start': path[0],
-            'end': path[-1]
-        }
+        return path_info(path)
+    
+    def get_batch_path_info(self, paths: List) -> List[Dict]:
+        """
+        一次计算多条路径的信息（如为演练报告评估大量候选路线）
+        
+        Args:
+            paths: 路径列表，每条为路径点列表或 (N, 3) 数组，长度可以不同
+        
+        Returns:
+            与 paths 一一对应的信息字典列表，格式与 get_path_info 相同
+        """
+        return batch_path_info(paths)
     
     def visualize_path(self, path: List[Tuple[int, int, int]], 
                       show_all_floors: bool = False):
@@ -165,12 +544,13 @@ class Navigation3D:
         可视化路径
         
         Args:
-            path: 路径点列表
+            path: 路径点列表或 (N, 3) 数组
             show_all_floors: 是否显示所有楼层的路径
         """
-        if not path:
+        if path is None or len(path) == 0:
             print("路径为空")
             return
+        path = array_to_path(path_to_array(path))
         
         info = self.get_path_info(path)
         print("\n=== 路径信息 ===")
@@ -180,8 +560,9 @@ class Navigation3D:
         print(f"步数: {info['steps']}")
         print(f"楼层变化次数: {info['floor_changes']}")
         print(f"经过的楼层: {info['floors_visited']}")
-        print(f"\n路径点 ({len(path)} 个):")
-        for i, pos in enumerate(path):
+        waypoints = self.simplify_path(path)
+        print(f"\n关键路径点 ({len(waypoints)} 个，共 {len(path)} 个路径点):")
+        for i, pos in enumerate(waypoints):
             print(f"  {i+1}. {pos}")
         
         # 显示路径在每层的投影
@@ -194,4 +575,52 @@ class Navigation3D:
             floor_path = [p for p in path if p[1] == floor]
             if floor_path:
                 self.building_map.visualize_2d_slice(floor, floor_path)
+    
+    def render_floors(self, path=None, floors: Optional[List[int]] = None,
+                      scale: int = 1, show_hazard: bool = True) -> List:
+        """
+        不打开图形界面渲染楼层平面图（见 floor_renderer.render_floors）
+        
+        Args:
+            path: 可选，路线
+            floors: 要渲染的楼层，默认为全部楼层
+            scale: 每个网格的像素数
+            show_hazard: 是否显示危险场中的火焰和烟气
+        
+        Returns:
+            每个楼层一个 RGB uint8 数组
+        """
+        return render_floors(self.building_map, floors, path,
+                             self.hazard if show_hazard else None, scale)
+    
+    def save_floor_images(self, directory: str, path=None, scale: int = 4,
+                          show_hazard: bool = True) -> List[str]:
+        """
+        将所有楼层渲染为PNG文件
+        
+        Args:
+            directory: 输出目录
+            path: 可选，路线
+            scale: 每个网格的像素数
+            show_hazard: 是否显示危险场中的火焰和烟气
+        
+        Returns:
+            按楼层顺序的文件路径列表
+        """
+        return save_floor_images(self.building_map, directory, path,
+                                 self.hazard if show_hazard else None, scale)
+    
+    def export_mesh(self, filename: str,
+                    scale: Tuple[float, float, float] = (1.0, 1.0, 1.0)) -> Dict:
+        """
+        将障碍物的表面网格导出为 .glb 或 .obj 文件（见 voxel_mesh）
+        
+        Args:
+            filename: 输出文件路径
+            scale: 每个网格在X、Y、Z方向的尺寸
+        
+        Returns:
+            {'quads', 'faces', 'vertices', 'filename'}
+        """
+        return export_mesh(self.building_map.grid, filename, scale)
 
@@ -0,0 +1,184 @@
+"""
+路径数组与向量化路径统计
+路径可以表示为 (N, 3) 的整数数组，长度、楼层变化次数和经过的楼层用NumPy
+一次计算，不再逐步调用 get_cost；多条长度不同的路径拼接后一起计算
+"""
+import numpy as np
+from itertools import chain
+from typing import List, Tuple, Optional, Dict, Union, Sequence
+from pathfinder_3d import STRAIGHT_COST, DIAGONAL_COST, FLOOR_COST, FLOOR_OFFSET_COST
+
+
+Cell = Tuple[int, int, int]
+PathLike = Union[Sequence[Cell], np.ndarray]
+
+
+def path_to_array(path: Optional[PathLike]) -> Optional[np.ndarray]:
+    """
+    将路径转换为 (N, 3) 的整数数组
+
+    Args:
+        path: 路径点列表或数组
+
+    Returns:
+        (N, 3) int64 数组，path 为None时返回None
+    """
+    if path is None:
+        return None
+    if isinstance(path, np.ndarray):
+        points = path.astype(np.int64, copy=False)
+    else:
+        # 逐个读取坐标比 np.asarray 解析元组列表快
+        points = np.fromiter(chain.from_iterable(path), dtype=np.int64,
+                             count=3 * len(path)).reshape(-1, 3)
+    if points.size == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError(f"路径数组的形状应为 (N, 3)，实际为 {points.shape}")
+    return points
+
+
+def array_to_path(points: Optional[np.ndarray]) -> Optional[List[Cell]]:
+    """将 (N, 3) 数组转换回路径点列表"""
+    if points is None:
+        return None
+    return [tuple(cell) for cell in np.asarray(points, dtype=np.int64).tolist()]
+
+
+def step_costs(points: np.ndarray) -> np.ndarray:
+    """
+    路径每一步的移动代价（与 PathFinder3D.get_cost 一致）
+
+    Args:
+        points: (N, 3) 路径数组
+
+    Returns:
+        (N-1,) 代价数组
+    """
+    delta = np.abs(np.diff(points, axis=0))
+    dx, dy, dz = delta[:, 0], delta[:, 1], delta[:, 2]
+    horizontal = np.where((dx == 0) | (dz == 0), STRAIGHT_COST, DIAGONAL_COST)
+    return np.where(dy == 0, horizontal, FLOOR_COST * dy + (dx + dz) * FLOOR_OFFSET_COST)
+
+
+def path_length(path: Optional[PathLike]) -> float:
+    """
+    计算路径长度
+
+    Args:
+        path: 路径点列表或 (N, 3) 数组
+
+    Returns:
+        路径总长度
+    """
+    if path is None or len(path) < 2:
+        return 0.0
+    # cumsum 按顺序累加，结果与逐步相加相同
+    return float(np.cumsum(step_costs(path_to_array(path)))[-1])
+
+
+def path_info(path: Optional[PathLike]) -> Dict:
+    """
+    获取路径详细信息（格式与 Navigation3D.get_path_info 相同）
+
+    Args:
+        path: 路径点列表或 (N, 3) 数组
+
+    Returns:
+        {'length', 'steps', 'floor_changes', 'floors_visited', 'start', 'end'}
+    """
+    if path is None or len(path) == 0:
+        return _empty_info()
+    points = path_to_array(path)
+    length = float(np.cumsum(step_costs(points))[-1]) if len(points) >= 2 else 0.0
+    return _info(points, length)
+
+
+def batch_path_info(paths: Sequence[Optional[PathLike]]) -> List[Dict]:
+    """
+    一次计算多条路径的信息
+
+    所有路径拼接为一个数组，逐步代价、楼层变化和经过的楼层都在拼接后的数组上
+    计算，再按路径分段求和，不随路径条数逐条调用。
+
+    Args:
+        paths: 路径列表（每条为路径点列表或 (N, 3) 数组，可以为None或空）
+
+    Returns:
+        与 paths 一一对应的信息字典列表，格式与 path_info 相同
+    """
+    arrays = [path_to_array(path) if path is not None else None for path in paths]
+    sizes = np.array([len(a) if a is not None else 0 for a in arrays], dtype=np.int64)
+    results: List[Dict] = [None] * len(arrays)
+    if not sizes.any():
+        return [_empty_info() for _ in arrays]
+
+    points = np.concatenate([a for a in arrays if a is not None and len(a)])
+    owner = np.repeat(np.arange(len(arrays)), sizes)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    # 拼接处（上一条路径的终点到下一条的起点）不是路径的一步
+    same_path = owner[1:] == owner[:-1]
+    costs = np.where(same_path, step_costs(points), 0.0)
+    changes = same_path & (points[1:, 1] != points[:-1, 1])
+    step_owner = owner[:-1]
+    # bincount 按顺序累加每条路径的代价，结果与逐步相加相同
+    lengths = np.bincount(step_owner, weights=costs, minlength=len(arrays))
+    floor_changes = np.bincount(step_owner, weights=changes.astype(np.float64),
+                                minlength=len(arrays))
+
+    # 经过的楼层：将 (路径编号, 楼层) 编码为一个整数后去重，只统计至少有一步的路径
+    # （与 get_path_info 一致）
+    floors = points[:, 1]
+    low = int(floors.min())
+    span = int(floors.max()) - low + 1
+    multi = sizes[owner] >= 2
+    keys = np.unique(owner[multi] * span + (floors[multi] - low))
+    floor_bounds = np.searchsorted(keys, np.arange(len(arrays) + 1) * span).tolist()
+    visited = (keys % span + low).tolist()
+
+    lengths = lengths.tolist()
+    floor_changes = floor_changes.astype(np.int64).tolist()
+    nonempty = sizes > 0
+    starts = iter(map(tuple, points[offsets[:-1][nonempty]].tolist()))
+    ends = iter(map(tuple, points[offsets[1:][nonempty] - 1].tolist()))
+    for i, size in enumerate(sizes.tolist()):
+        if size == 0:
+            results[i] = _empty_info()
+            continue
+        results[i] = {
+            'length': lengths[i] if size >= 2 else 0.0,
+            'steps': size - 1,
+            'floor_changes': floor_changes[i],
+            'floors_visited': visited[floor_bounds[i]:floor_bounds[i + 1]],
+            'start': next(starts),
+            'end': next(ends),
+        }
+    return results
+
+
+def _empty_info() -> Dict:
+    """空路径的信息"""
+    return {
+        'length': 0,
+        'steps': 0,
+        'floor_changes': 0,
+        'floors_visited': set()
+    }
+
+
+def _info(points: np.ndarray, length: float) -> Dict:
+    """非空路径数组的信息"""
+    floors = points[:, 1]
+    visited = []
+    if len(points) >= 2:
+        low = int(floors.min())
+        visited = (np.flatnonzero(np.bincount(floors - low)) + low).tolist()
+    return {
+        'length': length,
+        'steps': len(points) - 1,
+        'floor_changes': int(np.count_nonzero(floors[1:] != floors[:-1])),
+        'floors_visited': visited,
+        'start': tuple(points[0].tolist()),
+        'end': tuple(points[-1].tolist()),
+    }
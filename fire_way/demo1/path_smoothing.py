@@ -0,0 +1,148 @@
+"""
+路径简化
+用拉绳法（string pulling）将逐格路径缩减为转折点和楼层转换点，
+视线检测对一批候选线段同时做向量化的三维网格遍历
+"""
+import numpy as np
+from itertools import product
+from typing import List, Tuple
+from building_map import BuildingMap
+
+
+Cell = Tuple[int, int, int]
+
+# 判断采样点是否落在网格边界上的容差
+_EPS = 1e-9
+
+# 一次视线检测的最大线段数（控制中间数组的大小）
+_CHUNK = 1024
+
+
+def line_of_sight(grid: np.ndarray, starts, ends) -> np.ndarray:
+    """
+    批量检测线段是否只经过可通行网格
+
+    网格 (x, y, z) 占据以整数坐标为中心、边长为1的立方体。对每条线段，在它穿过
+    各轴网格边界的位置以及相邻两个边界之间的中点采样，边界上的采样点同时检查
+    边界两侧的网格（经过棱或角时检查共用它的全部网格），因此线段经过的每个网格
+    都会被检查到，擦过障碍物的棱角也视为被遮挡。
+
+    Args:
+        grid: 占用网格（0 为可通行）
+        starts: (N, 3) 线段起点（整数坐标）
+        ends: (N, 3) 线段终点（整数坐标）
+
+    Returns:
+        (N,) 布尔数组，True 表示可见
+    """
+    starts = np.asarray(starts, dtype=np.int64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=np.int64).reshape(-1, 3)
+    if starts.shape != ends.shape:
+        raise ValueError(f"起点 {starts.shape} 和终点 {ends.shape} 的数量不一致")
+    visible = np.empty(len(starts), dtype=bool)
+    for begin in range(0, len(starts), _CHUNK):
+        chunk = slice(begin, begin + _CHUNK)
+        visible[chunk] = _line_of_sight_chunk(grid, starts[chunk], ends[chunk])
+    return visible
+
+
+def _line_of_sight_chunk(grid: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """line_of_sight 的一批线段"""
+    n = len(starts)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    delta = ends - starts
+    steps = np.abs(delta)
+
+    # 各轴穿过边界 k + 0.5 的参数 t（不足最大数的部分用终点 t = 1 填充）
+    crossings = [np.ones((n, 1))]
+    for axis in range(3):
+        count = int(steps[:, axis].max())
+        if count == 0:
+            continue
+        k = np.arange(count) + 0.5
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = k[None, :] / steps[:, axis:axis + 1]
+        crossings.append(np.where(k[None, :] < steps[:, axis:axis + 1], t, 1.0))
+    t = np.sort(np.concatenate([np.zeros((n, 1))] + crossings, axis=1), axis=1)
+    samples = np.concatenate([t, (t[:, :-1] + t[:, 1:]) / 2], axis=1)
+
+    # 每个轴分别取采样点向两侧偏移后所在的网格编号；只在有移动的轴上偏移
+    # （同层线段的Y坐标是整数，不会落在边界上）
+    shape = grid.shape
+    strides = (shape[1] * shape[2], shape[2], 1)
+    flat = grid.reshape(-1)
+    outside = np.zeros(samples.shape, dtype=bool)
+    axis_options = []
+    for axis in range(3):
+        coord = starts[:, axis:axis + 1] + samples * delta[:, axis:axis + 1] + 0.5
+        if steps[:, axis].any():
+            options = [np.floor(coord - _EPS).astype(np.int64),
+                       np.floor(coord + _EPS).astype(np.int64)]
+        else:
+            options = [np.floor(coord).astype(np.int64)]
+        for cells in options:
+            outside |= (cells < 0) | (cells >= shape[axis])
+        axis_options.append([np.clip(cells, 0, shape[axis] - 1) * strides[axis]
+                             for cells in options])
+    blocked = outside
+    for xs, ys, zs in product(*axis_options):
+        blocked = blocked | (flat[xs + ys + zs] != 0)
+    return ~blocked.any(axis=1)
+
+
+def simplify_path(building_map: BuildingMap, path: List[Cell],
+                  lookahead: int = 256) -> List[Cell]:
+    """
+    将逐格路径缩减为转折点和楼层转换点
+
+    在每一段同层路径上，从当前点出发选取之后 lookahead 个路径点中最远的可见点
+    作为下一个点（拉绳法）；跨楼层的每一步（楼梯、电梯）的两端都保留。
+    最后删除共线的中间点（包括乘电梯经过的中间楼层）。
+    相邻两点之间的直线只经过可通行网格。
+
+    Args:
+        building_map: 建筑物地图对象
+        path: find_path 返回的逐格路径
+        lookahead: 每次最多向前检查的路径点数
+
+    Returns:
+        简化后的路径点列表（第一个和最后一个点不变）
+    """
+    if path is None or len(path) <= 2:
+        return list(path) if path is not None else None
+    points = np.asarray(path, dtype=np.int64)
+    n = len(points)
+    grid = building_map.grid
+
+    # run_end[i]：从 i 开始、楼层不变的最后一个路径点
+    floor_change = np.flatnonzero(points[1:, 1] != points[:-1, 1])
+    boundaries = np.append(floor_change, n - 1)
+    run_end = boundaries[np.searchsorted(boundaries, np.arange(n))]
+
+    keep = [0]
+    i = 0
+    while i < n - 1:
+        last = min(int(run_end[i]), i + lookahead)
+        j = i + 1  # 下一个路径点总是可达的（原路径的一步）
+        if last >= i + 2:
+            candidates = np.arange(i + 2, last + 1)
+            visible = line_of_sight(grid, np.repeat(points[i:i + 1], len(candidates), axis=0),
+                                    points[candidates])
+            if visible.any():
+                j = int(candidates[np.flatnonzero(visible)[-1]])
+        keep.append(j)
+        i = j
+
+    waypoints = points[keep]
+    return [tuple(int(v) for v in cell) for cell in _drop_collinear(waypoints)]
+
+
+def _drop_collinear(points: np.ndarray) -> np.ndarray:
+    """删除与前后两点同向共线的中间点"""
+    if len(points) <= 2:
+        return points
+    before = points[1:-1] - points[:-2]
+    after = points[2:] - points[1:-1]
+    collinear = (np.cross(before, after) == 0).all(axis=1) & ((before * after).sum(axis=1) > 0)
+    return points[np.concatenate([[True], ~collinear, [True]])]
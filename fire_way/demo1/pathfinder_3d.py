@@ -5,6 +5,18 @@
 import heapq
 from typing import List, Tuple, Optional, Dict
 from building_map import BuildingMap
+from search_stats import SearchStats, START_BLOCKED, GOAL_BLOCKED
+
+
+# 移动代价（get_cost、path_analysis.step_costs 和 bidirectional_search.floor_distance 共用，
+# CompiledGraph 由 get_cost 得到每个方向的代价）
+STRAIGHT_COST = 1.0        # 同层直线移动
+DIAGONAL_COST = 1.414      # 同层对角线移动（约√2）
+FLOOR_COST = 2.0           # 跨一层
+FLOOR_OFFSET_COST = 0.1    # 跨层时每格水平偏移的附加代价
+
+# 对角线代价略小于√2，欧几里得启发式（heuristic）乘以该系数后不再高估，保持一致性
+HEURISTIC_SCALE = DIAGONAL_COST / 2 ** 0.5
 
 
 class Node:
@@ -106,16 +118,17 @@ class PathFinder3D:
         if dy == 0:
             # 同一楼层
             if dx == 0 or dz == 0:
-                return 1.0  # 直线移动
+                return STRAIGHT_COST  # 直线移动
             else:
-                return 1.414  # 对角线移动（√2）
+                return DIAGONAL_COST  # 对角线移动（√2）
         else:
-            # 跨楼层移动，代价更高
-            return 2.0 + (dx + dz) * 0.1
+            # 跨楼层移动，代价更高；电梯直达多层时按跨越的层数计
+            return FLOOR_COST * dy + (dx + dz) * FLOOR_OFFSET_COST
     
     def find_path(self, start: Tuple[int, int, int], 
                   goal: Tuple[int, int, int],
-                  allow_diagonal: bool = True) -> Optional[List[Tuple[int, int, int]]]:
+                  allow_diagonal: bool = True,
+                  stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int, int]]]:
         """
         使用A*算法查找路径
         
@@ -123,18 +136,25 @@ class PathFinder3D:
             start: 起始位置 (x, y, z)
             goal: 目标位置 (x, y, z)
             allow_diagonal: 是否允许对角线移动
+            stats: 搜索统计对象（可选，传入时记录展开节点数、堆操作等）
         
         Returns:
             路径点列表，如果找不到路径则返回None
         """
+        push, pop, get_neighbors = heapq.heappush, heapq.heappop, self.map.get_neighbors
+        if stats is not None:
+            stats.begin(type(self).__name__, start, goal)
+            push, pop = stats.wrap_heap(push, pop)
+            get_neighbors = stats.wrap_neighbors(get_neighbors)
+
         # 检查起点和终点是否可通行
         if not self.map.is_walkable(*start):
             print(f"错误：起点 {start} 不可通行")
-            return None
+            return stats.fail(START_BLOCKED) if stats is not None else None
         
         if not self.map.is_walkable(*goal):
             print(f"错误：终点 {goal} 不可通行")
-            return None
+            return stats.fail(GOAL_BLOCKED) if stats is not None else None
         
         # 初始化
         start_node = Node(*start, g=0, h=self.heuristic(start, goal))
@@ -144,10 +164,12 @@ class PathFinder3D:
         heapq.heapify(open_set)
         closed_set = set()  # 已访问节点
         open_dict = {start_node.get_position(): start_node}  # 快速查找
+        if stats is not None:
+            stats.peak_open = 1
         
         while open_set:
             # 获取f值最小的节点
-            current = heapq.heappop(open_set)
+            current = pop(open_set)
             current_pos = current.get_position()
             
             # 从open_dict中移除
@@ -162,12 +184,16 @@ class PathFinder3D:
                 while node is not None:
                     path.append(node.get_position())
                     node = node.parent
+                if stats is not None:
+                    # 同一位置可能在堆中有多个条目，重复展开的次数即过期条目数
+                    stats.stale_pops = stats.nodes_expanded - len(closed_set)
+                    stats.finish(path)
                 return path[::-1]  # 反转路径
             
             closed_set.add(current_pos)
             
             # 检查所有邻居
-            neighbors = self.map.get_neighbors(*current_pos, allow_diagonal)
+            neighbors = get_neighbors(*current_pos, allow_diagonal)
             for neighbor_pos in neighbors:
                 if neighbor_pos in closed_set:
                     continue
@@ -185,16 +211,19 @@ class PathFinder3D:
                     neighbor_node.f = tentative_g + neighbor_node.h
                     neighbor_node.parent = current
                     # 重新堆化（简单方法：重新添加）
-                    heapq.heappush(open_set, neighbor_node)
+                    push(open_set, neighbor_node)
                 else:
                     # 新节点
                     h = self.heuristic(neighbor_pos, goal)
                     neighbor_node = Node(*neighbor_pos, g=tentative_g, h=h, 
                                         parent=current)
-                    heapq.heappush(open_set, neighbor_node)
+                    push(open_set, neighbor_node)
                     open_dict[neighbor_pos] = neighbor_node
         
         # 未找到路径
+        if stats is not None:
+            stats.stale_pops = stats.nodes_expanded - len(closed_set)
+            stats.finish(None)
         return None
     
     def find_path_multiple_goals(self, start: Tuple[int, int, int],
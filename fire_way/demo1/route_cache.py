@@ -0,0 +1,116 @@
+"""
+路径缓存
+按 (起点, 终点, 是否允许对角线, 寻路方法) 缓存查询结果（LRU），
+根据 BuildingMap 的版本号和修改记录只淘汰受影响的条目
+"""
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Hashable
+from building_map import BuildingMap
+
+
+Cell = Tuple[int, int, int]
+Box = Tuple[int, int, int, int, int, int]
+
+
+class RouteCache:
+    """
+    带失效机制的LRU路径缓存
+
+    地图被封锁（'blocked'）时只淘汰经过变化区域的路径，其余路径仍然是最短路径；
+    地图被放开（'freed'，包括新增楼梯和电梯）时任何路径都可能变短，因此清空缓存。
+    修改记录已被丢弃时同样清空缓存。
+    """
+
+    def __init__(self, building_map: BuildingMap, max_size: int = 1024):
+        """
+        初始化路径缓存
+
+        Args:
+            building_map: 建筑物地图对象
+            max_size: 最多缓存的路径条数
+        """
+        self.map = building_map
+        self.max_size = max_size
+        self.version = building_map.version
+        # 键 -> (路径, 路径包围盒)，找不到路径时路径为None
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self):
+        """根据地图修改记录淘汰失效的条目"""
+        if self.version == self.map.version:
+            return
+        changes = self.map.changes_since(self.version)
+        self.version = self.map.version
+        if changes is None or any(kind != 'blocked' for _, _, kind in changes):
+            self.entries.clear()
+            return
+        boxes = [box for _, box, _ in changes]
+        stale = [key for key, (path, bounds) in self.entries.items()
+                 if path is not None and self._crosses(path, bounds, boxes)]
+        for key in stale:
+            del self.entries[key]
+
+    @staticmethod
+    def _crosses(path: List[Cell], bounds: Box, boxes: List[Box]) -> bool:
+        """路径是否经过任一变化区域"""
+        for x1, y1, z1, x2, y2, z2 in boxes:
+            # 先用包围盒快速排除
+            if (x2 < bounds[0] or x1 > bounds[3] or y2 < bounds[1] or
+                    y1 > bounds[4] or z2 < bounds[2] or z1 > bounds[5]):
+                continue
+            for x, y, z in path:
+                if x1 <= x <= x2 and y1 <= y <= y2 and z1 <= z <= z2:
+                    return True
+        return False
+
+    def get(self, key: Hashable) -> Tuple[bool, Optional[List[Cell]]]:
+        """
+        查询缓存
+
+        Args:
+            key: 查询键
+
+        Returns:
+            (是否命中, 路径副本或None)
+        """
+        self._sync()
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        path = entry[0]
+        return True, (list(path) if path is not None else None)
+
+    def put(self, key: Hashable, path: Optional[List[Cell]]):
+        """
+        写入查询结果
+
+        Args:
+            key: 查询键
+            path: 路径点列表，找不到路径时为None
+        """
+        self._sync()
+        if self.max_size <= 0:
+            return
+        if path is not None:
+            xs, ys, zs = zip(*path)
+            bounds = (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+            path = list(path)
+        else:
+            bounds = None
+        self.entries[key] = (path, bounds)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self.entries.clear()
+        self.version = self.map.version
+
+    def __len__(self) -> int:
+        return len(self.entries)
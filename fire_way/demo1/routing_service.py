@@ -0,0 +1,763 @@
+"""
+异步路由服务
+用 asyncio（只依赖标准库）提供本地 HTTP 和 WebSocket 接口，常驻内存的
+Navigation3D 免去每次请求启动解释器和重建地图的开销。搜索在线程池中执行，
+相同的并发请求合并为一次搜索；传感器事件按窗口合并后批量写入（SensorIngestor），
+地图或危险场变化后向订阅者推送更新的路线
+
+用法：
+    python routing_service.py --map building.npy --port 8765
+    curl -X POST localhost:8765/api/path/calculate -d '{"start": [1,0,1], "goal": [18,2,18]}'
+"""
+import sys
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+from urllib.parse import urlsplit
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, Any
+from navigation_3d import Navigation3D
+from sensor_ingest import SensorIngestor, Box
+
+
+Cell = Tuple[int, int, int]
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 传感器事件的默认合并窗口（秒）
+DEFAULT_SENSOR_WINDOW = 0.5
+
+# 请求体和WebSocket消息的最大字节数
+MAX_BODY = 1 << 20
+
+# RFC 6455 握手使用的固定GUID
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+
+HTTP_STATUS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+ENDPOINTS = {
+    'GET /api/buildings': '已加载的建筑',
+    'GET /api/stats': '服务统计',
+    'POST /api/path/calculate': '计算路径（start + goal / landmark / exit）',
+    'POST /api/map/update': '修改地图（obstacles、walkable、regions）',
+    'POST /api/sensor/data': '传感器事件（按窗口合并后写入地图和危险场）',
+}
+
+
+class _HTTPError(Exception):
+    """带状态码的请求错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _WebSocket:
+    """一个WebSocket连接（服务端发送的帧不加掩码）"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.closed = False
+
+    async def send(self, event: str, data: Any):
+        """发送 {'event': ..., 'data': ...} 消息（与 fire-alert-system 后端的格式一致）"""
+        if self.closed:
+            return
+        payload = json.dumps({'event': event, 'data': data}, ensure_ascii=False)
+        async with self.lock:
+            self.writer.write(_encode_frame(WS_TEXT, payload.encode('utf-8')))
+            await self.writer.drain()
+
+
+class RoutingService:
+    """
+    常驻内存的路由服务
+
+    所有地图修改和搜索都提交到同一个执行器。默认执行器只有一个工作线程：
+    搜索是纯Python代码，多线程不会更快，而且部分引擎的延迟准备工作（邻接图、
+    距离表、出口距离场）不是线程安全的；单线程还保证地图修改和搜索按提交顺序执行。
+    每栋建筑的传感器事件进入各自的 SensorIngestor，窗口到期时整批写入，
+    地图修改和订阅刷新每批只发生一次。
+    """
+
+    def __init__(self, navigations: Dict[str, Navigation3D],
+                 executor: Optional[Executor] = None,
+                 sensor_window: float = DEFAULT_SENSOR_WINDOW,
+                 sensor_regions: Optional[Dict[str, Dict[str, Box]]] = None,
+                 sensor_radius: int = 0):
+        """
+        初始化路由服务
+
+        Args:
+            navigations: 建筑名称 -> Navigation3D，第一个为默认建筑
+            executor: 执行搜索的执行器，默认为单线程的 ThreadPoolExecutor
+            sensor_window: 传感器事件的合并窗口（秒），0 表示每个请求立即写入
+            sensor_regions: 可选，建筑名称 -> {传感器编号或位置名称: 区域}（见 SensorIngestor）
+            sensor_radius: 未登记区域的传感器影响的水平半径
+        """
+        if not navigations:
+            raise ValueError("至少需要一个 Navigation3D")
+        self.navigations = dict(navigations)
+        self.default_building = next(iter(self.navigations))
+        self.executor = executor or ThreadPoolExecutor(max_workers=1,
+                                                       thread_name_prefix='routing')
+        # 每栋建筑的地图代数，提交修改时递增，不同代的请求不会合并
+        self._generation = {name: 0 for name in self.navigations}
+        # (建筑, 代数, 查询) -> 正在执行的搜索
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        # 建筑 -> {(连接, 订阅编号): {'query': ..., 'path': ...}}
+        self.subscriptions: Dict[str, Dict[Tuple[_WebSocket, Any], Dict]] = {
+            name: {} for name in self.navigations}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._refresh_again = set()
+        # 建筑 -> 传感器事件的批量写入器（首次收到事件时创建）
+        self.sensor_window = sensor_window
+        self.sensor_regions = dict(sensor_regions or {})
+        self.sensor_radius = sensor_radius
+        self.ingestors: Dict[str, SensorIngestor] = {}
+        self._sensor_steps = {name: 0 for name in self.navigations}
+        self._sensor_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._listeners = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = set()   # 处理连接的任务，close 时一并结束
+        self.counters = {'requests': 0, 'searches': 0, 'coalesced': 0,
+                         'map_updates': 0, 'pushes': 0, 'sensor_events': 0,
+                         'sensor_batches': 0}
+
+    # ---------- 生命周期 ----------
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """
+        开始监听，并登记地图变化监听器（直接调用 BuildingMap 修改地图也会推送更新）
+
+        Args:
+            host: 监听地址
+            port: 端口，0 表示由系统分配
+
+        Returns:
+            asyncio 服务器对象
+        """
+        self._loop = asyncio.get_running_loop()
+        for name, nav in self.navigations.items():
+            listener = (lambda *box, _name=name:
+                        self._loop.call_soon_threadsafe(self._map_changed, _name))
+            nav.building_map.add_change_listener(listener)
+            self._listeners[name] = listener
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def close(self):
+        """停止监听并移除地图变化监听器"""
+        for name, listener in self._listeners.items():
+            self.navigations[name].building_map.remove_change_listener(listener)
+        self._listeners = {}
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        for timer in self._sensor_timers.values():
+            timer.cancel()
+        self._sensor_timers = {}
+
+    # ---------- 路由 ----------
+
+    def parse_query(self, data: Dict) -> Tuple[str, Tuple]:
+        """
+        校验路径请求
+
+        Args:
+            data: 请求内容：'start'，以及 'goal'、'landmark' 或 'exit'（true 表示最近的出口）
+                三者之一；可选 'building'、'method'（默认 'array'）、'allow_diagonal'、
+                'avoid_hazard'（只用于出口）、'simplify'（true 时只返回转折点和楼层转换点）
+
+        Returns:
+            (建筑名称, 查询元组)
+
+        Raises:
+            ValueError: 请求内容无效
+        """
+        if not isinstance(data, dict):
+            raise ValueError("请求内容应为JSON对象")
+        building = data.get('building', self.default_building)
+        nav = self.navigations.get(building)
+        if nav is None:
+            raise ValueError(f"未知的建筑 '{building}'")
+        start = _parse_cell(data.get('start'), 'start')
+        allow_diagonal = bool(data.get('allow_diagonal', True))
+        simplify = bool(data.get('simplify', False))
+        if data.get('exit'):
+            return building, ('exit', start, allow_diagonal,
+                              bool(data.get('avoid_hazard', False)), simplify)
+
+        if data.get('landmark') is not None:
+            goal = nav.get_landmark(data['landmark'])
+            if goal is None:
+                raise ValueError(f"找不到地标 '{data['landmark']}'")
+        else:
+            goal = _parse_cell(data.get('goal'), 'goal')
+        method = data.get('method', 'array')
+        if method not in nav.pathfinders:
+            raise ValueError(f"未知的寻路方法 '{method}'")
+        return building, ('path', start, tuple(goal), allow_diagonal, method, simplify)
+
+    async def route(self, building: str, query: Tuple) -> Dict:
+        """
+        执行一个路径查询；与正在执行的相同查询合并
+
+        Args:
+            building: 建筑名称
+            query: parse_query 返回的查询元组
+
+        Returns:
+            {'path', 'info', 'version', 'hazard_revision'}，找不到路径时 path 为None
+        """
+        key = (building, self._generation[building], query)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+        else:
+            self.counters['searches'] += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, _compute_route,
+                                          self.navigations[building], query)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None)
+                                     if self._inflight.get(key) is done else None)
+        # 一个等待者被取消（如客户端断开）不影响合并到同一搜索的其他请求
+        return await asyncio.shield(future)
+
+    async def update_map(self, building: str, data: Dict) -> Dict:
+        """
+        修改地图（在执行器中按提交顺序执行）
+
+        Args:
+            building: 建筑名称
+            data: 'obstacles'、'walkable'（网格坐标列表）和
+                'regions'（[{'box': [x1, y1, z1, x2, y2, z2], 'value': 0或1}]）
+
+        Returns:
+            {'version': 修改后的地图版本号}
+        """
+        nav = self.navigations[building]
+        obstacles = [_parse_cell(c, 'obstacles') for c in data.get('obstacles', [])]
+        walkable = [_parse_cell(c, 'walkable') for c in data.get('walkable', [])]
+        regions = []
+        for region in data.get('regions', []):
+            box = region.get('box') if isinstance(region, dict) else None
+            if not isinstance(box, (list, tuple)) or len(box) != 6:
+                raise ValueError(f"区域 {region} 应包含6个坐标的 'box'")
+            regions.append((tuple(int(v) for v in box), int(region.get('value', 1))))
+
+        self._generation[building] += 1
+        self.counters['map_updates'] += 1
+        loop = asyncio.get_running_loop()
+        version = await loop.run_in_executor(self.executor, _apply_map_update,
+                                             nav, obstacles, walkable, regions)
+        return {'version': version}
+
+    def get_ingestor(self, building: str) -> SensorIngestor:
+        """获取一栋建筑的传感器事件批量写入器，首次使用时创建"""
+        ingestor = self.ingestors.get(building)
+        if ingestor is None:
+            ingestor = self.navigations[building].create_sensor_ingestor(
+                self.sensor_regions.get(building), self.sensor_window, self.sensor_radius)
+            self.ingestors[building] = ingestor
+        return ingestor
+
+    async def ingest_sensor_events(self, building: str, events: List[Dict],
+                                   steps: int = 0) -> Dict:
+        """
+        传感器事件加入该建筑的 SensorIngestor，窗口到期时整批写入地图和危险场
+
+        窗口内的多个请求只修改一次地图、刷新一次订阅（'hazard' 引擎和避险出口路线
+        会变化）；窗口未到期时由定时器在到期后写入。steps 在写入本批后推进危险场。
+
+        Returns:
+            {'queued': 本次收到的事件数, 'batch': 本次请求触发写入时为 flush 的结果，
+            否则为None, 'flush_in': 距下次写入的秒数（没有待写入的事件时为None）,
+            'version': 地图版本号, 'hazard_revision': 危险场修订号}
+        """
+        nav = self.navigations[building]
+        ingestor = self.get_ingestor(building)
+        self.counters['sensor_events'] += len(events)
+        loop = asyncio.get_running_loop()
+        batch, advanced = await loop.run_in_executor(
+            self.executor, self._apply_sensor_batch, building, events, steps)
+        if batch is not None:
+            self._sensor_flushed(building, batch, advanced)
+        flush_in = self._schedule_sensor_flush(building)
+        return {'queued': len(events), 'batch': batch, 'flush_in': flush_in,
+                'version': nav.building_map.version, 'hazard_revision': nav.hazard.revision}
+
+    def _apply_sensor_batch(self, building: str, events: Optional[List[Dict]],
+                            steps: int = 0) -> Tuple[Optional[Dict], int]:
+        """
+        在执行器中加入事件（events 为None时只检查窗口），窗口到期时写入并推进危险场
+
+        只在执行器的工作线程中运行，累计的推进步数不需要加锁。
+
+        Returns:
+            (flush 的结果或None, 写入后推进的步数)
+        """
+        self._sensor_steps[building] += steps
+        ingestor = self.ingestors[building]
+        batch = ingestor.add_many(events) if events else ingestor.poll()
+        if batch is None:
+            return None, 0
+        steps, self._sensor_steps[building] = self._sensor_steps[building], 0
+        if steps > 0:
+            self.navigations[building].hazard.step(steps)
+        return batch, steps
+
+    def _sensor_flushed(self, building: str, batch: Dict, steps: int):
+        """一批传感器事件已写入：只改变了危险场时刷新订阅（地图变化由监听器刷新）"""
+        self.counters['sensor_batches'] += 1
+        if not (batch['blocked'] or batch['freed']) and (batch['hazard_applied'] or steps):
+            self._map_changed(building)
+
+    def _schedule_sensor_flush(self, building: str) -> Optional[float]:
+        """还有未写入的事件时安排在窗口到期后写入，返回距到期的秒数"""
+        delay = self.ingestors[building].time_until_flush()
+        if delay is not None and building not in self._sensor_timers:
+            loop = asyncio.get_running_loop()
+            self._sensor_timers[building] = loop.call_later(
+                delay, lambda: asyncio.ensure_future(self._flush_sensors(building)))
+        return delay
+
+    async def _flush_sensors(self, building: str):
+        """定时器到期：在执行器中写入到期的批次"""
+        self._sensor_timers.pop(building, None)
+        loop = asyncio.get_running_loop()
+        batch, advanced = await loop.run_in_executor(
+            self.executor, self._apply_sensor_batch, building, None)
+        if batch is not None:
+            self._sensor_flushed(building, batch, advanced)
+        self._schedule_sensor_flush(building)
+
+    # ---------- 订阅 ----------
+
+    def _map_changed(self, building: str):
+        """地图或危险场变化：之后的请求不再与旧搜索合并，并刷新订阅"""
+        self._generation[building] += 1
+        if not self.subscriptions[building]:
+            return
+        if building in self._refreshing:
+            self._refresh_again.add(building)  # 刷新进行中，结束后再刷新一次
+            return
+        self._refreshing[building] = asyncio.ensure_future(self._refresh(building))
+
+    async def _refresh(self, building: str):
+        """重新计算一栋建筑的所有订阅，向路线有变化的订阅者推送"""
+        try:
+            while True:
+                self._refresh_again.discard(building)
+                entries = list(self.subscriptions[building].items())
+                results = await asyncio.gather(
+                    *(self.route(building, entry['query']) for _, entry in entries),
+                    return_exceptions=True)
+                for ((socket, sub_id), entry), result in zip(entries, results):
+                    if isinstance(result, Exception) or entry.get('path', 0) == result['path']:
+                        continue
+                    if self.subscriptions[building].get((socket, sub_id)) is not entry:
+                        continue  # 已取消订阅
+                    entry['path'] = result['path']
+                    self.counters['pushes'] += 1
+                    try:
+                        await socket.send('route_update', dict(result, id=sub_id))
+                    except ConnectionError:
+                        socket.closed = True
+                if building not in self._refresh_again:
+                    break
+        finally:
+            del self._refreshing[building]
+
+    def _unsubscribe_all(self, socket: _WebSocket):
+        """移除一个连接的全部订阅"""
+        for entries in self.subscriptions.values():
+            for key in [key for key in entries if key[0] is socket]:
+                del entries[key]
+
+    # ---------- HTTP ----------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        """处理一个TCP连接（支持 keep-alive 和升级为WebSocket）"""
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except _HTTPError as e:
+                    _write_response(writer, e.status, {'success': False, 'message': str(e)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                path = urlsplit(target).path
+                if headers.get('upgrade', '').lower() == 'websocket':
+                    if path == '/ws':
+                        await self._handle_websocket(reader, writer, headers)
+                    break
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # 连接断开或服务关闭
+        finally:
+            self._connections.discard(asyncio.current_task())
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Optional[Dict]]:
+        """按路径分发HTTP请求，返回 (状态码, JSON内容)"""
+        self.counters['requests'] += 1
+        if method == 'OPTIONS':
+            return 204, None
+        try:
+            if method == 'GET' and path == '/':
+                return 200, {'service': 'Navigation3D Routing Service', 'status': 'running',
+                             'endpoints': ENDPOINTS, 'websocket': '/ws'}
+            if method == 'GET' and path == '/api/buildings':
+                return 200, {'success': True, 'data': self.get_buildings()}
+            if method == 'GET' and path == '/api/stats':
+                return 200, {'success': True, 'data': self.get_stats()}
+            if method != 'POST' or path not in ('/api/path/calculate', '/api/map/update',
+                                                '/api/sensor/data'):
+                return 404, {'success': False, 'message': f"未知的接口 {method} {path}"}
+
+            data = _parse_json(body)
+            if path == '/api/path/calculate':
+                building, query = self.parse_query(data)
+                result = await self.route(building, query)
+                if result['path'] is None:
+                    return 200, {'success': False, 'message': '找不到路径', 'data': result}
+                return 200, {'success': True, 'data': result}
+
+            building = data.get('building', self.default_building)
+            if building not in self.navigations:
+                raise ValueError(f"未知的建筑 '{building}'")
+            if path == '/api/map/update':
+                return 200, {'success': True, 'data': await self.update_map(building, data)}
+            events = data.get('events', [data])
+            if not isinstance(events, list):
+                raise ValueError("'events' 应为列表")
+            result = await self.ingest_sensor_events(building, events, int(data.get('steps', 0)))
+            return 200, {'success': True, 'data': result}
+        except ValueError as e:
+            return 400, {'success': False, 'message': str(e)}
+        except Exception as e:
+            print(f"错误：处理请求 {method} {path} 失败：{e}")
+            return 500, {'success': False, 'message': str(e)}
+
+    def get_buildings(self) -> Dict[str, Dict]:
+        """已加载建筑的概况"""
+        return {name: {'size': list(nav.building_map.grid.shape),
+                       'version': nav.building_map.version,
+                       'landmarks': {k: list(v) for k, v in nav.landmarks.items()},
+                       'exits': list(nav.exits),
+                       'methods': list(nav.pathfinders)}
+                for name, nav in self.navigations.items()}
+
+    def get_stats(self) -> Dict:
+        """服务统计：请求数、实际搜索数、合并的请求数、地图修改数、推送数、订阅数"""
+        stats = dict(self.counters)
+        stats['inflight'] = len(self._inflight)
+        stats['subscriptions'] = sum(len(entries) for entries in self.subscriptions.values())
+        return stats
+
+    # ---------- WebSocket ----------
+
+    async def _handle_websocket(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter, headers: Dict[str, str]):
+        """
+        WebSocket 连接
+
+        客户端消息为JSON：{'type': 'route' | 'subscribe', 'id': 请求编号, ...路径请求}，
+        或 {'type': 'unsubscribe', 'id': 订阅编号}。服务端回复
+        {'event': 'route' | 'route_update' | 'unsubscribed' | 'error', 'data': {...}}；
+        订阅后先回复一次 'route'，之后路线变化时推送 'route_update'。
+        """
+        key = headers.get('sec-websocket-key')
+        if not key:
+            _write_response(writer, 400, {'success': False, 'message': '缺少 Sec-WebSocket-Key'}, False)
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                      f'Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+        await writer.drain()
+
+        socket = _WebSocket(writer)
+        tasks = set()
+        try:
+            while True:
+                opcode, payload = await _read_message(reader)
+                if opcode == WS_CLOSE:
+                    async with socket.lock:
+                        writer.write(_encode_frame(WS_CLOSE, payload[:2]))
+                        await writer.drain()
+                    break
+                if opcode == WS_PING:
+                    async with socket.lock:
+                        writer.write(_encode_frame(WS_PONG, payload))
+                        await writer.drain()
+                    continue
+                if opcode != WS_TEXT:
+                    continue
+                # 每条消息单独执行，较慢的搜索不阻塞后续消息
+                task = asyncio.ensure_future(self._handle_message(socket, payload))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            socket.closed = True
+            self._unsubscribe_all(socket)
+            for task in tasks:
+                task.cancel()
+
+    async def _handle_message(self, socket: _WebSocket, payload: bytes):
+        """处理一条WebSocket消息"""
+        self.counters['requests'] += 1
+        message_id = None
+        try:
+            message = _parse_json(payload)
+            message_id = message.get('id')
+            kind = message.get('type')
+            if kind == 'unsubscribe':
+                for entries in self.subscriptions.values():
+                    entries.pop((socket, message_id), None)
+                await socket.send('unsubscribed', {'id': message_id})
+                return
+            if kind not in ('route', 'subscribe'):
+                raise ValueError(f"未知的消息类型 '{kind}'")
+
+            building, query = self.parse_query(message)
+            entry = None
+            if kind == 'subscribe':
+                entry = {'query': query}
+                self.subscriptions[building][(socket, message_id)] = entry
+            result = await self.route(building, query)
+            if entry is not None:
+                entry['path'] = result['path']
+            await socket.send('route', dict(result, id=message_id))
+        except ConnectionError:
+            socket.closed = True
+        except Exception as e:
+            try:
+                await socket.send('error', {'id': message_id, 'message': str(e)})
+            except ConnectionError:
+                socket.closed = True
+
+
+def _compute_route(nav: Navigation3D, query: Tuple) -> Dict:
+    """在执行器中执行一个查询，返回可以直接写成JSON的结果"""
+    if query[0] == 'exit':
+        _, start, allow_diagonal, avoid_hazard, simplify = query
+        path = nav.navigate_to_nearest_exit(start, allow_diagonal, avoid_hazard)
+    else:
+        _, start, goal, allow_diagonal, method, simplify = query
+        path = nav.navigate(start, goal, allow_diagonal, method)
+    info = None
+    if path:
+        # 路径信息由完整路径计算
+        info = nav.get_path_info(path)
+        info['start'], info['end'] = list(info['start']), list(info['end'])
+        if simplify:
+            path = nav.simplify_path(path)
+    return {'path': [list(cell) for cell in path] if path else None,
+            'info': info,
+            'version': nav.building_map.version,
+            'hazard_revision': nav.hazard.revision}
+
+
+def _apply_map_update(nav: Navigation3D, obstacles: List[Cell], walkable: List[Cell],
+                      regions: List[Tuple[Tuple[int, ...], int]]) -> int:
+    """在执行器中修改地图，返回修改后的版本号"""
+    building_map = nav.building_map
+    for cell in obstacles:
+        building_map.set_obstacle(*cell)
+    for cell in walkable:
+        building_map.set_walkable(*cell)
+    for box, value in regions:
+        building_map.fill_region(*box, value=value)
+    return building_map.version
+
+
+def _parse_cell(value, name: str) -> Cell:
+    """校验网格坐标 [x, y, z]"""
+    if not isinstance(value, (list, tuple)) or len(value) != 3:
+        raise ValueError(f"'{name}' 应为 [x, y, z]，而不是 {value!r}")
+    try:
+        return tuple(int(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' 应为整数坐标，而不是 {value!r}")
+
+
+def _parse_json(body: bytes) -> Dict:
+    """解析JSON请求体"""
+    try:
+        data = json.loads(body.decode('utf-8')) if body else {}
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"JSON格式错误：{e}")
+    if not isinstance(data, dict):
+        raise ValueError("请求内容应为JSON对象")
+    return data
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """读取一个HTTP请求，连接关闭时返回None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise _HTTPError(400, f"无效的请求行 {line!r}")
+    method, target, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise _HTTPError(400, "无效的 Content-Length")
+    if length > MAX_BODY:
+        raise _HTTPError(413, f"请求体超过 {MAX_BODY} 字节")
+    body = await reader.readexactly(length) if length > 0 else b''
+    return method.upper(), target, headers, body
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int,
+                    payload: Optional[Dict], keep_alive: bool = True):
+    """写入JSON响应"""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+    head = [f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}",
+            'Content-Type: application/json; charset=utf-8',
+            f'Content-Length: {len(body)}',
+            'Access-Control-Allow-Origin: *',
+            'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+            'Access-Control-Allow-Headers: Content-Type',
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+
+def _encode_frame(opcode: int, payload: bytes) -> bytes:
+    """编码一个不加掩码的完整WebSocket帧"""
+    length = len(payload)
+    if length < 126:
+        head = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return head + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """读取一个WebSocket帧，返回 (是否为最后一帧, 操作码, 内容)"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ValueError(f"消息超过 {MAX_BODY} 字节")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask and length:
+        # 按整数整体异或解码掩码
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """读取一条完整的WebSocket消息（合并分片，控制帧直接返回）"""
+    fin, opcode, payload = await _read_frame(reader)
+    if opcode >= WS_CLOSE or fin:
+        return opcode, payload
+    parts = [payload]
+    size = len(payload)
+    while True:
+        fin, next_opcode, payload = await _read_frame(reader)
+        if next_opcode >= WS_CLOSE:
+            return next_opcode, payload  # 分片之间的控制帧（简化处理：先返回控制帧）
+        parts.append(payload)
+        size += len(payload)
+        if size > MAX_BODY:
+            raise ValueError(f"消息超过 {MAX_BODY} 字节")
+        if fin:
+            return opcode, b''.join(parts)
+
+
+async def serve(navigations: Dict[str, Navigation3D], host: str = DEFAULT_HOST,
+                port: int = DEFAULT_PORT, executor: Optional[Executor] = None,
+                sensor_window: float = DEFAULT_SENSOR_WINDOW):
+    """
+    启动路由服务并一直运行
+
+    Args:
+        navigations: 建筑名称 -> Navigation3D
+        host: 监听地址
+        port: 端口
+        executor: 执行搜索的执行器
+        sensor_window: 传感器事件的合并窗口（秒）
+    """
+    service = RoutingService(navigations, executor, sensor_window)
+    server = await service.start(host, port)
+    print(f"路由服务已启动：http://{host}:{port}（WebSocket: ws://{host}:{port}/ws）")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="Navigation3D 路由服务")
+    parser.add_argument('--map', help="Navigation3D.save 保存的 .npy 地图，默认生成一栋示例建筑")
+    parser.add_argument('--name', default='default', help="建筑名称")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--sensor-window', type=float, default=DEFAULT_SENSOR_WINDOW,
+                        help="传感器事件的合并窗口（秒），0 表示每个请求立即写入")
+    args = parser.parse_args(argv)
+
+    if args.map:
+        # 服务需要修改地图（/api/map/update、传感器封锁），使用写时复制的映射
+        nav = Navigation3D.load(args.map, mmap_mode='c')
+    else:
+        from building_generator import generate_building
+        nav = generate_building()
+    try:
+        asyncio.run(serve({args.name: nav}, args.host, args.port,
+                          sensor_window=args.sensor_window))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
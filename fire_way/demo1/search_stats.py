@@ -0,0 +1,186 @@
+"""
+搜索统计
+可选地记录单次搜索展开的节点数、堆操作次数、开放列表峰值、邻居生成和堆操作的
+耗时以及失败原因。搜索循环通过局部变量调用堆操作和邻居函数，只有传入
+SearchStats 时才替换为计数版本，不统计时没有额外开销
+"""
+import time
+from typing import Callable, Dict, Optional, Tuple, List, Any
+
+
+# 失败原因
+START_BLOCKED = 'start_blocked'      # 起点不可通行
+GOAL_BLOCKED = 'goal_blocked'        # 终点不可通行
+UNREACHABLE = 'unreachable'          # 启发式已判定终点不可达（如ALT距离表）
+NO_PATH = 'no_path'                  # 开放列表耗尽
+UNKNOWN_METHOD = 'unknown_method'    # 未知的寻路方法
+
+
+class SearchStats:
+    """
+    单次搜索的统计信息
+
+    传给 find_path（或 Navigation3D.navigate）的 stats 参数后由搜索填写；
+    同一个对象再次使用时，begin 会清空上一次的结果。
+    计数项在引擎不提供时为None（如楼层图引擎的邻居生成耗时）。
+    """
+
+    def __init__(self, timing: bool = True):
+        """
+        初始化统计对象
+
+        Args:
+            timing: 是否分别统计邻居生成和堆操作的耗时（每次调用都要读取时钟，
+                会使搜索变慢；只需要计数时设为False）
+        """
+        self.timing = timing
+        self.reset()
+
+    def reset(self):
+        """清空统计结果"""
+        self.engine: Optional[str] = None
+        self.start = None
+        self.goal = None
+        self.nodes_expanded: Optional[int] = None
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.stale_pops: Optional[int] = None
+        self.peak_open = 0
+        self.neighbor_time: Optional[float] = None
+        self.heap_time: Optional[float] = None
+        self.total_time = 0.0
+        self.found = False
+        self.path_length = 0
+        self.failure_reason: Optional[str] = None
+        self.cache_hit = False
+        self._began = None
+
+    def begin(self, engine: str, start, goal):
+        """开始一次搜索"""
+        self.reset()
+        self.engine = engine
+        self.start = tuple(start)
+        self.goal = tuple(goal) if goal is not None else None
+        self._began = time.perf_counter()
+
+    def finish(self, path: Optional[List], failure_reason: Optional[str] = None):
+        """
+        结束搜索并填写结果
+
+        Args:
+            path: 搜索结果
+            failure_reason: 失败原因，path 为None且未指定时为 NO_PATH
+        """
+        if self._began is not None:
+            self.total_time = time.perf_counter() - self._began
+        self.found = path is not None
+        self.path_length = len(path) if path is not None else 0
+        if path is None:
+            self.failure_reason = failure_reason or self.failure_reason or NO_PATH
+        if self.stale_pops is None and self.nodes_expanded is not None:
+            # 弹出的条目要么被展开，要么是过期条目，要么是终点
+            self.stale_pops = max(self.heap_pops - self.nodes_expanded - int(self.found), 0)
+        return path
+
+    def fail(self, failure_reason: str) -> None:
+        """记录失败原因并结束搜索，返回None"""
+        return self.finish(None, failure_reason)
+
+    def wrap_heap(self, push: Callable, pop: Callable) -> Tuple[Callable, Callable]:
+        """
+        返回计数版本的堆操作
+
+        Args:
+            push: heapq.heappush
+            pop: heapq.heappop
+
+        Returns:
+            (push, pop)，调用方式与 heapq 相同
+        """
+        clock = time.perf_counter
+        if self.timing and self.heap_time is None:
+            self.heap_time = 0.0
+
+        if self.timing:
+            def counted_push(heap, item):
+                began = clock()
+                push(heap, item)
+                self.heap_time += clock() - began
+                self.heap_pushes += 1
+                if len(heap) > self.peak_open:
+                    self.peak_open = len(heap)
+
+            def counted_pop(heap):
+                began = clock()
+                item = pop(heap)
+                self.heap_time += clock() - began
+                self.heap_pops += 1
+                return item
+        else:
+            def counted_push(heap, item):
+                push(heap, item)
+                self.heap_pushes += 1
+                if len(heap) > self.peak_open:
+                    self.peak_open = len(heap)
+
+            def counted_pop(heap):
+                self.heap_pops += 1
+                return pop(heap)
+
+        return counted_push, counted_pop
+
+    def wrap_neighbors(self, neighbors: Callable, timed: bool = True) -> Callable:
+        """
+        返回计数版本的邻居函数（每展开一个节点调用一次）
+
+        Args:
+            neighbors: 原邻居函数
+            timed: 该函数是否代表全部邻居生成工作（否则只计数，不计入 neighbor_time）
+
+        Returns:
+            调用方式与原函数相同的函数
+        """
+        clock = time.perf_counter
+        if self.nodes_expanded is None:
+            self.nodes_expanded = 0
+        timed = timed and self.timing
+        if timed and self.neighbor_time is None:
+            self.neighbor_time = 0.0
+
+        if timed:
+            def counted(*args):
+                began = clock()
+                result = neighbors(*args)
+                self.neighbor_time += clock() - began
+                self.nodes_expanded += 1
+                return result
+        else:
+            def counted(*args):
+                self.nodes_expanded += 1
+                return neighbors(*args)
+        return counted
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典（便于输出为JSON或导出为监控指标）
+
+        Returns:
+            包含全部统计项的字典，时间单位为秒
+        """
+        return {
+            'engine': self.engine,
+            'start': self.start,
+            'goal': self.goal,
+            'found': self.found,
+            'failure_reason': self.failure_reason,
+            'cache_hit': self.cache_hit,
+            'path_length': self.path_length,
+            'nodes_expanded': self.nodes_expanded,
+            'heap_pushes': self.heap_pushes,
+            'heap_pops': self.heap_pops,
+            'stale_pops': self.stale_pops,
+            'peak_open': self.peak_open,
+            'neighbor_time': self.neighbor_time,
+            'heap_time': self.heap_time,
+            'total_time': self.total_time,
+        }
@@ -0,0 +1,248 @@
+"""
+传感器事件批量写入
+在一个短时间窗口内缓存传感器事件，按传感器合并读数，将传感器映射到网格区域，
+把进入危险状态的区域设为障碍物、恢复正常的区域还原为可通行，
+整批用 BuildingMap.apply_batch 一次写入（版本号只递增一次），
+下游的路径缓存、邻接图和订阅路线每批只更新一次
+"""
+import time
+import threading
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Callable
+from building_map import BuildingMap
+from hazard_field import (HazardField, TEMPERATURE_ALERT, TEMPERATURE_CRITICAL,
+                          SMOKE_ALERT, SMOKE_CRITICAL, _valid_event, _event_cell)
+
+
+Cell = Tuple[int, int, int]
+Box = Tuple[int, int, int, int, int, int]
+
+# 一氧化碳浓度阈值（ppm，与 fire-alert-system/config/thresholds.json 一致）
+CO_ALERT = 50.0
+CO_CRITICAL = 100.0
+
+
+class SensorIngestor:
+    """
+    传感器事件的批量写入器
+
+    每个传感器（按 sensorId，没有时按 location）对应一个长方体区域
+    (x1, y1, z1, x2, y2, z2)（含两端）。读数达到危险阈值（温度 TEMPERATURE_CRITICAL、
+    烟气 SMOKE_CRITICAL 或CO CO_CRITICAL）时区域内可通行的网格设为障碍物；
+    所有读数回到预警阈值以下时还原，介于两者之间时保持原状态（避免读数在阈值附近
+    来回跳动时反复修改地图）。只还原由本写入器设为障碍物的网格，多个传感器的区域
+    重叠时，只要还有一个处于危险状态，重叠部分就保持封锁。
+    """
+
+    def __init__(self, building_map: BuildingMap,
+                 regions: Optional[Dict[str, Box]] = None,
+                 window: float = 0.5,
+                 hazard: Optional[HazardField] = None,
+                 locations: Optional[Dict[str, Cell]] = None,
+                 radius: int = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化写入器
+
+        Args:
+            building_map: 建筑物地图对象
+            regions: 传感器编号或位置名称 -> 区域，未登记的传感器使用事件坐标
+                或 locations 中的位置，向四周扩展 radius 个网格（不跨楼层）
+            window: 缓存窗口（秒），窗口内的事件合并为一批
+            hazard: 可选，同时将合并后的事件写入危险场
+            locations: 位置名称到网格的映射（如 Navigation3D.landmarks）
+            radius: 未登记区域的传感器影响的水平半径
+            clock: 计时函数（秒）
+        """
+        if window < 0:
+            raise ValueError(f"缓存窗口 {window} 不能为负数")
+        self.map = building_map
+        self.regions: Dict[str, Box] = dict(regions or {})
+        self.window = window
+        self.hazard = hazard
+        self.locations = locations if locations is not None else {}
+        self.radius = radius
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._window_start: Optional[float] = None
+        # 传感器 -> (区域, 是否处于危险状态)
+        self.sensor_states: Dict[str, Tuple[Box, bool]] = {}
+        # 由本写入器设为障碍物的网格
+        self._blocked = np.zeros(building_map.grid.shape, dtype=bool)
+        self.batches = 0
+
+    def add(self, event: Dict) -> Optional[Dict]:
+        """
+        加入一个事件；窗口到期时写入当前批次
+
+        Args:
+            event: SensorHandler 格式的传感器事件
+
+        Returns:
+            写入了批次时返回 flush 的结果，否则返回None
+        """
+        return self.add_many([event])
+
+    def add_many(self, events: List[Dict]) -> Optional[Dict]:
+        """
+        加入多个事件；窗口到期时写入当前批次
+
+        Args:
+            events: 传感器事件列表（无效的事件被丢弃）
+
+        Returns:
+            写入了批次时返回 flush 的结果，否则返回None
+        """
+        valid = []
+        for event in events:
+            if _valid_event(event):
+                valid.append(event)
+            else:
+                print(f"警告：无效的传感器数据 {event}")
+        with self._lock:
+            if valid:
+                if self._window_start is None:
+                    self._window_start = self.clock()
+                self._pending.extend(valid)
+        return self.poll()
+
+    def time_until_flush(self) -> Optional[float]:
+        """距当前窗口到期的秒数（已到期为0），没有缓存的事件时返回None"""
+        with self._lock:
+            if self._window_start is None:
+                return None
+            return max(self.window - (self.clock() - self._window_start), 0.0)
+
+    def poll(self) -> Optional[Dict]:
+        """窗口已到期时写入当前批次（可由定时器周期调用）"""
+        with self._lock:
+            due = (self._window_start is not None and
+                   self.clock() - self._window_start >= self.window)
+        return self.flush() if due else None
+
+    def flush(self) -> Optional[Dict]:
+        """
+        立即写入缓存的事件
+
+        Returns:
+            {'events': 本批事件数, 'sensors': 合并后的传感器数, 'blocked': 设为障碍物的网格数,
+            'freed': 还原的网格数, 'version': 地图版本号, 'hazard_applied': 写入危险场的事件数}；
+            没有缓存的事件时返回None
+        """
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._window_start = None
+            if not events:
+                return None
+            merged = merge_events(events)
+            blocked, freed = self._apply(merged)
+            hazard_applied = 0
+            if self.hazard is not None:
+                hazard_applied = self.hazard.seed_from_events(
+                    [self._located(key, event) for key, event in merged.items()],
+                    self.locations)
+            self.batches += 1
+        return {'events': len(events), 'sensors': len(merged), 'blocked': blocked,
+                'freed': freed, 'version': self.map.version,
+                'hazard_applied': hazard_applied}
+
+    def region_of(self, key: str, event: Dict) -> Optional[Box]:
+        """传感器对应的区域：优先使用登记的区域，否则为事件位置周围的区域"""
+        box = self.regions.get(key)
+        if box is not None:
+            return tuple(int(v) for v in box)
+        cell = _event_cell(event, self.locations)
+        if cell is None or not self.map.is_valid_position(*cell):
+            return None
+        x, y, z = cell
+        r = self.radius
+        return (x - r, y, z - r, x + r, y, z + r)
+
+    def _located(self, key: str, event: Dict) -> Dict:
+        """为登记了区域、但没有坐标的事件补上区域中心作为坐标（用于写入危险场）"""
+        box = self.regions.get(key)
+        if box is None or event.get('coordinates') is not None:
+            return event
+        center = [(int(box[i]) + int(box[i + 3])) // 2 for i in range(3)]
+        return dict(event, coordinates=center)
+
+    def _apply(self, merged: Dict[str, Dict]) -> Tuple[int, int]:
+        """更新传感器状态，并将变化的区域一次写入地图，返回 (封锁数, 还原数)"""
+        touched = []
+        for key, event in merged.items():
+            box = self.region_of(key, event)
+            if box is None:
+                print(f"警告：无法确定传感器 '{key}' 的区域")
+                continue
+            old_box, old_hot = self.sensor_states.get(key, (None, False))
+            hot = old_hot
+            if (event['temperature'] >= TEMPERATURE_CRITICAL or
+                    event['smoke'] >= SMOKE_CRITICAL or event['co'] >= CO_CRITICAL):
+                hot = True
+            elif (event['temperature'] < TEMPERATURE_ALERT and
+                  event['smoke'] < SMOKE_ALERT and event['co'] < CO_ALERT):
+                hot = False
+            self.sensor_states[key] = (box, hot)
+            if hot != old_hot or (hot and box != old_box):
+                touched.append(box)
+                if old_box is not None and old_box != box:
+                    touched.append(old_box)
+        if not touched:
+            return 0, 0
+
+        # 只在受影响区域的包围盒内重新计算
+        shape = self.map.grid.shape
+        lo = [max(min(box[i] for box in touched), 0) for i in range(3)]
+        hi = [min(max(box[i + 3] for box in touched), shape[i] - 1) for i in range(3)]
+        if any(l > h for l, h in zip(lo, hi)):
+            return 0, 0
+        window = tuple(slice(l, h + 1) for l, h in zip(lo, hi))
+        desired = np.zeros([h - l + 1 for l, h in zip(lo, hi)], dtype=bool)
+        for box, hot in self.sensor_states.values():
+            if not hot:
+                continue
+            clip = tuple(slice(max(box[i], lo[i]) - lo[i], min(box[i + 3], hi[i]) + 1 - lo[i])
+                         for i in range(3))
+            if all(s.start < s.stop for s in clip):
+                desired[clip] = True
+
+        previous = self._blocked[window]
+        to_block = desired & ~previous & (self.map.grid[window] == 0)
+        to_free = previous & ~desired
+        self.map.apply_batch(to_block, to_free, tuple(lo))
+        self._blocked[window] = (previous & ~to_free) | to_block
+        return int(np.count_nonzero(to_block)), int(np.count_nonzero(to_free))
+
+    def blocked_mask(self) -> np.ndarray:
+        """由本写入器设为障碍物的网格（布尔数组副本）"""
+        with self._lock:
+            return self._blocked.copy()
+
+
+def merge_events(events: List[Dict]) -> Dict[str, Dict]:
+    """
+    按传感器合并事件
+
+    同一传感器（sensorId，没有时为 location）在一批中的多条读数合并为一条：
+    温度、烟气和CO取最大值（偏保守），其余字段取时间戳最新的一条。
+
+    Args:
+        events: 有效的传感器事件列表
+
+    Returns:
+        传感器 -> 合并后的事件
+    """
+    merged: Dict[str, Dict] = {}
+    for event in events:
+        key = str(event.get('sensorId') or event['location'])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(event)
+            continue
+        latest = event if event.get('timestamp', 0) >= current.get('timestamp', 0) else current
+        combined = dict(latest)
+        for field in ('temperature', 'smoke', 'co'):
+            combined[field] = max(current[field], event[field])
+        merged[key] = combined
+    return merged
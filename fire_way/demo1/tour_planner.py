@@ -0,0 +1,253 @@
+"""
+多目标巡访路线
+从每个途经点各运行一次Dijkstra得到真实的两两距离矩阵，求解访问顺序
+（目标较少时用Held-Karp动态规划求精确解，较多时用最近邻加2-opt），
+再用保存的最短路径树拼接各段路径。目标通常是固定的地标（如巡查的房间），
+以地标为根的最短路径树可以缓存，地图不变时每次规划只需从起点搜索一次
+"""
+import numpy as np
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+from compiled_graph import CompiledGraph, dijkstra_buckets
+
+
+Cell = Tuple[int, int, int]
+
+# 目标数不超过该值时用Held-Karp求精确解（状态数为 2^n * n）
+EXACT_LIMIT = 15
+
+# 默认最多缓存的最短路径树数（每棵树每个网格12字节）
+MAX_TREES = 32
+
+
+class ShortestPathTrees:
+    """
+    以固定位置（如地标）为根的完整最短路径树缓存
+
+    每棵树保存到所有网格的距离和父节点，记录计算时的 BuildingMap.version，
+    地图变化后在下次查询时全部重新计算（与 ExitDistanceField 相同）。
+    超过 max_trees 时丢弃最久未使用的树。
+    """
+
+    def __init__(self, graph: CompiledGraph, max_trees: int = MAX_TREES):
+        """
+        初始化缓存
+
+        Args:
+            graph: 编译后的邻接图
+            max_trees: 最多缓存的树数
+        """
+        self.graph = graph
+        self.map = graph.map
+        self.max_trees = max_trees
+        self.version = self.map.version
+        self.trees: 'OrderedDict[Cell, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+
+    def get(self, root: Cell) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取以 root 为根的最短路径树，不在缓存中时计算
+
+        Args:
+            root: 树根位置
+
+        Returns:
+            (dist, parent)：到各网格的最短距离和父节点索引
+        """
+        if self.map.version != self.version:
+            self.trees.clear()
+            self.version = self.map.version
+        root = tuple(root)
+        tree = self.trees.get(root)
+        if tree is None:
+            tree = dijkstra_buckets(self.graph, [_encode(self.graph, root)])
+            self.trees[root] = tree
+            while len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        else:
+            self.trees.move_to_end(root)
+        return tree
+
+
+def distance_matrix(graph: CompiledGraph, waypoints: List[Cell],
+                    trees: Optional[ShortestPathTrees] = None) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    计算途经点之间的最短距离矩阵
+
+    移动代价是对称的，因此第 i 个点只需搜索到编号更大的途经点，
+    最后一个点不需要搜索。给出 trees 时第0个点（起点）之外的点
+    使用缓存的完整最短路径树，只有起点需要搜索。
+
+    Args:
+        graph: 编译后的邻接图
+        waypoints: 途经点列表
+        trees: 可选，第1个点之后的途经点的最短路径树缓存
+
+    Returns:
+        (matrix, parents)：matrix[i, j] 为第 i 个点到第 j 个点的最短距离（不可达为 inf），
+        parents[i] 为从第 i 个点出发的最短路径树（至少覆盖编号更大的途经点）
+    """
+    indices = [_encode(graph, point) for point in waypoints]
+    matrix = np.zeros((len(indices), len(indices)))
+    parents = []
+    for i, source in enumerate(indices[:-1]):
+        later = indices[i + 1:]
+        if trees is not None and i > 0:
+            dist, parent = trees.get(waypoints[i])
+        else:
+            # 编号更大的途经点都确定距离后即可停止
+            dist, parent = dijkstra_buckets(graph, [source], later)
+        matrix[i, i + 1:] = matrix[i + 1:, i] = dist[later]
+        parents.append(parent)
+    return matrix, parents
+
+
+def held_karp(matrix: np.ndarray) -> Optional[List[int]]:
+    """
+    精确求解从第0个点出发、访问其余所有点的最短开放路线
+
+    按子集大小分层，每层对同一终点的所有子集用NumPy一次更新。
+
+    Args:
+        matrix: 距离矩阵，第0行为起点
+
+    Returns:
+        访问顺序（不含起点的点编号），不可行时返回None
+    """
+    n = matrix.shape[0] - 1
+    if n == 0:
+        return []
+    goal_matrix = matrix[1:, 1:]
+    full = (1 << n) - 1
+    masks = np.arange(full + 1, dtype=np.int64)
+    popcount = np.zeros(full + 1, dtype=np.int8)
+    for bit in range(n):
+        popcount += ((masks >> bit) & 1).astype(np.int8)
+
+    # cost[mask, j]：访问完 mask 中的点并停在 j 的最短距离
+    cost = np.full((full + 1, n), np.inf)
+    previous = np.full((full + 1, n), -1, dtype=np.int8)
+    for j in range(n):
+        cost[1 << j, j] = matrix[0, j + 1]
+
+    for size in range(2, n + 1):
+        layer = masks[popcount == size]
+        for j in range(n):
+            with_j = layer[(layer >> j) & 1 == 1]
+            candidates = cost[with_j ^ (1 << j)] + goal_matrix[:, j]
+            best = candidates.argmin(axis=1)
+            cost[with_j, j] = candidates[np.arange(with_j.size), best]
+            previous[with_j, j] = best
+
+    last = int(cost[full].argmin())
+    if not np.isfinite(cost[full, last]):
+        return None
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        mask, last = mask ^ (1 << last), int(previous[mask, last])
+    order.reverse()
+    return order
+
+
+def nearest_neighbor_two_opt(matrix: np.ndarray) -> Optional[List[int]]:
+    """
+    近似求解：最近邻构造初始路线，再用2-opt（翻转一段访问顺序）改进到局部最优
+
+    Args:
+        matrix: 距离矩阵，第0行为起点
+
+    Returns:
+        访问顺序（不含起点的点编号），不可行时返回None
+    """
+    n = matrix.shape[0]
+    remaining = set(range(1, n))
+    tour = [0]
+    while remaining:
+        current = tour[-1]
+        nearest = min(remaining, key=lambda j: matrix[current, j])
+        if not np.isfinite(matrix[current, nearest]):
+            return None
+        tour.append(nearest)
+        remaining.remove(nearest)
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, n):
+                c = tour[j]
+                # 开放路线的最后一段没有后继
+                d = tour[j + 1] if j + 1 < n else None
+                before = matrix[a, b] + (matrix[c, d] if d is not None else 0.0)
+                after = matrix[a, c] + (matrix[b, d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    b = tour[i]
+                    improved = True
+    return tour[1:]
+
+
+def plan_tour(graph: CompiledGraph, start: Cell, goals: List[Cell],
+              exact_limit: int = EXACT_LIMIT,
+              trees: Optional[ShortestPathTrees] = None) -> Optional[List[Cell]]:
+    """
+    规划从起点出发经过所有目标的最短路线（访问顺序任意，终点为最后访问的目标）
+
+    Args:
+        graph: 编译后的邻接图
+        start: 起始位置
+        goals: 目标位置列表
+        exact_limit: 目标数不超过该值时求精确解
+        trees: 可选，目标的最短路径树缓存（见 ShortestPathTrees）
+
+    Returns:
+        完整路径，如果有目标无法到达则返回None
+    """
+    if not goals:
+        return None
+    waypoints = [tuple(start)] + [tuple(goal) for goal in goals]
+    matrix, parents = distance_matrix(graph, waypoints, trees)
+
+    unreachable = [waypoints[j] for j in range(1, len(waypoints))
+                   if not np.isfinite(matrix[0, j])]
+    if unreachable:
+        print(f"无法到达目标 {unreachable[0]}")
+        return None
+
+    if len(goals) <= exact_limit:
+        order = held_karp(matrix)
+    else:
+        order = nearest_neighbor_two_opt(matrix)
+    if order is None:
+        return None
+
+    path = [waypoints[0]]
+    current = 0
+    for target in order:
+        if target > current:
+            leg = _leg(graph, parents[current], waypoints[target])
+            leg.reverse()
+        else:
+            # 以目标为根的树中，从当前点回溯即为正向路径
+            leg = _leg(graph, parents[target], waypoints[current])
+        path.extend(leg[1:])
+        current = target
+    return path
+
+
+def _encode(graph: CompiledGraph, pos: Cell) -> int:
+    return (pos[0] * graph.map.height + pos[1]) * graph.map.depth + pos[2]
+
+
+def _leg(graph: CompiledGraph, parent: np.ndarray, cell: Cell) -> List[Cell]:
+    """沿最短路径树从 cell 回溯到树根，返回 [cell, ..., 树根]"""
+    hd = graph.map.height * graph.map.depth
+    index = _encode(graph, cell)
+    cells = []
+    while index != -1:
+        x, rest = divmod(index, hd)
+        cells.append((x, rest // graph.map.depth, rest % graph.map.depth))
+        index = int(parent[index])
+    return cells
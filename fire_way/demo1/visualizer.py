@@ -5,6 +5,7 @@
 try:
     import matplotlib.pyplot as plt
     from mpl_toolkits.mplot3d import Axes3D
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
     import numpy as np
     HAS_MATPLOTLIB = True
 except ImportError:
@@ -12,9 +13,11 @@ except ImportError:
     print("警告：matplotlib未安装，3D可视化功能不可用")
     print("可以使用 'pip install matplotlib' 安装")
 
+from voxel_mesh import extract_mesh
+
 
 def visualize_path_3d(path, building_map=None, show_obstacles=True, 
-                     title="3D路径可视化"):
+                     title="3D路径可视化", show=True, save_path=None):
     """
     在3D空间中可视化路径
     
@@ -23,6 +26,11 @@ def visualize_path_3d(path, building_map=None, show_obstacles=True,
         building_map: 建筑物地图对象（可选，用于显示障碍物）
         show_obstacles: 是否显示障碍物
         title: 图表标题
+        show: 是否打开窗口显示（无图形界面时设为False）
+        save_path: 可选，保存图像的文件路径
+    
+    Returns:
+        matplotlib 的 Figure 对象（show=True 时窗口关闭后返回）
     """
     if not HAS_MATPLOTLIB:
         print("matplotlib未安装，无法进行3D可视化")
@@ -50,15 +58,14 @@ def visualize_path_3d(path, building_map=None, show_obstacles=True,
     ax.scatter([x_coords[-1]], [y_coords[-1]], [z_coords[-1]], 
               c='red', s=200, marker='s', label='终点')
     
-    # 显示障碍物（如果提供地图）
+    # 显示障碍物（如果提供地图）：绘制合并后的外露面，而不是抽样的体素
     if building_map and show_obstacles:
-        obstacles = np.where(building_map.grid == 1)
-        if len(obstacles[0]) > 0:
-            # 只显示部分障碍物以避免过于拥挤
-            step = max(1, len(obstacles[0]) // 1000)  # 最多显示1000个障碍物
-            ax.scatter(obstacles[0][::step], obstacles[1][::step], 
-                      obstacles[2][::step], c='gray', alpha=0.3, 
-                      s=10, marker='s', label='障碍物')
+        mesh = extract_mesh(building_map.grid)
+        if mesh['quads'] > 0:
+            # 网格立方体以整数坐标为中心，与路径点对齐
+            quads = mesh['positions'].reshape(-1, 4, 3) - 0.5
+            ax.add_collection3d(Poly3DCollection(quads, facecolors='gray', alpha=0.15,
+                                                 edgecolors='none', label='障碍物'))
     
     # 设置标签和标题
     ax.set_xlabel('X轴')
@@ -74,11 +81,11 @@ def visualize_path_3d(path, building_map=None, show_obstacles=True,
         ax.set_zlim(0, building_map.depth)
     
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show, save_path)
 
 
 def visualize_path_2d_projections(path, building_map=None, 
-                                  show_obstacles=True):
+                                  show_obstacles=True, show=True, save_path=None):
     """
     显示路径在三个平面上的投影
     
@@ -86,6 +93,11 @@ def visualize_path_2d_projections(path, building_map=None,
         path: 路径点列表
         building_map: 建筑物地图对象
         show_obstacles: 是否显示障碍物
+        show: 是否打开窗口显示（无图形界面时设为False）
+        save_path: 可选，保存图像的文件路径
+    
+    Returns:
+        matplotlib 的 Figure 对象
     """
     if not HAS_MATPLOTLIB:
         print("matplotlib未安装，无法进行可视化")
@@ -138,7 +150,18 @@ def visualize_path_2d_projections(path, building_map=None,
     axes[2].grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show, save_path)
+
+
+def _finish(fig, show, save_path):
+    """保存并（可选）显示图像；不显示时关闭图像，避免批量生成时占用内存"""
+    if save_path:
+        fig.savefig(save_path, dpi=100)
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+    return fig
 
 
 if __name__ == "__main__":
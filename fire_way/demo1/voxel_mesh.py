@@ -0,0 +1,246 @@
+"""
+体素表面网格导出
+只提取障碍物与可通行网格（或地图边界）之间的外露面，同一平面上相邻的面
+合并为大的矩形（先沿一个方向合并成条，再把起止相同的相邻条合并），
+导出为 OBJ 或 glTF 二进制（.glb）文件供前端加载。全部步骤用NumPy对整个网格
+一次完成
+"""
+import json
+import struct
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+# 六个面的方向：(轴, 符号)
+FACE_DIRECTIONS = [(0, 1), (0, -1), (1, 1), (1, -1), (2, 1), (2, -1)]
+
+# glTF 常量
+_GLB_MAGIC = 0x46546C67           # 'glTF'
+_GLB_JSON = 0x4E4F534A            # 'JSON'
+_GLB_BIN = 0x004E4942             # 'BIN\0'
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+
+def exposed_faces(solid: np.ndarray, axis: int, sign: int) -> np.ndarray:
+    """
+    朝某个方向的外露面
+
+    Args:
+        solid: 布尔网格（True 为实体）
+        axis: 面的法向所在的轴
+        sign: 1 为正方向，-1 为负方向
+
+    Returns:
+        与 solid 同形状的布尔数组，True 表示该体素在此方向上的面外露
+    """
+    neighbor = np.zeros_like(solid)
+    n = solid.shape[axis]
+    src = [slice(None)] * 3
+    dst = [slice(None)] * 3
+    if sign > 0:
+        src[axis], dst[axis] = slice(1, n), slice(0, n - 1)
+    else:
+        src[axis], dst[axis] = slice(0, n - 1), slice(1, n)
+    neighbor[tuple(dst)] = solid[tuple(src)]
+    return solid & ~neighbor
+
+
+def merge_quads(mask: np.ndarray) -> np.ndarray:
+    """
+    将一组二维切片中的格子合并为矩形
+
+    先把每行中连续的格子合并为条，再把相邻行中起止列相同的条合并。
+
+    Args:
+        mask: (切片, 行, 列) 布尔数组
+
+    Returns:
+        (M, 5) 整数数组，每行为 (切片, 起始行, 结束行, 起始列, 结束列)（含两端）
+    """
+    slices, rows, cols = mask.shape
+    padded = np.zeros((slices, rows, cols + 2), dtype=np.int8)
+    padded[:, :, 1:-1] = mask
+    edges = np.diff(padded, axis=2)
+    s, a, b0 = np.nonzero(edges == 1)
+    b1 = np.nonzero(edges == -1)[2] - 1
+    if len(s) == 0:
+        return np.zeros((0, 5), dtype=np.int64)
+
+    # 按 (切片, 起始列, 结束列, 行) 排序，行号连续的条属于同一个矩形
+    order = np.lexsort((a, b1, b0, s))
+    s, a, b0, b1 = s[order], a[order], b0[order], b1[order]
+    first = np.ones(len(s), dtype=bool)
+    first[1:] = ((s[1:] != s[:-1]) | (b0[1:] != b0[:-1]) |
+                 (b1[1:] != b1[:-1]) | (a[1:] != a[:-1] + 1))
+    starts = np.flatnonzero(first)
+    last = np.append(starts[1:], len(s)) - 1
+    return np.stack([s[starts], a[starts], a[last], b0[starts], b1[starts]],
+                    axis=1).astype(np.int64)
+
+
+def extract_mesh(grid: np.ndarray, solid: Optional[np.ndarray] = None,
+                 scale: Tuple[float, float, float] = (1.0, 1.0, 1.0)) -> Dict:
+    """
+    提取障碍物的表面网格
+
+    网格 (x, y, z) 对应的立方体为 [x, x+1] x [y, y+1] x [z, z+1]（乘以 scale），
+    地图边界之外视为空，因此外墙的外侧面也会导出。每个矩形使用4个独立的顶点
+    （法向与面一致，便于平面着色）和两个三角形，三角形按逆时针方向朝外。
+
+    Args:
+        grid: 占用网格（非0为障碍物）
+        solid: 可选，直接指定实体网格的布尔数组（如只导出部分楼层）
+        scale: 每个网格在X、Y、Z方向的尺寸（如楼层高度与网格宽度不同）
+
+    Returns:
+        {'positions': (V, 3) float32, 'normals': (V, 3) float32,
+        'indices': (T*3,) uint32, 'quads': 矩形数, 'faces': 合并前的外露面数}
+    """
+    if solid is None:
+        solid = np.asarray(grid) != 0
+    scale = np.asarray(scale, dtype=np.float32)
+    positions, normals, quad_count, face_count = [], [], 0, 0
+    for axis, sign in FACE_DIRECTIONS:
+        exposed = exposed_faces(solid, axis, sign)
+        face_count += int(np.count_nonzero(exposed))
+        # 将法向轴放到最前面，其余两轴按原顺序作为行和列
+        rest = [k for k in range(3) if k != axis]
+        quads = merge_quads(np.ascontiguousarray(np.transpose(exposed, [axis] + rest)))
+        if len(quads) == 0:
+            continue
+        quad_count += len(quads)
+        plane = quads[:, 0] + (1 if sign > 0 else 0)
+        r0, r1 = quads[:, 1], quads[:, 2] + 1
+        c0, c1 = quads[:, 3], quads[:, 4] + 1
+        # 四个角（行, 列），(r0,c0)->(r1,c0)->(r1,c1)->(r0,c1) 的法向为 rest[0] x rest[1]
+        corners = [(r0, c0), (r1, c0), (r1, c1), (r0, c1)]
+        normal_sign = 1 if (rest[1] - rest[0]) % 3 == 1 else -1
+        if normal_sign * sign < 0:
+            corners = corners[::-1]
+        quad_positions = np.empty((len(quads), 4, 3), dtype=np.float32)
+        for i, (r, c) in enumerate(corners):
+            quad_positions[:, i, axis] = plane
+            quad_positions[:, i, rest[0]] = r
+            quad_positions[:, i, rest[1]] = c
+        positions.append(quad_positions.reshape(-1, 3) * scale)
+        normal = np.zeros(3, dtype=np.float32)
+        normal[axis] = sign
+        normals.append(np.broadcast_to(normal, (len(quads) * 4, 3)))
+
+    if quad_count == 0:
+        return {'positions': np.zeros((0, 3), dtype=np.float32),
+                'normals': np.zeros((0, 3), dtype=np.float32),
+                'indices': np.zeros(0, dtype=np.uint32), 'quads': 0, 'faces': 0}
+    base = np.arange(quad_count, dtype=np.uint32)[:, None] * 4
+    indices = (base + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)).reshape(-1)
+    return {
+        'positions': np.concatenate(positions),
+        'normals': np.ascontiguousarray(np.concatenate(normals)),
+        'indices': indices,
+        'quads': quad_count,
+        'faces': face_count,
+    }
+
+
+def encode_glb(mesh: Dict, name: str = 'building') -> bytes:
+    """
+    将网格编码为glTF 2.0二进制文件（.glb）
+
+    Args:
+        mesh: extract_mesh 的结果
+        name: 网格名称
+
+    Returns:
+        .glb 文件内容
+    """
+    positions = np.ascontiguousarray(mesh['positions'], dtype='<f4')
+    normals = np.ascontiguousarray(mesh['normals'], dtype='<f4')
+    indices = np.ascontiguousarray(mesh['indices'], dtype='<u4')
+    if len(positions) == 0:
+        raise ValueError("网格为空，没有可导出的面")
+    blobs = [positions.tobytes(), normals.tobytes(), indices.tobytes()]
+    offsets = np.cumsum([0] + [len(b) for b in blobs]).tolist()
+    document = {
+        'asset': {'version': '2.0', 'generator': 'fire_way voxel_mesh'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0, 'name': name}],
+        'meshes': [{'name': name, 'primitives': [
+            {'attributes': {'POSITION': 0, 'NORMAL': 1}, 'indices': 2, 'mode': 4}]}],
+        'buffers': [{'byteLength': offsets[-1]}],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': offsets[0], 'byteLength': len(blobs[0]),
+             'target': _ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': offsets[1], 'byteLength': len(blobs[1]),
+             'target': _ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': offsets[2], 'byteLength': len(blobs[2]),
+             'target': _ELEMENT_ARRAY_BUFFER},
+        ],
+        'accessors': [
+            {'bufferView': 0, 'componentType': _FLOAT, 'count': len(positions), 'type': 'VEC3',
+             'min': positions.min(axis=0).tolist(), 'max': positions.max(axis=0).tolist()},
+            {'bufferView': 1, 'componentType': _FLOAT, 'count': len(normals), 'type': 'VEC3'},
+            {'bufferView': 2, 'componentType': _UNSIGNED_INT, 'count': len(indices),
+             'type': 'SCALAR'},
+        ],
+    }
+    json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    bin_chunk = b''.join(blobs)
+    bin_chunk += b'\x00' * (-len(bin_chunk) % 4)
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b''.join([
+        struct.pack('<III', _GLB_MAGIC, 2, total),
+        struct.pack('<II', len(json_chunk), _GLB_JSON), json_chunk,
+        struct.pack('<II', len(bin_chunk), _GLB_BIN), bin_chunk,
+    ])
+
+
+def write_glb(mesh: Dict, filename: str, name: str = 'building'):
+    """将网格保存为 .glb 文件"""
+    with open(filename, 'wb') as f:
+        f.write(encode_glb(mesh, name))
+
+
+def write_obj(mesh: Dict, filename: str):
+    """
+    将网格保存为 OBJ 文本文件（每个矩形写为一个四边形面，不写法向）
+
+    Args:
+        mesh: extract_mesh 的结果
+        filename: 文件路径
+    """
+    positions = mesh['positions']
+    faces = np.arange(1, len(positions) + 1, dtype=np.int64).reshape(-1, 4)
+    with open(filename, 'w') as f:
+        f.write(f"# {len(positions)} vertices, {len(faces)} quads\n")
+        np.savetxt(f, positions, fmt='v %.6g %.6g %.6g')
+        np.savetxt(f, faces, fmt='f %d %d %d %d')
+
+
+def export_mesh(grid: np.ndarray, filename: str,
+                scale: Tuple[float, float, float] = (1.0, 1.0, 1.0)) -> Dict:
+    """
+    提取表面网格并按扩展名（.glb 或 .obj）保存
+
+    Args:
+        grid: 占用网格
+        filename: 输出文件路径
+        scale: 每个网格的尺寸
+
+    Returns:
+        {'quads': 矩形数, 'faces': 合并前的外露面数, 'vertices': 顶点数, 'filename': 文件路径}
+    """
+    mesh = extract_mesh(grid, scale=scale)
+    lower = filename.lower()
+    if lower.endswith('.glb'):
+        write_glb(mesh, filename)
+    elif lower.endswith('.obj'):
+        write_obj(mesh, filename)
+    else:
+        raise ValueError(f"不支持的文件格式 '{filename}'（应为 .glb 或 .obj）")
+    return {'quads': mesh['quads'], 'faces': mesh['faces'],
+            'vertices': len(mesh['positions']), 'filename': filename}